@@ -0,0 +1,25 @@
+"""face semijoin index
+
+Revision ID: 0003_face_semijoin_index
+Revises: 0002_share_links
+Create Date: 2026-10-19 09:10:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_face_semijoin_index"
+down_revision = "0002_share_links"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_faces_media_id_person_id", "faces", ["media_id", "person_id"])
+    op.drop_index("ix_faces_media_id", table_name="faces")
+
+
+def downgrade() -> None:
+    op.create_index("ix_faces_media_id", "faces", ["media_id"])
+    op.drop_index("ix_faces_media_id_person_id", table_name="faces")
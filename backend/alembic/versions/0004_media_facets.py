@@ -0,0 +1,67 @@
+"""media facet rollup
+
+Revision ID: 0004_media_facets
+Revises: 0003_face_semijoin_index
+Create Date: 2026-10-19 10:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_media_facets"
+down_revision = "0003_face_semijoin_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_facets",
+        sa.Column("key", sa.String(length=32), primary_key=True),
+        sa.Column("month", sa.Date(), nullable=True),
+        sa.Column("season", sa.String(length=16), nullable=True),
+        sa.Column("media_type", sa.String(length=32), nullable=False),
+        sa.Column("camera_make", sa.String(length=128), nullable=True),
+        sa.Column("camera_model", sa.String(length=128), nullable=True),
+        sa.Column("has_faces", sa.Boolean(), nullable=False),
+        sa.Column("has_gps", sa.Boolean(), nullable=False),
+        sa.Column("count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    op.create_index("ix_media_facets_month", "media_facets", ["month"])
+
+    # The key expression mirrors app.services.facets._key_digest.
+    op.execute(
+        """
+        INSERT INTO media_facets (key, month, season, media_type, camera_make, camera_model, has_faces, has_gps, count)
+        SELECT
+            md5(concat_ws('|',
+                CASE WHEN month IS NULL THEN '-' ELSE '=' || to_char(month, 'YYYY-MM-DD') END,
+                CASE WHEN season IS NULL THEN '-' ELSE '=' || season END,
+                '=' || media_type,
+                CASE WHEN camera_make IS NULL THEN '-' ELSE '=' || camera_make END,
+                CASE WHEN camera_model IS NULL THEN '-' ELSE '=' || camera_model END,
+                CASE WHEN has_faces THEN '=t' ELSE '=f' END,
+                CASE WHEN has_gps THEN '=t' ELSE '=f' END
+            )),
+            month, season, media_type, camera_make, camera_model, has_faces, has_gps, count(*)
+        FROM (
+            SELECT
+                date_trunc('month', captured_at AT TIME ZONE 'UTC')::date AS month,
+                season,
+                media_type,
+                camera_make,
+                camera_model,
+                face_count > 0 AS has_faces,
+                has_gps
+            FROM media
+        ) AS keyed
+        GROUP BY month, season, media_type, camera_make, camera_model, has_faces, has_gps
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_facets_month", table_name="media_facets")
+    op.drop_table("media_facets")
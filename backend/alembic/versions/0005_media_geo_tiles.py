@@ -0,0 +1,80 @@
+"""media geo tiles
+
+Revision ID: 0005_media_geo_tiles
+Revises: 0004_media_facets
+Create Date: 2026-10-19 11:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_media_geo_tiles"
+down_revision = "0004_media_facets"
+branch_labels = None
+depends_on = None
+
+# Web Mercator tile coordinates at zoom 16, mirroring app.services.geo_tiles.tile_xy.
+TILE_XY_SQL = """
+    SELECT
+        id,
+        gps_lat,
+        gps_lon,
+        least(65535, greatest(0, floor((gps_lon + 180.0) / 360.0 * 65536)))::int AS x,
+        least(65535, greatest(0, floor(
+            (1.0 - ln(tan(radians(greatest(-85.05112878, least(85.05112878, gps_lat))))
+                + 1.0 / cos(radians(greatest(-85.05112878, least(85.05112878, gps_lat))))) / pi()) / 2.0 * 65536
+        )))::int AS y
+    FROM media
+    WHERE gps_lat IS NOT NULL AND gps_lon IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    op.add_column("media", sa.Column("geo_quadkey", sa.String(length=16), nullable=True))
+    op.create_index(
+        "ix_media_geo_quadkey",
+        "media",
+        ["geo_quadkey"],
+        postgresql_ops={"geo_quadkey": "text_pattern_ops"},
+    )
+
+    op.create_table(
+        "media_geo_tiles",
+        sa.Column("zoom", sa.SmallInteger(), primary_key=True),
+        sa.Column("tile_x", sa.Integer(), primary_key=True),
+        sa.Column("tile_y", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("lat_sum", sa.Float(), server_default=sa.text("0"), nullable=False),
+        sa.Column("lon_sum", sa.Float(), server_default=sa.text("0"), nullable=False),
+    )
+
+    op.execute(
+        f"""
+        UPDATE media SET geo_quadkey = keyed.quadkey
+        FROM (
+            SELECT t.id, (
+                SELECT string_agg((((t.x >> (16 - i)) & 1) + 2 * ((t.y >> (16 - i)) & 1))::text, '' ORDER BY i)
+                FROM generate_series(1, 16) AS i
+            ) AS quadkey
+            FROM ({TILE_XY_SQL}) AS t
+        ) AS keyed
+        WHERE media.id = keyed.id
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO media_geo_tiles (zoom, tile_x, tile_y, count, lat_sum, lon_sum)
+        SELECT z, t.x >> (16 - z), t.y >> (16 - z), count(*), sum(t.gps_lat), sum(t.gps_lon)
+        FROM ({TILE_XY_SQL}) AS t
+        CROSS JOIN generate_series(0, 16) AS z
+        GROUP BY z, t.x >> (16 - z), t.y >> (16 - z)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("media_geo_tiles")
+    op.drop_index("ix_media_geo_quadkey", table_name="media")
+    op.drop_column("media", "geo_quadkey")
@@ -0,0 +1,24 @@
+"""media video preview
+
+Revision ID: 0006_media_video_preview
+Revises: 0005_media_geo_tiles
+Create Date: 2026-10-19 12:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_media_video_preview"
+down_revision = "0005_media_geo_tiles"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media", sa.Column("preview_path", sa.String(length=512), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("media", "preview_path")
@@ -0,0 +1,26 @@
+"""media path byte order indexes
+
+Revision ID: 0007_media_path_byte_order
+Revises: 0006_media_video_preview
+Create Date: 2026-10-19 13:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_media_path_byte_order"
+down_revision = "0006_media_video_preview"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_media_storage_path_c", "media", [sa.text('storage_path COLLATE "C"')])
+    op.create_index("ix_media_thumb_path_c", "media", [sa.text('thumb_path COLLATE "C"')])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_thumb_path_c", table_name="media")
+    op.drop_index("ix_media_storage_path_c", table_name="media")
@@ -0,0 +1,51 @@
+"""media change log for delta sync
+
+Revision ID: 0008_media_changes
+Revises: 0007_media_path_byte_order
+Create Date: 2026-10-19 16:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_media_changes"
+down_revision = "0007_media_path_byte_order"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_changes",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "txid", sa.BigInteger(), server_default=sa.text("pg_current_xact_id()::text::bigint"), nullable=False
+        ),
+        sa.Column("entity", sa.String(length=16), nullable=False),
+        sa.Column("entity_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("op", sa.String(length=8), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_media_changes_cursor", "media_changes", ["txid", "id"])
+
+    # Seed one upsert per existing row so a client syncing from scratch receives the whole library.
+    op.execute(
+        """
+        INSERT INTO media_changes (entity, entity_id, op)
+        SELECT 'media', id, 'upsert' FROM media ORDER BY imported_at
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO media_changes (entity, entity_id, op)
+        SELECT 'person', id, 'upsert' FROM people ORDER BY created_at
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_changes_cursor", table_name="media_changes")
+    op.drop_table("media_changes")
@@ -0,0 +1,32 @@
+"""media processing state
+
+Revision ID: 0009_media_processing_state
+Revises: 0008_media_changes
+Create Date: 2026-10-19 17:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009_media_processing_state"
+down_revision = "0008_media_changes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows were processed before states were tracked; new rows start out queued.
+    op.add_column(
+        "media", sa.Column("processing_state", sa.String(length=16), server_default="done", nullable=False)
+    )
+    op.alter_column("media", "processing_state", server_default="queued")
+    op.add_column("media", sa.Column("processing_updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("media", sa.Column("processing_error", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("media", "processing_error")
+    op.drop_column("media", "processing_updated_at")
+    op.drop_column("media", "processing_state")
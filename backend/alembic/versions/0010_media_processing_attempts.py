@@ -0,0 +1,26 @@
+"""media processing attempts
+
+Revision ID: 0010_media_processing_attempts
+Revises: 0009_media_processing_state
+Create Date: 2026-10-19 18:40:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010_media_processing_attempts"
+down_revision = "0009_media_processing_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "media", sa.Column("processing_attempts", sa.Integer(), server_default=sa.text("0"), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("media", "processing_attempts")
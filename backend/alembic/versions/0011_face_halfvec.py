@@ -0,0 +1,50 @@
+"""face halfvec embeddings
+
+Revision ID: 0011_face_halfvec
+Revises: 0010_media_processing_attempts
+Create Date: 2026-10-19 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_face_halfvec"
+down_revision = "0010_media_processing_attempts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # halfvec needs pgvector 0.7 or later in the database.
+    op.execute("ALTER EXTENSION vector UPDATE")
+    op.execute("DROP INDEX IF EXISTS ix_faces_embedding")
+    op.execute("ALTER TABLE faces ALTER COLUMN embedding TYPE halfvec(512) USING embedding::halfvec(512)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_faces_embedding "
+        "ON faces USING ivfflat (embedding halfvec_cosine_ops) "
+        "WITH (lists = 100)"
+    )
+    op.add_column(
+        "faces",
+        sa.Column(
+            "embedding_txid",
+            sa.BigInteger(),
+            server_default=sa.text("pg_current_xact_id()::text::bigint"),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_faces_embedding_txid", "faces", ["embedding_txid"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_faces_embedding_txid", table_name="faces")
+    op.drop_column("faces", "embedding_txid")
+    op.execute("DROP INDEX IF EXISTS ix_faces_embedding")
+    op.execute("ALTER TABLE faces ALTER COLUMN embedding TYPE vector(512) USING embedding::vector(512)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_faces_embedding "
+        "ON faces USING ivfflat (embedding vector_cosine_ops) "
+        "WITH (lists = 100)"
+    )
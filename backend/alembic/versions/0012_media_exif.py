@@ -0,0 +1,87 @@
+"""media exif side table
+
+Revision ID: 0012_media_exif
+Revises: 0011_face_halfvec
+Create Date: 2026-10-19 19:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_media_exif"
+down_revision = "0011_face_halfvec"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.exif.RAW_EXIF_WHITELIST at the time of this migration.
+WHITELIST = [
+    "DateTime",
+    "DateTimeDigitized",
+    "DateTimeOriginal",
+    "ExifImageHeight",
+    "ExifImageWidth",
+    "ExposureTime",
+    "FNumber",
+    "FocalLength",
+    "FocalLengthIn35mmFilm",
+    "GPSAltitude",
+    "GPSAltitudeRef",
+    "GPSLatitude",
+    "GPSLatitudeRef",
+    "GPSLongitude",
+    "GPSLongitudeRef",
+    "ISOSpeedRatings",
+    "ImageLength",
+    "ImageWidth",
+    "LensMake",
+    "LensModel",
+    "Make",
+    "Model",
+    "OffsetTime",
+    "OffsetTimeOriginal",
+    "Orientation",
+    "Software",
+]
+MAX_VALUE_CHARS = 1024
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_exif",
+        sa.Column("media_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("data", postgresql.JSONB(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["media_id"], ["media.id"], ondelete="CASCADE"),
+    )
+    op.execute("ALTER TABLE media_exif ALTER COLUMN data SET COMPRESSION lz4")
+
+    # Copy only whitelisted tags with short values; maker notes and decoded blobs stay behind with the dropped column.
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO media_exif (media_id, data)
+            SELECT m.id, filtered.data
+            FROM media m
+            CROSS JOIN LATERAL (
+                SELECT jsonb_object_agg(e.key, e.value) AS data
+                FROM jsonb_each(m.raw_exif) AS e
+                WHERE e.key = ANY(:whitelist) AND length(e.value::text) <= :max_chars
+            ) AS filtered
+            WHERE jsonb_typeof(m.raw_exif) = 'object' AND filtered.data IS NOT NULL
+            """
+        ).bindparams(
+            sa.bindparam("whitelist", WHITELIST, type_=postgresql.ARRAY(sa.String())),
+            sa.bindparam("max_chars", MAX_VALUE_CHARS),
+        )
+    )
+    # Space held by the old values is only returned once the table is rewritten (VACUUM FULL media or pg_repack).
+    op.drop_column("media", "raw_exif")
+
+
+def downgrade() -> None:
+    op.add_column("media", sa.Column("raw_exif", postgresql.JSONB(), nullable=True))
+    op.execute("UPDATE media SET raw_exif = e.data FROM media_exif e WHERE e.media_id = media.id")
+    op.drop_table("media_exif")
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.routers import auth, health, media, people, share
+from app.routers import auth, files, health, media, people, share, sync
 
 api_router = APIRouter()
 api_router.include_router(health.router)
@@ -8,3 +8,5 @@ api_router.include_router(auth.router)
 api_router.include_router(media.router)
 api_router.include_router(people.router)
 api_router.include_router(share.router)
+api_router.include_router(sync.router)
+api_router.include_router(files.router)
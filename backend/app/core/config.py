@@ -6,23 +6,85 @@ class Settings(BaseSettings):
 
     database_url: str = "postgresql+psycopg://homesnapshare:homesnapshare@db:5432/homesnapshare"
     redis_url: str = "redis://redis:6379/0"
+    db_profile: str = "api"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_worker_pool_size: int = 2
+    db_worker_max_overflow: int = 2
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pre_ping: str = "idle"
+    db_pre_ping_idle_seconds: int = 300
+    db_prepare_threshold: int = 2
+    db_query_cache_size: int = 1200
 
     jwt_secret: str = "change-me"
     jwt_algorithm: str = "HS256"
     jwt_expires_minutes: int = 1440
+    auth_cache_size: int = 1024
+    auth_cache_seconds: int = 60
+    login_concurrency: int = 4
 
     media_root: str = "/data/media"
     thumb_root: str = "/data/thumbs"
     import_root: str = "/data/import"
+    storage_backend: str = "local"
+    s3_endpoint_url: str = ""
+    s3_region: str = "us-east-1"
+    s3_bucket: str = "homesnapshare"
+    s3_access_key: str = ""
+    s3_secret_key: str = ""
+    s3_max_pool_connections: int = 32
+    s3_multipart_threshold: int = 16 * 1024 * 1024
+    s3_multipart_chunksize: int = 16 * 1024 * 1024
+    s3_max_concurrency: int = 8
+    s3_range_chunk_size: int = 8 * 1024 * 1024
+    s3_range_parallelism: int = 4
+    media_files_public: bool = True
+    media_cache_max_age: int = 31536000
+    media_accel_redirect_prefix: str = ""
+    export_part_bytes: int = 4 * 1024 * 1024 * 1024
     importer_enabled: bool = True
     import_interval_seconds: int = 10
+    import_watch_mode: str = "auto"
+    import_debounce_seconds: float = 0.5
+    import_workers: int = 4
+    import_batch_size: int = 64
+    import_queue_size: int = 1024
 
     ai_enabled: bool = True
     face_match_threshold: float = 0.6
+    face_detect_max_edge: int = 1280
+    face_min_size_px: int = 40
+    face_min_confidence: float = 0.9
+    face_reuse_iou: float = 0.5
+    embedding_snapshot_root: str = "/data/embeddings"
+    embedding_snapshot_max_stale: float = 0.25
+    embedding_snapshot_enabled: bool = True
+    embedding_snapshot_refresh_seconds: float = 30
+    embedding_snapshot_shortlist: int = 32
+    sandbox_enabled: bool = True
+    sandbox_timeout_seconds: int = 120
+    sandbox_memory_mb: int = 2048
+    image_max_pixels: int = 400_000_000
+    image_analysis_max_edge: int = 4096
+    media_max_attempts: int = 3
+
+    ffmpeg_path: str = "ffmpeg"
+    ffprobe_path: str = "ffprobe"
+    video_timeout_seconds: int = 900
+    video_poster_offset_seconds: float = 1.0
+    video_preview_height: int = 480
+    video_preview_bitrate: str = "1M"
+    video_preview_max_seconds: int = 0
+    video_ffmpeg_threads: int = 2
 
     admin_email: str = "admin@example.com"
     admin_password: str = "admin123"
     reverse_geocode_enabled: bool = False
+    gazetteer_path: str = ""
+    reverse_geocode_max_km: float = 75.0
+    reverse_geocode_precision: int = 2
     location_label_style: str = "decimal"
 
 
@@ -0,0 +1,122 @@
+import threading
+import time
+from bisect import bisect_right
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.buckets[bisect_right(WAIT_BUCKETS_MS, waited * 1000)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["inf"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "mean_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "wait_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(profile: str, pool_class: type) -> Dict[str, Any]:
+    worker = profile == "worker"
+    # A negative threshold disables server-side prepared statements, e.g. behind PgBouncer in transaction mode.
+    threshold = settings.db_prepare_threshold if settings.db_prepare_threshold >= 0 else None
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.db_worker_pool_size if worker else settings.db_pool_size,
+        "max_overflow": settings.db_worker_max_overflow if worker else settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pre_ping == "always",
+        "pool_use_lifo": True,
+        "query_cache_size": settings.db_query_cache_size,
+        "connect_args": {"prepare_threshold": threshold},
+    }
+
+
+def install_idle_ping(engine: Engine) -> None:
+    if settings.db_pre_ping != "idle":
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _stamp(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        # Only connections that sat idle long enough to be cut by a proxy or server timeout pay the round trip.
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.db_pre_ping_idle_seconds:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except Exception as error:
+            raise exc.DisconnectionError() from error
+        if not alive:
+            raise exc.DisconnectionError()
+
+
+def pool_status(engine: Engine, metrics: PoolMetrics) -> Dict[str, Any]:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checked_in": pool.checkedin(),
+        **metrics.snapshot(),
+    }
@@ -1,6 +1,5 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from app.api.router import api_router
 from app.core.config import settings
@@ -38,6 +37,3 @@ def prepare_storage() -> None:
     finally:
         db.close()
 
-
-app.mount("/media-files", StaticFiles(directory=settings.media_root), name="media-files")
-app.mount("/thumbs", StaticFiles(directory=settings.thumb_root), name="thumbs")
@@ -1,9 +1,25 @@
 from app.models.device import Device
 from app.models.face import Face
+from app.models.geo_tile import GeoTile
 from app.models.location import Location
 from app.models.media import Media
+from app.models.media_change import MediaChange
+from app.models.media_exif import MediaExif
+from app.models.media_facet import MediaFacet
 from app.models.person import Person
 from app.models.user import User
 from app.models.share_link import ShareLink
 
-__all__ = ["Device", "Face", "Location", "Media", "Person", "ShareLink", "User"]
+__all__ = [
+    "Device",
+    "Face",
+    "GeoTile",
+    "Location",
+    "Media",
+    "MediaChange",
+    "MediaExif",
+    "MediaFacet",
+    "Person",
+    "ShareLink",
+    "User",
+]
@@ -1,7 +1,7 @@
 from uuid import uuid4
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Index
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -12,8 +12,9 @@ from app.db.base import Base
 class Face(Base):
     __tablename__ = "faces"
     __table_args__ = (
-        Index("ix_faces_media_id", "media_id"),
+        Index("ix_faces_media_id_person_id", "media_id", "person_id"),
         Index("ix_faces_person_id", "person_id"),
+        Index("ix_faces_embedding_txid", "embedding_txid"),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
@@ -24,7 +25,9 @@ class Face(Base):
     bbox_w = Column(Float, nullable=False)
     bbox_h = Column(Float, nullable=False)
     confidence = Column(Float, nullable=False)
-    embedding = Column(Vector(512), nullable=True)
+    embedding = Column(HALFVEC(512), nullable=True)
+    # Transaction that last wrote the embedding; the snapshot exporter appends rows past its cursor.
+    embedding_txid = Column(BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     media = relationship("Media", back_populates="faces")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Float, Integer, SmallInteger
+
+from app.db.base import Base
+
+
+class GeoTile(Base):
+    __tablename__ = "media_geo_tiles"
+
+    zoom = Column(SmallInteger, primary_key=True)
+    tile_x = Column(Integer, primary_key=True)
+    tile_y = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    lat_sum = Column(Float, nullable=False, default=0.0)
+    lon_sum = Column(Float, nullable=False, default=0.0)
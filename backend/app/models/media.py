@@ -1,7 +1,7 @@
 from uuid import uuid4
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,6 +15,9 @@ class Media(Base):
         Index("ix_media_season", "season"),
         Index("ix_media_has_gps", "has_gps"),
         Index("ix_media_media_type", "media_type"),
+        Index("ix_media_geo_quadkey", "geo_quadkey", postgresql_ops={"geo_quadkey": "text_pattern_ops"}),
+        Index("ix_media_storage_path_c", text('storage_path COLLATE "C"')),
+        Index("ix_media_thumb_path_c", text('thumb_path COLLATE "C"')),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
@@ -22,6 +25,7 @@ class Media(Base):
     original_filename = Column(String(255), nullable=False)
     storage_path = Column(String(512), unique=True, nullable=False)
     thumb_path = Column(String(512), nullable=True)
+    preview_path = Column(String(512), nullable=True)
     mime_type = Column(String(128), nullable=True)
     media_type = Column(String(32), nullable=False)
     size_bytes = Column(Integer, nullable=False)
@@ -34,16 +38,22 @@ class Media(Base):
     gps_lat = Column(Float, nullable=True)
     gps_lon = Column(Float, nullable=True)
     gps_altitude = Column(Float, nullable=True)
+    geo_quadkey = Column(String(16), nullable=True)
     camera_make = Column(String(128), nullable=True)
     camera_model = Column(String(128), nullable=True)
     orientation = Column(Integer, nullable=True)
     season = Column(String(16), nullable=True)
     location_text = Column(String(256), nullable=True)
-    raw_exif = Column(JSONB, nullable=True)
     face_count = Column(Integer, nullable=False, default=0)
+    processing_state = Column(String(16), nullable=False, default="queued", server_default="queued")
+    processing_updated_at = Column(DateTime(timezone=True), nullable=True)
+    processing_error = Column(Text, nullable=True)
+    processing_attempts = Column(Integer, nullable=False, default=0, server_default="0")
     device_id = Column(UUID(as_uuid=True), ForeignKey("devices.id"), nullable=True)
     location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id"), nullable=True)
 
     device = relationship("Device")
     location = relationship("Location")
     faces = relationship("Face", back_populates="media", cascade="all, delete-orphan")
+    # Raw EXIF lives in its own table so list queries never read it; load it explicitly via /media/{id}/exif.
+    exif = relationship("MediaExif", uselist=False, lazy="raise", passive_deletes=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, String, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class MediaChange(Base):
+    __tablename__ = "media_changes"
+    __table_args__ = (Index("ix_media_changes_cursor", "txid", "id"),)
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    txid = Column(BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"))
+    entity = Column(String(16), nullable=False)
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    op = Column(String(8), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,18 @@
+from sqlalchemy import Boolean, Column, Date, Index, Integer, String
+
+from app.db.base import Base
+
+
+class MediaFacet(Base):
+    __tablename__ = "media_facets"
+    __table_args__ = (Index("ix_media_facets_month", "month"),)
+
+    key = Column(String(32), primary_key=True)
+    month = Column(Date, nullable=True)
+    season = Column(String(16), nullable=True)
+    media_type = Column(String(32), nullable=False)
+    camera_make = Column(String(128), nullable=True)
+    camera_model = Column(String(128), nullable=True)
+    has_faces = Column(Boolean, nullable=False)
+    has_gps = Column(Boolean, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,114 @@
+import mimetypes
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.services.blobstore import StorageBackend, media_storage, thumb_storage
+from app.services.delivery import (
+    FileRangeResponse,
+    RangeNotSatisfiable,
+    accel_redirect,
+    cache_headers,
+    content_sha,
+    etag_matches,
+    file_etag,
+    parse_range,
+    resolve_file,
+    share_allows,
+    stream_range_response,
+    valid_key,
+)
+from app.services.deps import get_optional_user
+
+router = APIRouter(tags=["files"])
+
+
+def _serve(
+    request: Request,
+    db: Session,
+    store: StorageBackend,
+    rel_path: str,
+    variant: str,
+    accel_location: str,
+    share: Optional[str],
+    user,
+) -> Response:
+    if not settings.media_files_public and user is None:
+        if not share or not share_allows(db, share, content_sha(rel_path)):
+            raise HTTPException(status_code=404, detail="File not found")
+
+    path = None
+    if store.local_root is not None:
+        path = resolve_file(store.local_root, rel_path)
+        if path is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        stat = path.stat()
+        size = stat.st_size
+        etag = file_etag(rel_path, variant, size, stat.st_mtime_ns)
+        headers = cache_headers(etag, stat.st_mtime)
+    else:
+        size = store.size(rel_path) if valid_key(rel_path) else None
+        if size is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        etag = file_etag(rel_path, variant, size)
+        headers = cache_headers(etag)
+    media_type = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.media_accel_redirect_prefix:
+        location = f"{settings.media_accel_redirect_prefix.rstrip('/')}/{accel_location}"
+        return accel_redirect(location, rel_path, headers, media_type)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=416,
+            detail="Range not satisfiable",
+            headers={"content-range": f"bytes */{size}"},
+        )
+
+    if path is None:
+        return stream_range_response(
+            store, rel_path, size, byte_range, headers, media_type=media_type, send_body=request.method != "HEAD"
+        )
+    return FileRangeResponse(
+        path,
+        size,
+        byte_range,
+        headers,
+        media_type=media_type,
+        send_body=request.method != "HEAD",
+    )
+
+
+@router.api_route("/media-files/{rel_path:path}", methods=["GET", "HEAD"])
+def get_media_file(
+    rel_path: str,
+    request: Request,
+    share: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_optional_user),
+):
+    return _serve(request, db, media_storage(), rel_path, "original", "media", share, user)
+
+
+@router.api_route("/thumbs/{rel_path:path}", methods=["GET", "HEAD"])
+def get_thumb_file(
+    rel_path: str,
+    request: Request,
+    share: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_optional_user),
+):
+    variant = "preview" if rel_path.endswith(".mp4") else "thumb"
+    return _serve(request, db, thumb_storage(), rel_path, variant, "thumbs", share, user)
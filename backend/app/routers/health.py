@@ -1,8 +1,19 @@
 from fastapi import APIRouter
 
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_status
+from app.db.session import async_engine, engine
+
 router = APIRouter()
 
 
 @router.get("/healthz", tags=["health"])
 def healthz():
     return {"status": "ok"}
+
+
+@router.get("/healthz/db", tags=["health"])
+async def healthz_db():
+    return {
+        "sync": pool_status(engine, InstrumentedQueuePool.metrics),
+        "async": pool_status(async_engine.sync_engine, InstrumentedAsyncQueuePool.metrics),
+    }
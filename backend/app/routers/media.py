@@ -1,23 +1,86 @@
 import mimetypes
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+import anyio
+from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from app.db.session import get_db
-from app.models.face import Face
+from app.core.config import settings
+from app.db.session import get_async_db, get_db
 from app.models.media import Media
-from app.models.person import Person
-from app.schemas.media import MediaDetailOut, MediaOut, MediaUploadResult
-from app.services.deps import get_current_user
-from app.services.media_filters import apply_media_filters
-from app.services.storage import compute_and_store, delete_media_files
+from app.models.media_exif import MediaExif
+from app.schemas.media import (
+    ExportManifestOut,
+    MediaDetailOut,
+    MediaExistsOut,
+    MediaExistsRequest,
+    MediaExifOut,
+    MediaFacetsOut,
+    MediaMapOut,
+    MediaOut,
+    MediaUploadResult,
+)
+from app.services.changes import DELETE, MEDIA, record_change
+from app.services.deps import get_current_user, get_optional_user
+from app.services.export import export_entries, export_manifest, export_response
+from app.services.facets import add_media_facets, compute_facets, remove_media_facets
+from app.services.geo_tiles import map_clusters, remove_media_tiles
+from app.services.media_filters import apply_media_filters, filter_media_select
+from app.services.progress import progress_events
+from app.services.storage import UploadMismatch, compute_and_store, delete_media_files, store_claimed_upload
 from app.tasks.media import process_media
 
 router = APIRouter(prefix="/media", tags=["media"])
 
 
+def _register_upload(
+    db: Session,
+    sha256: str,
+    size_bytes: int,
+    storage_path: str,
+    thumb_path: Optional[str],
+    filename: Optional[str],
+    content_type: Optional[str],
+) -> Tuple[Media, bool]:
+    if content_type == "application/octet-stream":
+        content_type = None
+    mime_type = content_type or mimetypes.guess_type(filename or "")[0]
+    media_type = (
+        "image"
+        if (mime_type or "").startswith("image/")
+        else "video"
+        if (mime_type or "").startswith("video/")
+        else "other"
+    )
+
+    values = {
+        "id": uuid4(),
+        "sha256": sha256,
+        "original_filename": filename or "file",
+        "storage_path": storage_path,
+        "thumb_path": thumb_path,
+        "mime_type": mime_type,
+        "media_type": media_type,
+        "size_bytes": size_bytes,
+    }
+    # Concurrent uploads of the same content both get here; the loser of the insert returns the winner's row.
+    stmt = insert(Media).values(**values).on_conflict_do_nothing().returning(Media.id)
+    media_id = db.execute(stmt).scalar_one_or_none()
+    if media_id is None:
+        db.rollback()
+        return db.query(Media).filter(Media.sha256 == sha256).one(), False
+
+    add_media_facets(db, Media(**values))
+    record_change(db, MEDIA, media_id)
+    db.commit()
+    return db.get(Media, media_id), True
+
+
 @router.post("/upload", response_model=MediaUploadResult)
 def upload_media(
     files: List[UploadFile] = File(...),
@@ -27,44 +90,63 @@ def upload_media(
     items: list[MediaOut] = []
 
     for upload in files:
-        sha256, size_bytes, storage_path = compute_and_store(upload)
-        existing = db.query(Media).filter(Media.sha256 == sha256).first()
-        if existing:
-            items.append(MediaOut.model_validate(existing))
-            continue
-
-        mime_type = upload.content_type or mimetypes.guess_type(upload.filename or "")[0]
-        media_type = (
-            "image"
-            if (mime_type or "").startswith("image/")
-            else "video"
-            if (mime_type or "").startswith("video/")
-            else "other"
-        )
-
-        media = Media(
-            sha256=sha256,
-            original_filename=upload.filename or "file",
-            storage_path=storage_path,
-            mime_type=mime_type,
-            media_type=media_type,
-            size_bytes=size_bytes,
+        sha256, size_bytes, storage_path, thumb_path = compute_and_store(upload)
+        media, created = _register_upload(
+            db, sha256, size_bytes, storage_path, thumb_path, upload.filename, upload.content_type
         )
-        db.add(media)
-        db.commit()
-        db.refresh(media)
-        process_media.delay(str(media.id))
+        if created:
+            process_media.delay(str(media.id))
         items.append(MediaOut.model_validate(media))
 
     return MediaUploadResult(items=items)
 
 
-@router.get("", response_model=list[MediaOut])
-def list_media(
-    db: Session = Depends(get_db),
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+@router.post("/exists", response_model=MediaExistsOut)
+async def media_exists(
+    payload: MediaExistsRequest,
+    db: AsyncSession = Depends(get_async_db),
+    _user=Depends(get_current_user),
+):
+    wanted = list(dict.fromkeys(payload.sha256))
+    # One array parameter keeps this a single cached statement however many hashes are sent.
+    stmt = select(Media.sha256, Media.id).where(Media.sha256 == any_(bindparam("shas", type_=ARRAY(String(64)))))
+    existing = {sha256: media_id for sha256, media_id in (await db.execute(stmt, {"shas": wanted})).all()}
+    return MediaExistsOut(existing=existing, missing=[sha256 for sha256 in wanted if sha256 not in existing])
+
+
+@router.put("/upload/{sha256}", response_model=MediaOut)
+async def upload_media_claimed(
+    request: Request,
+    sha256: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    filename: str = Query(..., min_length=1, max_length=255),
+    size: int = Query(..., ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    _user=Depends(get_current_user),
+):
+    existing = (await db.execute(select(Media).where(Media.sha256 == sha256))).scalar_one_or_none()
+    if existing:
+        # Returning before the body is read means a client that sent "Expect: 100-continue" never transfers it.
+        return MediaOut.model_validate(existing)
+
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length != str(size):
+        raise HTTPException(status_code=422, detail=f"Content-Length does not match the claimed size of {size} bytes")
+    try:
+        storage_path, thumb_path = await store_claimed_upload(request.stream(), filename, sha256, size)
+    except UploadMismatch as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    media, created = await db.run_sync(
+        _register_upload, sha256, size, storage_path, thumb_path, filename, request.headers.get("content-type")
+    )
+    if created:
+        await anyio.to_thread.run_sync(process_media.delay, str(media.id))
+    return MediaOut.model_validate(media)
+
+
+async def media_filter_params(
     person_ids: Optional[str] = None,
+    person_match: Optional[str] = Query(None, pattern="^(any|all)$"),
     season: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
@@ -73,9 +155,10 @@ def list_media(
     camera_make: Optional[str] = None,
     camera_model: Optional[str] = None,
     q: Optional[str] = None,
-):
-    filters = {
+) -> dict:
+    return {
         "person_ids": person_ids,
+        "person_match": person_match,
         "season": season,
         "media_type": media_type,
         "camera_make": camera_make,
@@ -85,28 +168,103 @@ def list_media(
         "date_to": date_to,
         "q": q,
     }
-    query, joined = apply_media_filters(db.query(Media), filters)
 
-    if joined:
-        query = query.distinct()
 
-    rows = (
-        query.order_by(Media.captured_at.desc().nullslast(), Media.imported_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+@router.get("", response_model=list[MediaOut])
+async def list_media(
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    filters: dict = Depends(media_filter_params),
+):
+    stmt, params = filter_media_select(select(Media), filters)
+    stmt = stmt.order_by(Media.captured_at.desc().nullslast(), Media.imported_at.desc()).offset(offset).limit(limit)
+    rows = (await db.execute(stmt, params)).scalars().all()
     return [MediaOut.model_validate(row) for row in rows]
 
 
+@router.get("/facets", response_model=MediaFacetsOut)
+def media_facets(db: Session = Depends(get_db), filters: dict = Depends(media_filter_params)):
+    return MediaFacetsOut(**compute_facets(db, filters))
+
+
+def _export_query(db: Session, filters: dict, user):
+    if not settings.media_files_public and user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return apply_media_filters(db.query(Media), filters)
+
+
+@router.get("/export/manifest", response_model=ExportManifestOut)
+def export_media_manifest(
+    db: Session = Depends(get_db),
+    filters: dict = Depends(media_filter_params),
+    user=Depends(get_optional_user),
+):
+    return ExportManifestOut(**export_manifest(export_entries(_export_query(db, filters, user))))
+
+
+@router.get("/export")
+def export_media(
+    db: Session = Depends(get_db),
+    part: int = Query(0, ge=0),
+    filters: dict = Depends(media_filter_params),
+    user=Depends(get_optional_user),
+):
+    return export_response(export_entries(_export_query(db, filters, user)), part, "homesnapshare-export")
+
+
+@router.get("/map", response_model=MediaMapOut)
+def media_map(
+    db: Session = Depends(get_db),
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    zoom: int = Query(..., ge=0, le=22),
+):
+    if south > north:
+        raise HTTPException(status_code=400, detail="south must not be greater than north")
+    return MediaMapOut(**map_clusters(db, west, south, east, north, zoom))
+
+
+@router.get("/events")
+async def media_events(ids: Optional[str] = Query(None, description="Comma-separated media ids to follow.")):
+    media_ids = None
+    if ids:
+        # progress_events matches on str(media.id), so ids must be canonical lowercase UUIDs.
+        try:
+            media_ids = {str(UUID(value.strip())) for value in ids.split(",") if value.strip()}
+        except ValueError:
+            raise HTTPException(status_code=422, detail="ids must be comma-separated UUIDs")
+    return StreamingResponse(
+        progress_events(media_ids),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
+
+
 @router.get("/{media_id}", response_model=MediaDetailOut)
-def get_media(media_id: str, db: Session = Depends(get_db)):
-    media = db.query(Media).filter(Media.id == media_id).first()
+async def get_media(media_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    stmt = select(Media).options(selectinload(Media.faces)).where(Media.id == media_id)
+    media = (await db.execute(stmt)).scalar_one_or_none()
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
     return MediaDetailOut.model_validate(media)
 
 
+@router.get("/{media_id}/exif", response_model=MediaExifOut)
+async def get_media_exif(media_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    stmt = (
+        select(Media.id, MediaExif.data)
+        .outerjoin(MediaExif, MediaExif.media_id == Media.id)
+        .where(Media.id == media_id)
+    )
+    row = (await db.execute(stmt)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return MediaExifOut(media_id=row.id, exif=row.data or {})
+
+
 @router.delete("/{media_id}")
 def delete_media(
     media_id: str,
@@ -117,7 +275,10 @@ def delete_media(
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
 
-    delete_media_files(media.storage_path, media.thumb_path)
+    delete_media_files(media.storage_path, media.thumb_path, media.preview_path)
+    remove_media_facets(db, media)
+    remove_media_tiles(db, media)
+    record_change(db, MEDIA, media.id, DELETE)
     db.delete(media)
     db.commit()
     return {"status": "deleted"}
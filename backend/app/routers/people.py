@@ -1,27 +1,29 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.face import Face
 from app.models.person import Person
 from app.schemas.people import PersonMerge, PersonOut, PersonUpdate
+from app.services.changes import DELETE, MEDIA, PERSON, record_change, record_changes
 from app.services.deps import get_current_user
 
 router = APIRouter(prefix="/people", tags=["people"])
 
 
 @router.get("", response_model=list[PersonOut])
-def list_people(db: Session = Depends(get_db)):
-    rows = (
-        db.query(Person, func.count(Face.id).label("face_count"))
+async def list_people(db: AsyncSession = Depends(get_async_db)):
+    stmt = (
+        select(Person, func.count(Face.id).label("face_count"))
         .outerjoin(Face, Face.person_id == Person.id)
         .group_by(Person.id)
         .order_by(func.count(Face.id).desc())
-        .all()
     )
+    rows = (await db.execute(stmt)).all()
     return [
         PersonOut(
             id=person.id,
@@ -45,6 +47,7 @@ def rename_person(
         raise HTTPException(status_code=404, detail="Person not found")
     person.name = payload.name
     person.is_named = True
+    record_change(db, PERSON, person.id)
     db.commit()
     face_count = db.query(func.count(Face.id)).filter(Face.person_id == person.id).scalar() or 0
     return PersonOut(id=person.id, name=person.name, is_named=person.is_named, face_count=int(face_count))
@@ -64,6 +67,10 @@ def merge_people(
     if target.id in payload.source_ids:
         raise HTTPException(status_code=400, detail="target_id cannot be in source_ids")
 
+    moved_media = db.query(Face.media_id).filter(Face.person_id.in_(payload.source_ids)).distinct()
+    record_changes(db, MEDIA, [media_id for (media_id,) in moved_media])
+    record_change(db, PERSON, target.id)
+    record_changes(db, PERSON, payload.source_ids, DELETE)
     db.query(Face).filter(Face.person_id.in_(payload.source_ids)).update(
         {"person_id": target.id}, synchronize_session=False
     )
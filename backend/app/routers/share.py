@@ -1,15 +1,21 @@
 import secrets
 from datetime import datetime, timedelta, timezone
 
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.media import Media
 from app.models.share_link import ShareLink
+from app.schemas.media import ExportManifestOut
 from app.schemas.share import ShareCreate, ShareMediaResponse, ShareOut
 from app.services.deps import get_current_user
-from app.services.media_filters import apply_media_filters
+from app.services.export import export_entries, export_manifest, export_response
+from app.services.media_filters import apply_media_filters, filter_media_select
 
 router = APIRouter(prefix="/share", tags=["share"])
 
@@ -27,16 +33,37 @@ def create_share(payload: ShareCreate, db: Session = Depends(get_db), _user=Depe
     return ShareOut.model_validate(link)
 
 
-@router.get("/{token}", response_model=ShareMediaResponse)
-def get_share(token: str, db: Session = Depends(get_db), limit: int = Query(100, ge=1, le=500)):
-    link = db.query(ShareLink).filter(ShareLink.token == token).first()
+def _check_link(link: Optional[ShareLink]) -> ShareLink:
     if not link:
         raise HTTPException(status_code=404, detail="Share not found")
     if link.expires_at and link.expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=410, detail="Share expired")
+    return link
+
 
-    query, joined = apply_media_filters(db.query(Media), link.filters or {})
-    if joined:
-        query = query.distinct()
-    items = query.order_by(Media.captured_at.desc().nullslast(), Media.imported_at.desc()).limit(limit).all()
+def _active_link(db: Session, token: str) -> ShareLink:
+    return _check_link(db.query(ShareLink).filter(ShareLink.token == token).first())
+
+
+@router.get("/{token}", response_model=ShareMediaResponse)
+async def get_share(token: str, db: AsyncSession = Depends(get_async_db), limit: int = Query(100, ge=1, le=500)):
+    link = _check_link((await db.execute(select(ShareLink).where(ShareLink.token == token))).scalar_one_or_none())
+
+    stmt, params = filter_media_select(select(Media), link.filters or {})
+    stmt = stmt.order_by(Media.captured_at.desc().nullslast(), Media.imported_at.desc()).limit(limit)
+    items = (await db.execute(stmt, params)).scalars().all()
     return ShareMediaResponse(filters=link.filters or {}, items=items)
+
+
+@router.get("/{token}/download/manifest", response_model=ExportManifestOut)
+def share_download_manifest(token: str, db: Session = Depends(get_db)):
+    link = _active_link(db, token)
+    entries = export_entries(apply_media_filters(db.query(Media), link.filters or {}))
+    return ExportManifestOut(**export_manifest(entries))
+
+
+@router.get("/{token}/download")
+def share_download(token: str, db: Session = Depends(get_db), part: int = Query(0, ge=0)):
+    link = _active_link(db, token)
+    entries = export_entries(apply_media_filters(db.query(Media), link.filters or {}))
+    return export_response(entries, part, f"share-{token[:8]}")
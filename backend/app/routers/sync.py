@@ -0,0 +1,81 @@
+from typing import Dict, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.models.face import Face
+from app.models.media import Media
+from app.models.media_change import MediaChange
+from app.models.person import Person
+from app.schemas.media import MediaOut
+from app.schemas.people import PersonOut
+from app.schemas.sync import SyncOut
+from app.services.changes import DELETE, MEDIA, PERSON, SETTLED_TXID, decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncOut)
+async def sync_changes(
+    db: AsyncSession = Depends(get_async_db),
+    since: Optional[str] = Query(None, max_length=64),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    try:
+        cursor = decode_cursor(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    stmt = (
+        select(MediaChange.txid, MediaChange.id, MediaChange.entity, MediaChange.entity_id, MediaChange.op)
+        .where(MediaChange.txid < SETTLED_TXID)
+        .where(tuple_(MediaChange.txid, MediaChange.id) > tuple_(*cursor))
+        .order_by(MediaChange.txid, MediaChange.id)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return SyncOut(cursor=encode_cursor(cursor), has_more=False)
+
+    latest: Dict[str, Dict[UUID, str]] = {MEDIA: {}, PERSON: {}}
+    for _txid, _change_id, entity, entity_id, op in rows:
+        latest.setdefault(entity, {})[entity_id] = op
+    deleted_media = {entity_id for entity_id, op in latest[MEDIA].items() if op == DELETE}
+    deleted_people = {entity_id for entity_id, op in latest[PERSON].items() if op == DELETE}
+
+    media = []
+    media_ids = [entity_id for entity_id in latest[MEDIA] if entity_id not in deleted_media]
+    if media_ids:
+        found = (await db.execute(select(Media).where(Media.id.in_(media_ids)))).scalars().all()
+        media = [MediaOut.model_validate(row) for row in found]
+        deleted_media.update(set(media_ids) - {row.id for row in found})
+
+    people = []
+    person_ids = [entity_id for entity_id in latest[PERSON] if entity_id not in deleted_people]
+    if person_ids:
+        person_stmt = (
+            select(Person, func.count(Face.id).label("face_count"))
+            .outerjoin(Face, Face.person_id == Person.id)
+            .where(Person.id.in_(person_ids))
+            .group_by(Person.id)
+        )
+        found = (await db.execute(person_stmt)).all()
+        people = [
+            PersonOut(id=person.id, name=person.name, is_named=person.is_named, face_count=int(face_count))
+            for person, face_count in found
+        ]
+        deleted_people.update(set(person_ids) - {person.id for person, _ in found})
+
+    return SyncOut(
+        cursor=encode_cursor((rows[-1][0], rows[-1][1])),
+        has_more=has_more,
+        media=media,
+        people=people,
+        deleted_media=sorted(deleted_media, key=str),
+        deleted_people=sorted(deleted_people, key=str),
+    )
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Any, Dict, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+Sha256 = Annotated[str, Field(pattern="^[0-9a-f]{64}$")]
 
 
 class FaceOut(BaseModel):
@@ -24,11 +26,13 @@ class MediaOut(BaseModel):
     original_filename: str
     storage_path: str
     thumb_path: Optional[str]
+    preview_path: Optional[str] = None
     mime_type: Optional[str]
     media_type: str
     size_bytes: int
     width: Optional[int] = None
     height: Optional[int] = None
+    duration_seconds: Optional[float] = None
     captured_at: Optional[datetime]
     imported_at: datetime
     season: Optional[str] = None
@@ -36,12 +40,24 @@ class MediaOut(BaseModel):
     camera_make: Optional[str] = None
     camera_model: Optional[str] = None
     face_count: int = 0
+    processing_state: str = "done"
+    processing_updated_at: Optional[datetime] = None
+    processing_error: Optional[str] = None
 
 
 class MediaUploadResult(BaseModel):
     items: list[MediaOut]
 
 
+class MediaExistsRequest(BaseModel):
+    sha256: list[Sha256] = Field(max_length=10000)
+
+
+class MediaExistsOut(BaseModel):
+    existing: dict[str, UUID]
+    missing: list[str]
+
+
 class MediaDetailOut(MediaOut):
     gps_lat: Optional[float] = None
     gps_lon: Optional[float] = None
@@ -49,3 +65,55 @@ class MediaDetailOut(MediaOut):
     orientation: Optional[int] = None
     location_text: Optional[str] = None
     faces: list[FaceOut] = []
+
+
+class MediaExifOut(BaseModel):
+    media_id: UUID
+    exif: Dict[str, Any] = {}
+
+
+class FacetCount(BaseModel):
+    value: Optional[str]
+    count: int
+
+
+class CameraFacetCount(BaseModel):
+    make: Optional[str]
+    model: Optional[str]
+    count: int
+
+
+class MediaFacetsOut(BaseModel):
+    source: str
+    total: int
+    months: list[FacetCount] = []
+    seasons: list[FacetCount] = []
+    media_types: list[FacetCount] = []
+    cameras: list[CameraFacetCount] = []
+    has_faces: list[FacetCount] = []
+    has_gps: list[FacetCount] = []
+
+
+class MapClusterOut(BaseModel):
+    lat: float
+    lon: float
+    count: int
+    tile: str
+
+
+class MediaMapOut(BaseModel):
+    zoom: int
+    total: int
+    clusters: list[MapClusterOut] = []
+
+
+class ExportPartOut(BaseModel):
+    part: int
+    files: int
+    bytes: int
+
+
+class ExportManifestOut(BaseModel):
+    files: int
+    bytes: int
+    parts: list[ExportPartOut]
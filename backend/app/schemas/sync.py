@@ -0,0 +1,15 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.schemas.media import MediaOut
+from app.schemas.people import PersonOut
+
+
+class SyncOut(BaseModel):
+    cursor: str
+    has_more: bool
+    media: list[MediaOut] = []
+    people: list[PersonOut] = []
+    deleted_media: list[UUID] = []
+    deleted_people: list[UUID] = []
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import time
+
+from jose import jwt
+
+from app.core.config import settings
+from app.services.auth import (
+    TokenCache,
+    authenticate_user,
+    create_access_token,
+    hash_password,
+    verify_password,
+)
+
+
+def _time(label: str, func, iterations: int) -> None:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:24} {iterations:>8} calls  {elapsed / iterations * 1e6:10.1f} us/call")
+
+
+async def _login_burst(password_hash: str, logins: int, concurrency: int) -> None:
+    import anyio
+
+    limiter = anyio.CapacityLimiter(concurrency)
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.001)
+            ticks += 1
+
+    async def login() -> None:
+        await anyio.to_thread.run_sync(verify_password, "password", password_hash, limiter=limiter)
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    print(
+        f"{logins} concurrent logins, limiter={concurrency}: {elapsed:.2f}s total, "
+        f"event loop ticked {ticks} times (~{elapsed * 1000:.0f} expected if never blocked)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the cost of request authentication with and without caching.")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--email", help="Existing user to time the database lookup and full login path for.")
+    parser.add_argument("--password", help="Password for --email.")
+    parser.add_argument("--logins", type=int, default=16, help="Size of the simulated login burst.")
+    args = parser.parse_args()
+
+    token = create_access_token(args.email or "bench@example.com")
+    cache = TokenCache(max_entries=1024, ttl_seconds=60)
+
+    _time(
+        "jwt decode",
+        lambda: jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]),
+        args.iterations,
+    )
+
+    if args.email:
+        from app.db.session import SessionLocal
+        from app.models.user import User
+
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.email == args.email).first()
+            if user is None:
+                parser.error(f"no user {args.email}")
+            iterations = max(1, args.iterations // 10)
+            _time("user lookup", lambda: db.query(User).filter(User.email == args.email).first(), iterations)
+            if args.password:
+                _time("authenticate_user", lambda: authenticate_user(db, args.email, args.password), 5)
+        finally:
+            db.close()
+    else:
+        from app.models.user import User
+
+        user = User(email="bench@example.com", password_hash=hash_password("password"), is_admin=False)
+    cache.put(token, user, None)
+    _time("token cache hit", lambda: cache.get(token), args.iterations)
+    _time("token cache miss", lambda: cache.get("missing"), args.iterations)
+
+    password_hash = hash_password("password")
+    _time("argon2 verify", lambda: verify_password("password", password_hash), 5)
+    asyncio.run(_login_burst(password_hash, args.logins, max(1, settings.login_concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import io
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.services.decoders import decoder_for, open_image
+from app.services.metadata import read_embedded_preview, read_metadata
+from app.services.storage import _render_thumbnail
+
+
+def _thumbnail(path: str) -> None:
+    with open_image(path) as decoded:
+        _render_thumbnail(decoded.image, decoded.orientation, io.BytesIO())
+
+
+def _full_decode(path: str) -> None:
+    decoder = decoder_for(path)
+    if decoder is not None and decoder.name == "raw":
+        import rawpy
+
+        with rawpy.imread(path) as raw:
+            raw.postprocess()
+        return
+    with open_image(path) as decoded:
+        decoded.image.load()
+
+
+def _time(func: Callable[[str], object], paths: List[str]) -> Optional[float]:
+    started = time.perf_counter()
+    try:
+        for path in paths:
+            func(path)
+    except Exception as exc:
+        print(f"  {func.__name__} failed: {exc}")
+        return None
+    return (time.perf_counter() - started) / len(paths) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time metadata, preview and thumbnail decoding per file format.")
+    parser.add_argument("root", help="Directory of sample files (searched recursively).")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum files per format.")
+    parser.add_argument("--full", action="store_true", help="Also time a full-resolution decode for comparison.")
+    args = parser.parse_args()
+
+    by_format: Dict[str, List[str]] = defaultdict(list)
+    for path in sorted(Path(args.root).rglob("*")):
+        suffix = path.suffix.lower()
+        if path.is_file() and suffix and len(by_format[suffix]) < args.limit:
+            by_format[suffix].append(str(path))
+
+    columns = ["metadata", "preview", "thumbnail"] + (["full"] if args.full else [])
+    print(f"{'format':8} {'files':>6} {'previews':>9} " + " ".join(f"{name + ' ms':>12}" for name in columns))
+    for suffix, paths in sorted(by_format.items()):
+        with_preview = sum(1 for path in paths if read_embedded_preview(path) is not None)
+        timings = [_time(read_metadata, paths), _time(read_embedded_preview, paths), _time(_thumbnail, paths)]
+        if args.full:
+            timings.append(_time(_full_decode, paths))
+        cells = " ".join(f"{value:12.2f}" if value is not None else f"{'-':>12}" for value in timings)
+        print(f"{suffix:8} {len(paths):>6} {with_preview:>9} {cells}")
+
+
+if __name__ == "__main__":
+    main()
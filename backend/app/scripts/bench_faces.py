@@ -0,0 +1,66 @@
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from app.core.config import settings
+from app.services.decoders import open_image
+from app.services.face_ai import _load_models, locate_faces
+from app.services.person_matching import _iou
+
+
+def _matched(expected: List[List[float]], found: List[List[float]], threshold: float) -> int:
+    remaining = list(found)
+    hits = 0
+    for box in expected:
+        best = max(remaining, key=lambda candidate: _iou(box, candidate), default=None)
+        if best is not None and _iou(box, best) >= threshold:
+            remaining.remove(best)
+            hits += 1
+    return hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure face detection time and recall per detection size cap.")
+    parser.add_argument(
+        "labels",
+        help='JSON file mapping image paths (relative to the file) to face boxes: {"a.jpg": [[x, y, w, h], ...]}.',
+    )
+    parser.add_argument("--max-edge", type=int, nargs="+", default=[640, 960, 1280, 1920, 0], help="0 means no cap.")
+    parser.add_argument("--iou", type=float, default=0.5, help="Overlap needed for a detection to count as a hit.")
+    args = parser.parse_args()
+
+    labels_path = Path(args.labels)
+    labels: Dict[str, List[List[float]]] = json.loads(labels_path.read_text())
+    images = []
+    for name, boxes in labels.items():
+        with open_image(str(labels_path.parent / name)) as decoded:
+            images.append((decoded.image.convert("RGB"), boxes))
+    mtcnn, _resnet, _device = _load_models()
+    expected_total = sum(len(boxes) for _img, boxes in images)
+
+    print(
+        f"{len(images)} images, {expected_total} labelled faces, min size {settings.face_min_size_px}px, "
+        f"min confidence {settings.face_min_confidence}"
+    )
+    print(f"{'max edge':>9} {'ms/image':>9} {'recall':>7} {'precision':>9} {'found':>6}")
+    for max_edge in args.max_edge:
+        settings.face_detect_max_edge = max_edge
+        elapsed = 0.0
+        hits = found_total = 0
+        for img, expected in images:
+            started = time.perf_counter()
+            boxes, _probs = locate_faces(mtcnn, img)
+            elapsed += time.perf_counter() - started
+            found = [[x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in boxes.tolist()]
+            found_total += len(found)
+            hits += _matched(expected, found, args.iou)
+        recall = hits / expected_total if expected_total else 0.0
+        precision = hits / found_total if found_total else 0.0
+        label = str(max_edge) if max_edge else "full"
+        print(f"{label:>9} {elapsed / len(images) * 1000:>9.1f} {recall:>7.3f} {precision:>9.3f} {found_total:>6}")
+
+
+if __name__ == "__main__":
+    main()
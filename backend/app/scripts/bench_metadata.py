@@ -0,0 +1,62 @@
+import argparse
+import time
+from pathlib import Path
+
+from app.services.exif import extract_exif_pil
+from app.services.metadata import read_metadata
+
+COMPARED_FIELDS = ("captured_at", "camera_make", "camera_model", "orientation", "gps_lat", "gps_lon")
+
+
+def _collect(root: Path, limit: int) -> list[Path]:
+    paths = []
+    for path in sorted(root.rglob("*")):
+        if path.is_file():
+            paths.append(path)
+            if len(paths) >= limit:
+                break
+    return paths
+
+
+def _time(label: str, func, paths: list[Path]) -> list:
+    results = []
+    started = time.perf_counter()
+    for path in paths:
+        results.append(func(str(path)))
+    elapsed = time.perf_counter() - started
+    rate = len(paths) / elapsed if elapsed else float("inf")
+    print(f"{label:8} {elapsed:8.3f}s  {rate:10.1f} files/s  {elapsed / max(len(paths), 1) * 1e6:9.1f} us/file")
+    return results
+
+
+def _close(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return abs(a - b) < 1e-6
+    return a == b
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare header-only metadata parsing with the Pillow EXIF path.")
+    parser.add_argument("root", help="Directory of sample media (searched recursively).")
+    parser.add_argument("--limit", type=int, default=10000, help="Maximum number of files to read.")
+    args = parser.parse_args()
+
+    paths = _collect(Path(args.root), args.limit)
+    print(f"{len(paths)} file(s)")
+    header_results = _time("header", read_metadata, paths)
+    pil_results = _time("pillow", extract_exif_pil, paths)
+
+    unrecognised = sum(1 for result in header_results if result is None)
+    mismatches = 0
+    for path, header, pil in zip(paths, header_results, pil_results):
+        if header is None:
+            continue
+        for field in COMPARED_FIELDS:
+            if field in pil[1] and pil[1][field] is not None and not _close(header[1].get(field), pil[1][field]):
+                mismatches += 1
+                print(f"mismatch {path} {field}: header={header[1].get(field)!r} pillow={pil[1][field]!r}")
+    print(f"unrecognised by header reader: {unrecognised}, field mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import hashlib
+import os
+import shutil
+import time
+
+from app.core.config import settings
+from app.services.blobstore import S3Storage, _s3_client, media_storage
+from app.services.storage import ensure_storage_dirs, scratch_path
+
+
+def _ensure_bucket() -> None:
+    client = _s3_client()
+    existing = {bucket["Name"] for bucket in client.list_buckets().get("Buckets", [])}
+    if settings.s3_bucket not in existing:
+        client.create_bucket(Bucket=settings.s3_bucket)
+        print(f"created bucket {settings.s3_bucket}")
+
+
+def _check(label: str, condition: bool) -> None:
+    print(f"{'ok' if condition else 'FAIL':4} {label}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Round-trip objects through the configured storage backend.")
+    parser.add_argument("--size-mb", type=int, default=40, help="Size of the large object used for multipart/ranges.")
+    parser.add_argument("--create-bucket", action="store_true", help="Create the S3 bucket if it does not exist.")
+    args = parser.parse_args()
+
+    ensure_storage_dirs()
+    store = media_storage()
+    print(f"backend: {type(store).__name__}")
+    if args.create_bucket and isinstance(store, S3Storage):
+        _ensure_bucket()
+
+    prefix = f"_storage_check/{os.getpid()}"
+    small_key = f"{prefix}/small.bin"
+    large_key = f"{prefix}/large.bin"
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    source = scratch_path(".bin")
+    source.write_bytes(payload)
+
+    try:
+        store.put_bytes(small_key, b"hello")
+        _check("put_bytes/get", store.get(small_key) == b"hello")
+        _check("exists", store.exists(small_key) and not store.exists(f"{prefix}/missing.bin"))
+
+        started = time.perf_counter()
+        store.put_file(large_key, str(source))
+        elapsed = time.perf_counter() - started
+        print(f"     put_file {len(payload) / elapsed / 1e6:.1f} MB/s")
+        _check("size", store.size(large_key) == len(payload))
+
+        started = time.perf_counter()
+        data = b"".join(store.open_range(large_key, 0, len(payload) - 1))
+        elapsed = time.perf_counter() - started
+        print(f"     open_range {len(payload) / elapsed / 1e6:.1f} MB/s")
+        _check("open_range full", hashlib.sha256(data).digest() == hashlib.sha256(payload).digest())
+        start, end = len(payload) // 3, len(payload) // 3 * 2 + 17
+        _check("open_range slice", b"".join(store.open_range(large_key, start, end)) == payload[start : end + 1])
+
+        with store.local_path(large_key) as path:
+            _check("local_path", os.path.getsize(path) == len(payload))
+        _check("iter_keys", list(store.iter_keys(f"{prefix}/")) == [large_key, small_key])
+    finally:
+        store.delete(small_key)
+        store.delete(large_key)
+        source.unlink(missing_ok=True)
+        if store.local_root is not None:
+            shutil.rmtree(os.path.join(store.local_root, "_storage_check"), ignore_errors=True)
+    _check("delete", not store.exists(large_key))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+
+TABLES = ("media", "media_exif")
+
+SIZE_SQL = text(
+    """
+    SELECT pg_relation_size(c.oid) AS heap,
+           coalesce(pg_relation_size(c.reltoastrelid), 0) AS toast,
+           pg_indexes_size(c.oid) AS indexes,
+           pg_total_relation_size(c.oid) AS total,
+           c.reltuples::bigint AS rows
+    FROM pg_class c
+    WHERE c.oid = to_regclass(:name)
+    """
+)
+
+HIT_SQL = text(
+    """
+    SELECT coalesce(heap_blks_hit, 0) + coalesce(toast_blks_hit, 0) AS hit,
+           coalesce(heap_blks_read, 0) + coalesce(toast_blks_read, 0) AS read
+    FROM pg_statio_user_tables
+    WHERE relname = :name
+    """
+)
+
+
+# GET /media without filters, written against the table rather than the model so that a run before the media_exif
+# migration still selects (and detoasts) raw_exif the way the old list query did.
+LIST_SQL = text(
+    """
+    SELECT media.* FROM media
+    ORDER BY captured_at DESC NULLS LAST, imported_at DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+def _mb(value: int) -> str:
+    return f"{value / 1024 / 1024:.1f}"
+
+
+def _hits(db) -> dict:
+    result = {}
+    for name in TABLES:
+        row = db.execute(HIT_SQL, {"name": name}).first()
+        result[name] = (row.hit, row.read) if row else (0, 0)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report media table size, cache hit ratio and list-query latency.")
+    parser.add_argument("--runs", type=int, default=200, help="List queries to time.")
+    parser.add_argument("--limit", type=int, default=50, help="Page size of each list query.")
+    parser.add_argument("--pages", type=int, default=20, help="Distinct offsets to cycle through.")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        print(f"{'table':12} {'heap MB':>9} {'toast MB':>9} {'index MB':>9} {'total MB':>9} {'rows':>10}")
+        for name in TABLES:
+            row = db.execute(SIZE_SQL, {"name": name}).first()
+            if row is None:
+                print(f"{name:12} {'-':>9}")
+                continue
+            print(
+                f"{name:12} {_mb(row.heap):>9} {_mb(row.toast):>9} {_mb(row.indexes):>9} "
+                f"{_mb(row.total):>9} {row.rows:>10}"
+            )
+
+        before = _hits(db)
+        timings = []
+        for run in range(args.runs):
+            params = {"limit": args.limit, "offset": (run % args.pages) * args.limit}
+            started = time.perf_counter()
+            db.execute(LIST_SQL, params).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        # Statistics are reported by backends asynchronously; give the collector a moment before reading them back.
+        db.commit()
+        time.sleep(1)
+        after = _hits(db)
+
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"list query x{args.runs}: p50 {p50:.2f} ms, p99 {p99:.2f} ms, mean {statistics.fmean(timings):.2f} ms")
+    for name in TABLES:
+        hit = after[name][0] - before[name][0]
+        read = after[name][1] - before[name][1]
+        ratio = hit / (hit + read) if hit + read else 1.0
+        print(f"{name:12} buffer hits {hit:>8}, reads {read:>8}, hit ratio {ratio:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.models.face import Face
+from app.models.media import Media
+from app.models.person import Person
+from app.services.media_filters import apply_media_filters, filter_media_select
+
+BAD_NODES = {"Unique", "SetOp"}
+
+
+def _seed(db, rng: random.Random, media_count: int, people_count: int) -> list:
+    people = [{"id": uuid4(), "name": f"Explain Person {i}", "is_named": True} for i in range(people_count)]
+    db.execute(insert(Person), people)
+
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    media_rows = []
+    face_rows = []
+    for i in range(media_count):
+        media_id = uuid4()
+        face_total = rng.choice([0, 0, 1, 1, 2, 3])
+        media_rows.append(
+            {
+                "id": media_id,
+                "sha256": uuid4().hex + uuid4().hex,
+                "original_filename": f"explain_{i}.jpg",
+                "storage_path": f"explain/{media_id}.jpg",
+                "media_type": "image",
+                "size_bytes": 1024,
+                "captured_at": start + timedelta(hours=i),
+                "season": rng.choice(["winter", "spring", "summer", "fall"]),
+                "face_count": face_total,
+            }
+        )
+        for person in rng.sample(people, face_total):
+            face_rows.append(
+                {
+                    "id": uuid4(),
+                    "media_id": media_id,
+                    "person_id": person["id"],
+                    "bbox_x": 0.0,
+                    "bbox_y": 0.0,
+                    "bbox_w": 10.0,
+                    "bbox_h": 10.0,
+                    "confidence": 0.99,
+                }
+            )
+    db.execute(insert(Media), media_rows)
+    db.execute(insert(Face), face_rows)
+    db.execute(text("ANALYZE media"))
+    db.execute(text("ANALYZE faces"))
+    db.execute(text("ANALYZE people"))
+    return people
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def _explain(db, filters: dict) -> dict:
+    query = apply_media_filters(db.query(Media), filters)
+    query = query.order_by(Media.captured_at.desc().nullslast(), Media.imported_at.desc()).limit(50)
+    compiled = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"render_postcompile": True})
+    row = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+    plan = row if isinstance(row, list) else json.loads(row)
+    return plan[0]["Plan"]
+
+
+def _problems(plan: dict) -> list[str]:
+    problems = []
+    for node in _walk(plan):
+        node_type = node.get("Node Type")
+        if node_type in BAD_NODES:
+            problems.append(f"{node_type} node (DISTINCT over media rows)")
+    return problems
+
+
+def _static_cases() -> dict:
+    # Each case is (filters, same filters with different bound values, expected EXISTS probes).
+    first = ",".join(str(uuid4()) for _ in range(2))
+    second = ",".join(str(uuid4()) for _ in range(2))
+    return {
+        "person_ids any": ({"person_ids": first}, {"person_ids": second}, 1),
+        "person_ids all": (
+            {"person_ids": first, "person_match": "all"},
+            {"person_ids": second, "person_match": "all"},
+            2,
+        ),
+        "person names any": ({"q": "person:ann person:bob"}, {"q": "person:cat person:dan"}, 1),
+        "person names all": ({"q": "person:ann person:bob match:all"}, {"q": "person:cat person:dan match:all"}, 2),
+        "ids and names": (
+            {"person_ids": first, "q": "person:ann season:summer"},
+            {"person_ids": second, "q": "person:bob season:winter"},
+            2,
+        ),
+    }
+
+
+def _static_problems(filters: dict, other: dict, expected_exists: int) -> list[str]:
+    problems = []
+    stmt, _params = filter_media_select(select(Media), filters)
+    other_stmt, _other_params = filter_media_select(select(Media), other)
+    # Take both keys before compiling: the first compile annotates the memoized subqueries both statements share.
+    if not stmt._generate_cache_key() == other_stmt._generate_cache_key():
+        problems.append("cache key changes with bound values")
+    sql = str(stmt.compile(dialect=postgresql.dialect())).upper()
+    exists = sql.count("EXISTS")
+    if exists != expected_exists:
+        problems.append(f"{exists} EXISTS probes, expected {expected_exists}")
+    if "DISTINCT" in sql:
+        problems.append("DISTINCT in the outer query")
+    froms = sorted(getattr(from_, "name", str(from_)) for from_ in stmt.get_final_froms())
+    if froms != ["media"]:
+        problems.append(f"outer FROM is {', '.join(froms)}")
+    return problems
+
+
+def _static_check() -> bool:
+    failed = False
+    for label, (filters, other, expected_exists) in _static_cases().items():
+        problems = _static_problems(filters, other, expected_exists)
+        print(f"{'FAIL' if problems else 'ok':4} {label}: {'; '.join(problems) if problems else 'index-friendly'}")
+        failed = failed or bool(problems)
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check list_media plans for DISTINCT-free person filtering.")
+    parser.add_argument("--media", type=int, default=5000, help="Number of synthetic media rows to seed.")
+    parser.add_argument("--people", type=int, default=12, help="Number of synthetic people to seed.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility.")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan.")
+    parser.add_argument("--static", action="store_true", help="Only check the compiled SQL shape; needs no database.")
+    args = parser.parse_args()
+
+    if args.static:
+        sys.exit(1 if _static_check() else 0)
+
+    from app.db.session import SessionLocal
+
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    failed = False
+    try:
+        people = _seed(db, rng, args.media, args.people)
+        ids = ",".join(str(person["id"]) for person in people[:2])
+        cases = {
+            "person_ids any": {"person_ids": ids},
+            "person_ids all": {"person_ids": ids, "person_match": "all"},
+            "person names any": {"q": "person:explain"},
+            "person names all": {"q": "person:person,explain match:all"},
+            "ids and names": {"person_ids": ids, "q": "person:explain season:summer"},
+        }
+        for label, filters in cases.items():
+            plan = _explain(db, filters)
+            problems = _problems(plan)
+            status = "FAIL" if problems else "ok"
+            print(f"{status:4} {label}: {'; '.join(problems) if problems else plan.get('Node Type')}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+            failed = failed or bool(problems)
+    finally:
+        db.rollback()
+        db.close()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
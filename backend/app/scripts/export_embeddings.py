@@ -0,0 +1,32 @@
+import argparse
+import time
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.embedding_snapshot import export_snapshot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export face embeddings to a memory-mapped float16 snapshot.")
+    parser.add_argument("--root", default=settings.embedding_snapshot_root, help="Snapshot directory.")
+    parser.add_argument("--rebuild", action="store_true", help="Rewrite the snapshot instead of appending.")
+    parser.add_argument("--interval", type=float, default=0, help="Keep appending every N seconds (0 runs once).")
+    args = parser.parse_args()
+
+    rebuild = args.rebuild
+    while True:
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            meta = export_snapshot(db, args.root, rebuild=rebuild)
+        print(
+            f"generation {meta.generation}: {meta.rows} rows up to txid {meta.txid} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        rebuild = False
+        if args.interval <= 0:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
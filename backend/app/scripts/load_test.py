@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str) -> int:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status
+
+
+async def _client(
+    host: str, port: int, paths: List[str], deadline: float, samples: Dict[str, List[float]], errors: List[str]
+) -> None:
+    reader = writer = None
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            status = await _request(reader, writer, host, path)
+            elapsed = time.perf_counter() - started
+            if status >= 500:
+                errors.append(f"{path}: HTTP {status}")
+            else:
+                samples[path].append(elapsed)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+            errors.append(f"{path}: {exc!r}")
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(base_url: str, paths: List[str], clients: int, duration: float) -> Tuple[Dict[str, List[float]], List[str]]:
+    parts = urlsplit(base_url)
+    host, port = parts.hostname or "localhost", parts.port or 80
+    samples: Dict[str, List[float]] = {path: [] for path in paths}
+    errors: List[str] = []
+    deadline = time.perf_counter() + duration
+    # Stagger starting paths so every route sees the full concurrency.
+    await asyncio.gather(
+        *[
+            _client(host, port, paths[i % len(paths) :] + paths[: i % len(paths)], deadline, samples, errors)
+            for i in range(clients)
+        ]
+    )
+    return samples, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API latency percentiles under many concurrent clients.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=["/media?limit=50", "/people"],
+        help="Request paths to cycle through (e.g. /media/<id> or /share/<token>).",
+    )
+    args = parser.parse_args()
+
+    samples, errors = asyncio.run(run(args.base_url, args.paths, args.clients, args.duration))
+    print(f"{args.clients} clients, {args.duration:.0f}s against {args.base_url}")
+    print(f"{'path':40} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for path, values in samples.items():
+        if not values:
+            print(f"{path:40} {0:>9}")
+            continue
+        print(
+            f"{path[:40]:40} {len(values):>9} {len(values) / args.duration:>8.1f} "
+            f"{_percentile(values, 0.5) * 1000:>8.1f} {_percentile(values, 0.99) * 1000:>8.1f} "
+            f"{statistics.fmean(values) * 1000:>8.1f}"
+        )
+    if errors:
+        print(f"{len(errors)} error(s), first: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
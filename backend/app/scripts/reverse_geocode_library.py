@@ -0,0 +1,68 @@
+import argparse
+import logging
+import time
+
+from sqlalchemy import update
+
+from app.db.session import SessionLocal
+from app.models.media import Media
+from app.services.geo import load_gazetteer, resolve_location, round_coordinates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resolve place names for every geotagged media item offline.")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Media rows per transaction.")
+    parser.add_argument("--all", action="store_true", help="Re-resolve media that already has a location.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logger = logging.getLogger("geocode")
+
+    started = time.perf_counter()
+    index = load_gazetteer()
+    logger.info("Loaded %s places in %.2fs.", len(index.places), time.perf_counter() - started)
+
+    memo: dict = {}
+    resolved = 0
+    scanned = 0
+    last_id = None
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(Media.id, Media.gps_lat, Media.gps_lon).filter(
+                Media.gps_lat.isnot(None), Media.gps_lon.isnot(None)
+            )
+            if not args.all:
+                query = query.filter(Media.location_id.is_(None))
+            if last_id is not None:
+                query = query.filter(Media.id > last_id)
+            rows = query.order_by(Media.id).limit(args.batch_size).all()
+            if not rows:
+                break
+
+            updates = []
+            for media_id, lat, lon in rows:
+                key = round_coordinates(lat, lon)
+                if key not in memo:
+                    location = resolve_location(db, lat, lon)
+                    memo[key] = (location.id, location.label) if location else None
+                if memo[key]:
+                    location_id, label = memo[key]
+                    updates.append({"id": media_id, "location_id": location_id, "location_text": label})
+
+            if updates:
+                db.execute(update(Media), updates)
+            db.commit()
+
+            scanned += len(rows)
+            resolved += len(updates)
+            last_id = rows[-1][0]
+            logger.info("Scanned %s, resolved %s.", scanned, resolved)
+    finally:
+        db.close()
+
+    logger.info("Done in %.2fs (%s distinct coordinates).", time.perf_counter() - started, len(memo))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import json
+import logging
+import time
+
+from app.db.session import SessionLocal
+from app.services.integrity import IntegrityReport, sweep_originals, sweep_scratch, sweep_thumbnails
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconcile stored files with the media table.")
+    parser.add_argument("--delete-orphans", action="store_true", help="Delete originals and thumbnails with no row.")
+    parser.add_argument("--delete-missing", action="store_true", help="Delete rows whose original file is gone.")
+    parser.add_argument("--verify", action="store_true", help="Re-hash originals and compare with sha256.")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel hashing threads for --verify.")
+    parser.add_argument("--max-mb-per-second", type=float, default=0, help="Read rate limit for --verify (0 = none).")
+    parser.add_argument("--clean-parts", action="store_true", help="Delete stale upload scratch files.")
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=24,
+        help="Only delete orphans and scratch files older than this.",
+    )
+    parser.add_argument("--skip-thumbs", action="store_true", help="Do not reconcile thumbnails and previews.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logger = logging.getLogger("sweep")
+
+    started = time.perf_counter()
+    report = IntegrityReport()
+    db = SessionLocal()
+    try:
+        sweep_originals(
+            db,
+            report,
+            delete_orphans=args.delete_orphans,
+            delete_missing=args.delete_missing,
+            verify=args.verify,
+            workers=args.workers,
+            bytes_per_second=args.max_mb_per_second * 1024 * 1024,
+            min_age_hours=args.min_age_hours,
+        )
+        if not args.skip_thumbs:
+            sweep_thumbnails(db, report, delete_orphans=args.delete_orphans, min_age_hours=args.min_age_hours)
+        sweep_scratch(report, args.min_age_hours, delete=args.clean_parts)
+    finally:
+        db.close()
+
+    logger.info("Finished in %.1fs.", time.perf_counter() - started)
+    print(json.dumps(report.__dict__, indent=2))
+
+
+if __name__ == "__main__":
+    main()
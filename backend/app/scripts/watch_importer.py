@@ -3,12 +3,29 @@ import logging
 import time
 
 from app.core.config import settings
-from app.services.importer import scan_import_folder
+from app.services import inotify
+from app.services.importer import scan_import_folder, watch_import_folder
+
+
+def _poll(logger: logging.Logger) -> None:
+    interval = max(5, settings.import_interval_seconds)
+    logger.info("Polling %s every %ss.", settings.import_root, interval)
+    while True:
+        count = scan_import_folder()
+        if count:
+            logger.info("Imported %s file(s).", count)
+        time.sleep(interval)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Watch import folder and enqueue media processing.")
     parser.add_argument("--once", action="store_true", help="Run a single scan and exit.")
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "inotify", "poll"],
+        default=settings.import_watch_mode,
+        help="Use inotify events, periodic polling, or inotify with a polling fallback.",
+    )
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -23,13 +40,18 @@ def main() -> None:
         logger.info("Imported %s file(s).", count)
         return
 
-    interval = max(5, settings.import_interval_seconds)
-    logger.info("Watching %s every %ss.", settings.import_root, interval)
-    while True:
-        count = scan_import_folder()
-        if count:
-            logger.info("Imported %s file(s).", count)
-        time.sleep(interval)
+    if args.mode == "poll" or (args.mode == "auto" and not inotify.available()):
+        _poll(logger)
+        return
+
+    try:
+        watch_import_folder()
+    except OSError as exc:
+        if args.mode == "inotify":
+            raise
+        # Some network and bind-mounted filesystems do not deliver inotify events.
+        logger.warning("Inotify watch failed (%s); falling back to polling.", exc)
+        _poll(logger)
 
 
 if __name__ == "__main__":
@@ -1,15 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
+import anyio
 from jose import jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.core.config import settings
 from app.models.user import User
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+USER_FIELDS = ("id", "email", "password_hash", "is_admin", "created_at")
+
+_login_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+class TokenCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, Tuple[float, tuple]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        now = time.time()
+        with self.lock:
+            cached = self.entries.get(token)
+            if cached is None:
+                return None
+            if cached[0] <= now:
+                del self.entries[token]
+                return None
+            self.entries.move_to_end(token)
+            values = cached[1]
+        return _detached_user(values)
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float]) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        values = tuple(getattr(user, name) for name in USER_FIELDS)
+        with self.lock:
+            self.entries[token] = (expires_at, values)
+            self.entries.move_to_end(token)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate_user(self, user_id) -> None:
+        with self.lock:
+            for token in [token for token, (_, values) in self.entries.items() if values[0] == user_id]:
+                del self.entries[token]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(settings.auth_cache_size, settings.auth_cache_seconds)
+
+
+def _detached_user(values: tuple) -> User:
+    # A fresh detached instance per request, so no Session ever shares or mutates the cached state.
+    user = User(**dict(zip(USER_FIELDS, values)))
+    make_transient_to_detached(user)
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    token_cache.invalidate_user(target.id)
+
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return pwd_context.verify(plain_password, password_hash)
@@ -28,6 +97,24 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     return user
 
 
+def _get_login_limiter() -> anyio.CapacityLimiter:
+    global _login_limiter
+    if _login_limiter is None:
+        _login_limiter = anyio.CapacityLimiter(max(1, settings.login_concurrency))
+    return _login_limiter
+
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if not user:
+        return None
+    # argon2 is deliberately slow; a dedicated limiter keeps a login burst from holding the shared threadpool.
+    verified = await anyio.to_thread.run_sync(
+        verify_password, password, user.password_hash, limiter=_get_login_limiter()
+    )
+    return user if verified else None
+
+
 def create_access_token(subject: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.jwt_expires_minutes)
     payload = {"sub": subject, "exp": expire}
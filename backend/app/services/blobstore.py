@@ -0,0 +1,288 @@
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, ContextManager, Iterator, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+READ_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    local_root: Optional[str] = None
+
+    @abstractmethod
+    def put_file(self, key: str, source_path: str, move: bool = False) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    @abstractmethod
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        with self.open(key) as handle:
+            return handle.read()
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def modified(self, key: str) -> Optional[float]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_keys(self, prefix: str = "") -> Iterator[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def local_path(self, key: str) -> ContextManager[str]:
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.local_root = str(self.root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put_file(self, key: str, source_path: str, move: bool = False) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            shutil.move(source_path, target)
+            return
+        tmp_path = target.with_name(f".{target.name}.{uuid4().hex}.part")
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, target)
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{uuid4().hex}.part")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, target)
+
+    def open(self, key: str) -> BinaryIO:
+        return self._path(key).open("rb")
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        remaining = end - start + 1
+        with self._path(key).open("rb") as handle:
+            handle.seek(start)
+            while remaining > 0:
+                chunk = handle.read(min(READ_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self._path(key).stat().st_size
+        except OSError:
+            return None
+
+    def modified(self, key: str) -> Optional[float]:
+        try:
+            return self._path(key).stat().st_mtime
+        except OSError:
+            return None
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def iter_keys(self, prefix: str = "") -> Iterator[str]:
+        # Directories sort as "name/" so the walk yields keys in plain byte order, like S3 listings.
+        def walk(directory: Path, base: str) -> Iterator[str]:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                return
+            entries.sort(key=lambda entry: entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name)
+            for entry in entries:
+                key = f"{base}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    yield from walk(Path(entry.path), f"{key}/")
+                elif entry.is_file(follow_symlinks=False) and key.startswith(prefix):
+                    yield key
+
+        yield from walk(self.root, "")
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        yield str(self._path(key))
+
+
+@lru_cache(maxsize=1)
+def _s3_client():
+    try:
+        import boto3
+        from botocore.config import Config
+    except Exception as exc:
+        raise RuntimeError("boto3 is required for the s3 storage backend") from exc
+
+    config = Config(
+        max_pool_connections=settings.s3_max_pool_connections,
+        retries={"max_attempts": 5, "mode": "standard"},
+        s3={"addressing_style": "path" if settings.s3_endpoint_url else "auto"},
+    )
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=settings.s3_endpoint_url or None,
+        region_name=settings.s3_region,
+        aws_access_key_id=settings.s3_access_key or None,
+        aws_secret_access_key=settings.s3_secret_key or None,
+        config=config,
+    )
+
+
+@lru_cache(maxsize=1)
+def _transfer_config():
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=settings.s3_multipart_threshold,
+        multipart_chunksize=settings.s3_multipart_chunksize,
+        max_concurrency=settings.s3_max_concurrency,
+        use_threads=True,
+    )
+
+
+def _is_not_found(exc: Exception) -> bool:
+    response = getattr(exc, "response", None) or {}
+    return response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(StorageBackend):
+    def __init__(self, bucket: str, prefix: str):
+        self.client = _s3_client()
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_file(self, key: str, source_path: str, move: bool = False) -> None:
+        self.client.upload_file(source_path, self.bucket, self._key(key), Config=_transfer_config())
+        if move:
+            os.unlink(source_path)
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+
+    def _get_range(self, key: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=f"bytes={start}-{end}")
+        return response["Body"].read()
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        chunk_size = settings.s3_range_chunk_size
+        ranges = [(offset, min(offset + chunk_size, end + 1) - 1) for offset in range(start, end + 1, chunk_size)]
+        if len(ranges) <= 1:
+            if ranges:
+                yield self._get_range(key, *ranges[0])
+            return
+
+        # Keep a bounded window of ranged GETs in flight and yield them in order.
+        with ThreadPoolExecutor(max_workers=settings.s3_range_parallelism) as executor:
+            pending = deque()
+            queued = iter(ranges)
+            for chunk_range in queued:
+                pending.append(executor.submit(self._get_range, key, *chunk_range))
+                if len(pending) >= settings.s3_range_parallelism:
+                    break
+            try:
+                while pending:
+                    data = pending.popleft().result()
+                    next_range = next(queued, None)
+                    if next_range:
+                        pending.append(executor.submit(self._get_range, key, *next_range))
+                    yield data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"]
+        except Exception as exc:
+            if _is_not_found(exc):
+                return None
+            raise
+
+    def modified(self, key: str) -> Optional[float]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))["LastModified"].timestamp()
+        except Exception as exc:
+            if _is_not_found(exc):
+                return None
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_keys(self, prefix: str = "") -> Iterator[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(self.prefix) :]
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        scratch = Path(settings.media_root, "tmp")
+        scratch.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=Path(key).suffix, dir=scratch)
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), path, Config=_transfer_config())
+            yield path
+        finally:
+            os.unlink(path)
+
+
+@lru_cache(maxsize=1)
+def media_storage() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        return S3Storage(settings.s3_bucket, "media/")
+    return LocalStorage(settings.media_root)
+
+
+@lru_cache(maxsize=1)
+def thumb_storage() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        return S3Storage(settings.s3_bucket, "thumbs/")
+    return LocalStorage(settings.thumb_root)
@@ -0,0 +1,43 @@
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, literal_column
+from sqlalchemy.orm import Session
+
+from app.models.media_change import MediaChange
+
+MEDIA = "media"
+PERSON = "person"
+UPSERT = "upsert"
+DELETE = "delete"
+
+Cursor = Tuple[int, int]
+
+CURRENT_TXID = literal_column("pg_current_xact_id()::text::bigint")
+# Changes are ordered by writing transaction, and only transactions older than every one still running are served.
+# A cursor therefore never moves past a change that has yet to commit, whatever order the commits land in.
+SETTLED_TXID = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def record_changes(db: Session, entity: str, entity_ids: Iterable[UUID], op: str = UPSERT) -> None:
+    rows = [{"entity": entity, "entity_id": entity_id, "op": op} for entity_id in entity_ids]
+    if rows:
+        db.execute(insert(MediaChange), rows)
+
+
+def record_change(db: Session, entity: str, entity_id: UUID, op: str = UPSERT) -> None:
+    record_changes(db, entity, [entity_id], op)
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    return f"{cursor[0]}.{cursor[1]}"
+
+
+def decode_cursor(value: Optional[str]) -> Cursor:
+    if not value:
+        return (0, 0)
+    txid, _, change_id = value.partition(".")
+    cursor = (int(txid), int(change_id))
+    if cursor[0] < 0 or cursor[1] < 0:
+        raise ValueError(value)
+    return cursor
@@ -0,0 +1,135 @@
+import io
+import logging
+import mimetypes
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services.metadata import read_embedded_preview
+
+logger = logging.getLogger(__name__)
+
+# Pillow refuses images above twice this size as decompression bombs and warns above it.
+Image.MAX_IMAGE_PIXELS = settings.image_max_pixels
+
+ORIENTATION_TAG = 0x0112
+MIN_PREVIEW_EDGE = 1024
+# LibRaw flip values mapped to the EXIF orientation they correspond to.
+LIBRAW_FLIP_ORIENTATION = {0: 1, 3: 3, 5: 8, 6: 6}
+
+HEIF_TYPES = {".heic": "image/heic", ".heif": "image/heif", ".hif": "image/heif"}
+RAW_TYPES = {
+    ".arw": "image/x-sony-arw",
+    ".cr2": "image/x-canon-cr2",
+    ".cr3": "image/x-canon-cr3",
+    ".dng": "image/x-adobe-dng",
+    ".nef": "image/x-nikon-nef",
+    ".nrw": "image/x-nikon-nrw",
+    ".orf": "image/x-olympus-orf",
+    ".pef": "image/x-pentax-pef",
+    ".raf": "image/x-fuji-raf",
+    ".rw2": "image/x-panasonic-rw2",
+    ".srw": "image/x-samsung-srw",
+}
+
+
+class DecodedImage(NamedTuple):
+    image: Image.Image
+    orientation: int
+
+
+@dataclass(frozen=True)
+class Decoder:
+    name: str
+    open: Callable[[str], Optional[DecodedImage]]
+
+
+_decoders: Dict[str, Decoder] = {}
+
+
+def register_decoder(decoder: Decoder, types: Dict[str, str]) -> None:
+    for suffix, mime_type in types.items():
+        mimetypes.add_type(mime_type, suffix)
+        _decoders[suffix] = decoder
+
+
+def decoder_for(path: str) -> Optional[Decoder]:
+    return _decoders.get(Path(path).suffix.lower())
+
+
+@lru_cache(maxsize=1)
+def _heif_available() -> bool:
+    try:
+        import pillow_heif
+    except Exception:
+        return False
+    pillow_heif.register_heif_opener()
+    return True
+
+
+@lru_cache(maxsize=1)
+def _rawpy():
+    try:
+        import rawpy
+    except Exception:
+        return None
+    return rawpy
+
+
+def _open_pillow(path: str) -> DecodedImage:
+    img = Image.open(path)
+    return DecodedImage(img, img.getexif().get(ORIENTATION_TAG, 1))
+
+
+def _open_heif(path: str) -> Optional[DecodedImage]:
+    if not _heif_available():
+        return None
+    # pillow-heif applies the container's rotation itself and resets the EXIF orientation.
+    return _open_pillow(path)
+
+
+def _open_raw(path: str) -> Optional[DecodedImage]:
+    preview = read_embedded_preview(path)
+    rawpy = _rawpy()
+    if preview is not None:
+        data, orientation = preview
+        img = Image.open(io.BytesIO(data))
+        if rawpy is None or max(img.size) >= MIN_PREVIEW_EDGE:
+            return DecodedImage(img, orientation)
+        img.close()
+    if rawpy is None:
+        return None
+
+    with rawpy.imread(path) as raw:
+        orientation = LIBRAW_FLIP_ORIENTATION.get(raw.sizes.flip, 1)
+        try:
+            thumb = raw.extract_thumb()
+        except (rawpy.LibRawNoThumbnailError, rawpy.LibRawUnsupportedThumbnailError):
+            thumb = None
+        if thumb is not None and thumb.format == rawpy.ThumbFormat.JPEG:
+            return DecodedImage(Image.open(io.BytesIO(thumb.data)), orientation)
+        if thumb is not None and thumb.format == rawpy.ThumbFormat.BITMAP:
+            return DecodedImage(Image.fromarray(thumb.data), orientation)
+        # Last resort: a half-size demosaic, which LibRaw already rotates.
+        return DecodedImage(Image.fromarray(raw.postprocess(half_size=True, use_camera_wb=True)), 1)
+
+
+register_decoder(Decoder("heif", _open_heif), HEIF_TYPES)
+register_decoder(Decoder("raw", _open_raw), RAW_TYPES)
+
+
+@contextmanager
+def open_image(path: str) -> Iterator[DecodedImage]:
+    decoder = decoder_for(path)
+    decoded = decoder.open(path) if decoder else None
+    if decoded is None:
+        decoded = _open_pillow(path)
+    try:
+        yield decoded
+    finally:
+        decoded.image.close()
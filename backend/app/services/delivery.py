@@ -0,0 +1,204 @@
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+import anyio
+from sqlalchemy.orm import Session
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.models.media import Media
+from app.models.share_link import ShareLink
+from app.services.blobstore import StorageBackend
+from app.services.media_filters import apply_media_filters
+
+CHUNK_SIZE = 64 * 1024
+SHA_PREFIX_RE = re.compile(r"^([0-9a-f]{64})_")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+SHARE_CACHE_SECONDS = 60
+SHARE_CACHE_SIZE = 10000
+
+_share_cache: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def resolve_file(root: str, rel_path: str) -> Optional[Path]:
+    base = Path(root).resolve()
+    candidate = (base / rel_path).resolve()
+    if base not in candidate.parents or not candidate.is_file():
+        return None
+    return candidate
+
+
+def content_sha(rel_path: str) -> Optional[str]:
+    match = SHA_PREFIX_RE.match(Path(rel_path).name)
+    return match.group(1) if match else None
+
+
+def valid_key(rel_path: str) -> bool:
+    parts = rel_path.split("/")
+    return bool(rel_path) and not rel_path.startswith("/") and all(part not in ("", ".", "..") for part in parts)
+
+
+def file_etag(rel_path: str, variant: str, size: int, mtime_ns: int = 0) -> str:
+    sha = content_sha(rel_path)
+    if sha and variant == "original":
+        return f'"{sha}"'
+    if sha:
+        return f'"{sha}-{variant}-{size:x}"'
+    return f'W/"{mtime_ns:x}-{size:x}"'
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    # Multi-range requests are answered with the full body, which RFC 9110 allows.
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # An invalid range-spec is ignored (RFC 9110 14.2), so the full body is sent.
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def share_allows(db: Session, token: str, sha: Optional[str]) -> bool:
+    if not sha:
+        return False
+    key = (token, sha)
+    now = time.monotonic()
+    cached = _share_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    link = db.query(ShareLink).filter(ShareLink.token == token).first()
+    allowed = False
+    if link and not (link.expires_at and link.expires_at < datetime.now(timezone.utc)):
+        query = apply_media_filters(db.query(Media.id), link.filters or {}).filter(Media.sha256 == sha)
+        allowed = db.query(query.exists()).scalar()
+
+    if len(_share_cache) >= SHARE_CACHE_SIZE:
+        _share_cache.clear()
+    _share_cache[key] = (now + SHARE_CACHE_SECONDS, allowed)
+    return allowed
+
+
+def cache_headers(etag: str, mtime: Optional[float] = None) -> Dict[str, str]:
+    scope = "public" if settings.media_files_public else "private"
+    # Only sha-derived strong ETags pin the content; weak mtime/size ETags must be revalidated.
+    freshness = "no-cache" if etag.startswith("W/") else f"max-age={settings.media_cache_max_age}, immutable"
+    headers = {
+        "cache-control": f"{scope}, {freshness}",
+        "etag": etag,
+        "accept-ranges": "bytes",
+    }
+    if mtime is not None:
+        headers["last-modified"] = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(mtime))
+    return headers
+
+
+def accel_redirect(prefix: str, rel_path: str, headers: Mapping[str, str], media_type: Optional[str]) -> Response:
+    response = Response(status_code=200, headers=dict(headers), media_type=media_type)
+    response.headers["x-accel-redirect"] = f"{prefix.rstrip('/')}/{rel_path}"
+    del response.headers["content-length"]
+    return response
+
+
+class FileRangeResponse(Response):
+    def __init__(
+        self,
+        path: Path,
+        size: int,
+        byte_range: Optional[Tuple[int, int]],
+        headers: Mapping[str, str],
+        media_type: Optional[str] = None,
+        send_body: bool = True,
+    ):
+        self.path = path
+        self.start, self.end = byte_range if byte_range else (0, size - 1)
+        self.send_body = send_body
+        self.status_code = 206 if byte_range else 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(max(0, self.end - self.start + 1))
+        if byte_range:
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start + 1
+        if not self.send_body or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": self.start,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def stream_range_response(
+    store: StorageBackend,
+    key: str,
+    size: int,
+    byte_range: Optional[Tuple[int, int]],
+    headers: Mapping[str, str],
+    media_type: Optional[str] = None,
+    send_body: bool = True,
+) -> Response:
+    start, end = byte_range if byte_range else (0, size - 1)
+    headers = dict(headers)
+    headers["content-length"] = str(max(0, end - start + 1))
+    if byte_range:
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+    status_code = 206 if byte_range else 200
+    if not send_body or end < start:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        store.open_range(key, start, end), status_code=status_code, headers=headers, media_type=media_type
+    )
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.face import Face
+from app.services.changes import SETTLED_TXID
+
+logger = logging.getLogger(__name__)
+
+DIM = 512
+ROW_BYTES = DIM * 2
+ID_BYTES = 16
+META_NAME = "meta.json"
+SCAN_ROWS = 65536
+
+
+class SnapshotMeta(NamedTuple):
+    generation: int
+    rows: int
+    txid: int
+
+
+def _paths(root: Path, generation: int) -> Tuple[Path, Path]:
+    return root / f"embeddings-{generation}.f16", root / f"ids-{generation}.bin"
+
+
+def read_meta(root: Path) -> Optional[SnapshotMeta]:
+    try:
+        data = json.loads((root / META_NAME).read_text())
+    except FileNotFoundError:
+        return None
+    return SnapshotMeta(data["generation"], data["rows"], data["txid"])
+
+
+def _write_meta(root: Path, meta: SnapshotMeta) -> None:
+    tmp = root / f".{META_NAME}.tmp"
+    tmp.write_text(json.dumps({**meta._asdict(), "dim": DIM}))
+    os.replace(tmp, root / META_NAME)
+
+
+def _normalized(embedding) -> np.ndarray:
+    vector = embedding.to_numpy().astype(np.float32)
+    norm = np.linalg.norm(vector)
+    # Unit vectors turn cosine similarity into a plain dot product for readers.
+    return (vector / norm if norm else vector).astype(np.float16)
+
+
+def _append(db: Session, root: Path, generation: int, rows: int, since_txid: int, settled: int) -> int:
+    embeddings_path, ids_path = _paths(root, generation)
+    query = (
+        select(Face.id, Face.embedding)
+        .where(Face.embedding.isnot(None), Face.embedding_txid > since_txid, Face.embedding_txid < settled)
+        .order_by(Face.embedding_txid, Face.id)
+        .execution_options(yield_per=5000)
+    )
+    with open(embeddings_path, "ab") as embeddings_file, open(ids_path, "ab") as ids_file:
+        # Drop anything a crashed run appended after the last published row count.
+        embeddings_file.truncate(rows * ROW_BYTES)
+        ids_file.truncate(rows * ID_BYTES)
+        for partition in db.execute(query).partitions():
+            embeddings_file.write(np.stack([_normalized(embedding) for _id, embedding in partition]).tobytes())
+            ids_file.write(b"".join(face_id.bytes for face_id, _embedding in partition))
+            rows += len(partition)
+        embeddings_file.flush()
+        ids_file.flush()
+        os.fsync(embeddings_file.fileno())
+        os.fsync(ids_file.fileno())
+    return rows
+
+
+def export_snapshot(db: Session, root: Optional[str] = None, rebuild: bool = False) -> SnapshotMeta:
+    root_path = Path(root or settings.embedding_snapshot_root)
+    root_path.mkdir(parents=True, exist_ok=True)
+    # Every transaction below this id has finished, so rows up to it can never appear later out of order.
+    settled = db.execute(select(SETTLED_TXID)).scalar_one()
+    meta = read_meta(root_path)
+
+    if meta is not None and not rebuild:
+        live = db.execute(select(func.count(Face.id)).where(Face.embedding.isnot(None))).scalar_one()
+        # Re-embedded and deleted faces leave superseded rows behind; rewrite once they make up too much of the file.
+        rebuild = bool(meta.rows) and (meta.rows - live) / meta.rows > settings.embedding_snapshot_max_stale
+
+    if meta is None or rebuild:
+        generation = meta.generation + 1 if meta else 1
+        rows = _append(db, root_path, generation, 0, 0, settled)
+        new_meta = SnapshotMeta(generation, rows, settled - 1)
+        _write_meta(root_path, new_meta)
+        # The generation just replaced stays on disk until the next rebuild, so a reader that read the old meta
+        # can still map it; anything older has had a full export interval to move on.
+        for generation_path in root_path.glob("*-*.*"):
+            stem = generation_path.stem.rpartition("-")[2]
+            if stem.isdigit() and int(stem) < generation - 1:
+                generation_path.unlink(missing_ok=True)
+        return new_meta
+
+    rows = _append(db, root_path, meta.generation, meta.rows, meta.txid, settled)
+    new_meta = SnapshotMeta(meta.generation, rows, settled - 1)
+    _write_meta(root_path, new_meta)
+    return new_meta
+
+
+class EmbeddingSnapshot:
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.embedding_snapshot_root)
+        self.meta: Optional[SnapshotMeta] = None
+        self.embeddings = np.empty((0, DIM), dtype=np.float16)
+        self.ids = np.empty((0, ID_BYTES), dtype=np.uint8)
+        self.current = np.empty(0, dtype=bool)
+
+    def refresh(self) -> bool:
+        for _attempt in range(3):
+            meta = read_meta(self.root)
+            if meta is None or meta == self.meta:
+                return False
+            try:
+                self._map(meta)
+            except FileNotFoundError:
+                # A rebuild swapped generations between reading the meta and mapping its files.
+                continue
+            return True
+        return False
+
+    def _map(self, meta: SnapshotMeta) -> None:
+        embeddings_path, ids_path = _paths(self.root, meta.generation)
+        if meta.rows:
+            # Read-only shared mappings: every process reading the snapshot shares one copy in the page cache.
+            embeddings = np.memmap(embeddings_path, dtype=np.float16, mode="r", shape=(meta.rows, DIM))
+            self.ids = np.memmap(ids_path, dtype=np.uint8, mode="r", shape=(meta.rows, ID_BYTES))
+            self.embeddings = embeddings
+        else:
+            self.embeddings = np.empty((0, DIM), dtype=np.float16)
+            self.ids = np.empty((0, ID_BYTES), dtype=np.uint8)
+        # A face re-embedded since the last rebuild appears more than once; only its latest row counts.
+        self.current = np.zeros(meta.rows, dtype=bool)
+        if meta.rows:
+            _unique, last = np.unique(self.ids[::-1].view(f"V{ID_BYTES}").ravel(), return_index=True)
+            self.current[meta.rows - 1 - last] = True
+        self.meta = meta
+
+    def nearest(self, embedding: List[float], limit: int = 10) -> List[Tuple[UUID, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = np.empty(len(self.embeddings), dtype=np.float32)
+        for start in range(0, len(self.embeddings), SCAN_ROWS):
+            block = self.embeddings[start : start + SCAN_ROWS]
+            scores[start : start + len(block)] = block.astype(np.float32) @ query
+        scores[~self.current] = -np.inf
+
+        count = min(limit, int(self.current.sum()))
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        # Faces deleted since the last rebuild are still in the file; callers resolve ids against the database.
+        return [(UUID(bytes=self.ids[index].tobytes()), 1.0 - float(scores[index])) for index in top]
+
+
+_shared: Optional[EmbeddingSnapshot] = None
+_shared_checked = 0.0
+_shared_lock = threading.Lock()
+
+
+def shared_snapshot() -> Optional[EmbeddingSnapshot]:
+    global _shared, _shared_checked
+    if not settings.embedding_snapshot_enabled:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = EmbeddingSnapshot()
+        if time.monotonic() - _shared_checked >= settings.embedding_snapshot_refresh_seconds:
+            _shared_checked = time.monotonic()
+            try:
+                _shared.refresh()
+            except (OSError, ValueError) as exc:
+                logger.warning("Could not map embedding snapshot: %s", exc)
+        return _shared if _shared.meta is not None else None
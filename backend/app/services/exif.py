@@ -2,12 +2,28 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
 
 from PIL import ExifTags, Image
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 
+from app.models.media_exif import MediaExif
+from app.services.metadata import (
+    EXIF_TAGS as HEADER_EXIF_TAGS,
+    GPS_TAGS as HEADER_GPS_TAGS,
+    IFD0_TAGS as HEADER_IFD0_TAGS,
+    read_metadata,
+)
 
 EXIF_TAGS = {v: k for k, v in ExifTags.TAGS.items()}
 GPS_TAGS = {v: k for k, v in ExifTags.GPSTAGS.items()}
+RAW_EXIF_WHITELIST = {
+    *HEADER_IFD0_TAGS.values(),
+    *HEADER_EXIF_TAGS.values(),
+    *HEADER_GPS_TAGS.values(),
+}
+RAW_EXIF_MAX_VALUE_CHARS = 1024
 
 
 def _ratio_to_float(value: Any) -> Optional[float]:
@@ -45,17 +61,27 @@ def _parse_exif_datetime(value: Any) -> Optional[datetime]:
 
 
 def extract_exif(path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    header = read_metadata(path)
+    if header is not None:
+        return header
+    return extract_exif_pil(path)
+
+
+def extract_exif_pil(path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     raw_exif: Dict[str, Any] = {}
     parsed: Dict[str, Any] = {}
 
     try:
-        with Image.open(path) as img:
-            exif = img.getexif()
+        # Image.open only parses the header; going through the decoder registry would demosaic RAW files here,
+        # in the worker and outside the sandbox, for pixels whose EXIF is gone anyway.
+        with Image.open(path) as image:
+            exif = image.getexif()
             if not exif:
                 return raw_exif, parsed
             for tag_id, value in exif.items():
                 tag = ExifTags.TAGS.get(tag_id, str(tag_id))
-                raw_exif[tag] = _safe_exif_value(value)
+                if tag in RAW_EXIF_WHITELIST:
+                    raw_exif[tag] = _safe_exif_value(value)
 
             dt_value = exif.get(EXIF_TAGS.get("DateTimeOriginal")) or exif.get(EXIF_TAGS.get("DateTime"))
             captured_at = _parse_exif_datetime(dt_value)
@@ -93,3 +119,24 @@ def _safe_exif_value(value: Any) -> Any:
         return value
     except Exception:
         return str(value)
+
+
+def compact_exif(raw_exif: Dict[str, Any]) -> Dict[str, Any]:
+    # Blobs decoded to strings (thumbnails, vendor data) are dropped even under a whitelisted tag.
+    return {
+        tag: value
+        for tag, value in raw_exif.items()
+        if tag in RAW_EXIF_WHITELIST and len(str(value)) <= RAW_EXIF_MAX_VALUE_CHARS
+    }
+
+
+def save_raw_exif(db: Session, media_id: UUID, raw_exif: Dict[str, Any]) -> None:
+    data = compact_exif(raw_exif)
+    if not data:
+        return
+    stmt = insert(MediaExif).values(media_id=media_id, data=data)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MediaExif.media_id],
+        set_={"data": stmt.excluded.data, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
@@ -0,0 +1,96 @@
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.models.media import Media
+from app.services.blobstore import media_storage
+from app.services.zipstream import ZipEntry, archive_size, iter_zip
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _unique_name(filename: str, used: Dict[str, int]) -> str:
+    name = Path(filename).name or "file"
+    key = name.lower()
+    if key not in used:
+        used[key] = 1
+        return name
+    stem, suffix = os.path.splitext(name)
+    while True:
+        used[key] += 1
+        candidate = f"{stem} ({used[key]}){suffix}"
+        if candidate.lower() not in used:
+            used[candidate.lower()] = 1
+            return candidate
+
+
+def export_entries(query: Query) -> Iterator[ZipEntry]:
+    # Originals are content-addressed and never rewritten, so the recorded size is the file size; missing files
+    # are the integrity sweeper's job, not something to stat for on every manifest and part request.
+    rows = (
+        query.with_entities(
+            Media.storage_path, Media.original_filename, Media.size_bytes, Media.captured_at, Media.imported_at
+        )
+        .order_by(Media.captured_at.asc().nullslast(), Media.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+    used: Dict[str, int] = {}
+    for storage_path, filename, size_bytes, captured_at, imported_at in rows:
+        modified = captured_at or imported_at or datetime.now(timezone.utc)
+        yield ZipEntry(path=storage_path, arcname=_unique_name(filename, used), size=size_bytes, modified=modified)
+
+
+def iter_parts(entries: Iterable[ZipEntry], part_bytes: int) -> Iterator[List[ZipEntry]]:
+    part: List[ZipEntry] = []
+    total = 0
+    for entry in entries:
+        if part and total + entry.size > part_bytes:
+            yield part
+            part, total = [], 0
+        part.append(entry)
+        total += entry.size
+    yield part
+
+
+def export_manifest(entries: Iterable[ZipEntry]) -> dict:
+    files = 0
+    total_bytes = 0
+    parts = []
+    for index, part in enumerate(iter_parts(entries, settings.export_part_bytes)):
+        files += len(part)
+        total_bytes += sum(entry.size for entry in part)
+        parts.append({"part": index, "files": len(part), "bytes": archive_size(part)})
+    return {"files": files, "bytes": total_bytes, "parts": parts}
+
+
+def export_response(entries: Iterable[ZipEntry], part: int, basename: str) -> StreamingResponse:
+    # Only the requested part is kept; the rest are counted for the headers and dropped.
+    selected: Optional[List[ZipEntry]] = None
+    part_count = 0
+    total_files = 0
+    for index, candidate in enumerate(iter_parts(entries, settings.export_part_bytes)):
+        if index == part:
+            selected = candidate
+        part_count += 1
+        total_files += len(candidate)
+    if selected is None:
+        raise HTTPException(status_code=404, detail="Export part not found")
+    filename = basename if part_count == 1 else f"{basename}-part{part + 1:03d}-of-{part_count:03d}"
+    headers = {
+        "content-length": str(archive_size(selected)),
+        "content-disposition": f'attachment; filename="{filename}.zip"',
+        "cache-control": "no-store",
+        "x-export-part": str(part),
+        "x-export-parts": str(part_count),
+        "x-export-files": str(len(selected)),
+        "x-export-total-files": str(total_files),
+    }
+    store = media_storage()
+    stream = iter_zip(selected, read=lambda entry: store.open_range(entry.path, 0, entry.size - 1))
+    return StreamingResponse(stream, media_type="application/zip", headers=headers)
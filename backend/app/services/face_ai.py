@@ -1,9 +1,12 @@
 import logging
 from functools import lru_cache
-from typing import List
+from typing import List, Optional, Tuple
 
+import numpy as np
 from PIL import Image
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,30 +31,54 @@ def _load_models():
     return mtcnn, resnet, device
 
 
-def detect_faces(image_path: str) -> List[FaceResult]:
+def locate_faces(mtcnn, img: Image.Image, scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    # MTCNN's image pyramid grows with resolution, so detect on a size-capped copy and map boxes back to img.
+    factor = 1.0
+    detect_img = img
+    max_edge = settings.face_detect_max_edge
+    if max_edge and max(img.size) > max_edge:
+        factor = max(img.size) / max_edge
+        detect_img = img.resize(
+            (max(1, round(img.width / factor)), max(1, round(img.height / factor))), Image.Resampling.BILINEAR
+        )
+
+    # Faces below the minimum are never kept, so let the pyramid start at that size instead of 20px.
+    mtcnn.min_face_size = max(12, int(settings.face_min_size_px / (scale * factor)))
+    boxes, probs = mtcnn.detect(detect_img)
+    if boxes is None or probs is None:
+        return np.empty((0, 4)), np.empty(0)
+
+    boxes = boxes * factor
+    sides = np.minimum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]) * scale
+    keep = (probs >= settings.face_min_confidence) & (sides >= settings.face_min_size_px)
+    return boxes[keep], probs[keep]
+
+
+def detect_faces(img: Image.Image, scale: float = 1.0) -> Optional[List[FaceResult]]:
     try:
         mtcnn, resnet, device = _load_models()
     except Exception as exc:
         logger.warning("Face AI unavailable: %s", exc)
-        return []
+        return None
 
     try:
-        with Image.open(image_path) as img:
-            boxes, probs = mtcnn.detect(img)
-            if boxes is None or probs is None:
-                return []
-            faces = mtcnn.extract(img, boxes, save_path=None)
-            if faces is None:
-                return []
-            embeddings = resnet(faces.to(device)).detach().cpu().numpy()
-            results: list[FaceResult] = []
-            for idx, box in enumerate(boxes):
-                x1, y1, x2, y2 = box.tolist()
-                bbox = [x1, y1, x2 - x1, y2 - y1]
-                confidence = float(probs[idx])
-                embedding = embeddings[idx].tolist()
-                results.append(FaceResult(bbox, confidence, embedding))
-            return results
+        boxes, probs = locate_faces(mtcnn, img, scale)
+        if not len(boxes):
+            return []
+        # Aligned crops come from the full analysis image, not the detection copy.
+        faces = mtcnn.extract(img, boxes, save_path=None)
+        if faces is None:
+            return None
+        embeddings = resnet(faces.to(device)).detach().cpu().numpy()
+        results: list[FaceResult] = []
+        for idx, box in enumerate(boxes):
+            # Boxes are reported in the coordinates of the original image, not the reduced analysis copy.
+            x1, y1, x2, y2 = (value * scale for value in box.tolist())
+            bbox = [x1, y1, x2 - x1, y2 - y1]
+            confidence = float(probs[idx])
+            embedding = embeddings[idx].tolist()
+            results.append(FaceResult(bbox, confidence, embedding))
+        return results
     except Exception as exc:
         logger.warning("Face detection failed: %s", exc)
-        return []
+        return None
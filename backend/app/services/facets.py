@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import calendar
+import hashlib
+from datetime import date, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.media import Media
+from app.models.media_facet import MediaFacet
+from app.services.media_filters import MediaFilterPlan, apply_media_filters, plan_media_filters
+
+FACET_COLUMNS = ("month", "season", "media_type", "camera_make", "camera_model", "has_faces", "has_gps")
+GROUPING_SETS = (
+    ("month",),
+    ("season",),
+    ("media_type",),
+    ("camera_make", "camera_model"),
+    ("has_faces",),
+    ("has_gps",),
+)
+
+FacetKey = Tuple[Optional[date], Optional[str], str, Optional[str], Optional[str], bool, bool]
+
+
+def facet_key(media: Media) -> FacetKey:
+    captured_at = media.captured_at
+    if captured_at is not None and captured_at.tzinfo is not None:
+        # Buckets are UTC months, matching date_trunc('month', captured_at AT TIME ZONE 'UTC') in SQL.
+        captured_at = captured_at.astimezone(timezone.utc)
+    month = date(captured_at.year, captured_at.month, 1) if captured_at else None
+    return (
+        month,
+        media.season,
+        media.media_type,
+        media.camera_make,
+        media.camera_model,
+        bool(media.face_count),
+        bool(media.has_gps),
+    )
+
+
+def _key_digest(key: FacetKey) -> str:
+    # Must stay in sync with the backfill expression in the media_facets migration.
+    parts = []
+    for value in key:
+        if value is None:
+            parts.append("-")
+        elif isinstance(value, bool):
+            parts.append("=t" if value else "=f")
+        elif isinstance(value, date):
+            parts.append("=" + value.isoformat())
+        else:
+            parts.append("=" + str(value))
+    return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def apply_facet_delta(db: Session, key: FacetKey, delta: int) -> None:
+    if not delta:
+        return
+    values = dict(zip(FACET_COLUMNS, key))
+    stmt = insert(MediaFacet).values(key=_key_digest(key), count=delta, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MediaFacet.key],
+        set_={"count": MediaFacet.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def add_media_facets(db: Session, media: Media) -> None:
+    apply_facet_delta(db, facet_key(media), 1)
+
+
+def remove_media_facets(db: Session, media: Media) -> None:
+    apply_facet_delta(db, facet_key(media), -1)
+
+
+def record_facet_change(db: Session, before: FacetKey, media: Media) -> FacetKey:
+    after = facet_key(media)
+    if after != before:
+        apply_facet_delta(db, before, -1)
+        apply_facet_delta(db, after, 1)
+    return after
+
+
+def _month_aligned(plan: MediaFilterPlan) -> bool:
+    if plan.date_from is not None:
+        start = plan.date_from
+        if (start.day, start.hour, start.minute, start.second, start.microsecond) != (1, 0, 0, 0, 0):
+            return False
+    if plan.date_to is not None:
+        end = plan.date_to
+        last_day = calendar.monthrange(end.year, end.month)[1]
+        if (end.day, end.hour, end.minute, end.second) != (last_day, 23, 59, 59):
+            return False
+    return True
+
+
+def rollup_supports(plan: MediaFilterPlan) -> bool:
+    return (
+        not plan.person_ids
+        and not plan.person_names
+        and not plan.location_texts
+        and not plan.free_text
+        and not plan.match_nothing
+        and _month_aligned(plan)
+    )
+
+
+def _rollup_conditions(plan: MediaFilterPlan) -> list:
+    conditions = []
+    for value in plan.seasons:
+        conditions.append(MediaFacet.season == value)
+    for value in plan.media_types:
+        conditions.append(MediaFacet.media_type == value)
+    for value in plan.camera_makes:
+        conditions.append(MediaFacet.camera_make.ilike(f"%{value}%"))
+    for value in plan.camera_models:
+        conditions.append(MediaFacet.camera_model.ilike(f"%{value}%"))
+    for value in plan.camera_texts:
+        conditions.append(
+            MediaFacet.camera_make.ilike(f"%{value}%") | MediaFacet.camera_model.ilike(f"%{value}%")
+        )
+    for value in plan.has_faces:
+        conditions.append(MediaFacet.has_faces.is_(value))
+    for value in plan.has_gps:
+        conditions.append(MediaFacet.has_gps.is_(value))
+    if plan.date_from is not None:
+        conditions.append(MediaFacet.month >= plan.date_from.date())
+    if plan.date_to is not None:
+        conditions.append(MediaFacet.month <= plan.date_to.date())
+    conditions.append(MediaFacet.count > 0)
+    return conditions
+
+
+def _grouping_mask(grouping_set: Tuple[str, ...]) -> int:
+    names = FACET_COLUMNS
+    return sum(1 << (len(names) - 1 - idx) for idx, name in enumerate(names) if name not in grouping_set)
+
+
+def _grouped_query(db: Session, columns: Dict[str, Any], count_expr: Any):
+    labelled = [columns[name].label(name) for name in FACET_COLUMNS]
+    grouping = func.grouping(*[columns[name] for name in FACET_COLUMNS]).label("grouping")
+    sets = [tuple_(*[columns[name] for name in group]) for group in GROUPING_SETS]
+    return db.query(grouping, count_expr.label("item_count"), *labelled).group_by(func.grouping_sets(*sets))
+
+
+def _format(name: str, value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, date):
+        return value.strftime("%Y-%m")
+    return str(value)
+
+
+def compute_facets(db: Session, filters: Dict[str, Any]) -> Dict[str, Any]:
+    plan = plan_media_filters(filters)
+    if rollup_supports(plan):
+        source = "rollup"
+        columns = {name: getattr(MediaFacet, name) for name in FACET_COLUMNS}
+        query = _grouped_query(db, columns, func.sum(MediaFacet.count)).filter(*_rollup_conditions(plan))
+    else:
+        source = "live"
+        columns = {
+            # Literal SQL keeps SELECT and GROUPING SETS textually identical under server-side binding.
+            "month": cast(
+                func.date_trunc(literal_column("'month'"), func.timezone(literal_column("'UTC'"), Media.captured_at)),
+                Date,
+            ),
+            "season": Media.season,
+            "media_type": Media.media_type,
+            "camera_make": Media.camera_make,
+            "camera_model": Media.camera_model,
+            "has_faces": Media.face_count > literal_column("0"),
+            "has_gps": Media.has_gps,
+        }
+        query = apply_media_filters(_grouped_query(db, columns, func.count(Media.id)), filters)
+
+    masks = {_grouping_mask(group): group for group in GROUPING_SETS}
+    result: Dict[str, Any] = {
+        "source": source,
+        "total": 0,
+        "months": [],
+        "seasons": [],
+        "media_types": [],
+        "cameras": [],
+        "has_faces": [],
+        "has_gps": [],
+    }
+    buckets = {
+        "month": "months",
+        "season": "seasons",
+        "media_type": "media_types",
+        "has_faces": "has_faces",
+        "has_gps": "has_gps",
+    }
+    for row in query.all():
+        group = masks.get(row.grouping)
+        count = int(row.item_count or 0)
+        if not group or not count:
+            continue
+        if group == ("camera_make", "camera_model"):
+            result["cameras"].append({"make": row.camera_make, "model": row.camera_model, "count": count})
+            continue
+        name = group[0]
+        result[buckets[name]].append({"value": _format(name, getattr(row, name)), "count": count})
+        if name == "media_type":
+            result["total"] += count
+
+    result["months"].sort(key=lambda item: item["value"] or "")
+    for key in ("seasons", "media_types", "cameras", "has_faces", "has_gps"):
+        result[key].sort(key=lambda item: item["count"], reverse=True)
+    return result
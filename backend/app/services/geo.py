@@ -1,6 +1,188 @@
-from typing import Optional
+from __future__ import annotations
+
+import csv
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.models.location import Location
+
+BUNDLED_GAZETTEER = Path(__file__).resolve().parents[1] / "data" / "gazetteer.csv"
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    region: Optional[str]
+    country: Optional[str]
+    lat: float
+    lon: float
+
+    @property
+    def label(self) -> str:
+        parts = [self.name]
+        if self.region and self.region != self.name:
+            parts.append(self.region)
+        if self.country:
+            parts.append(self.country)
+        return ", ".join(parts)
+
+
+class GazetteerIndex:
+    def __init__(self, places: List[Place]):
+        self.places = places
+        self.cells: Dict[Tuple[int, int], List[Place]] = {}
+        for place in places:
+            self.cells.setdefault(_cell(place.lat, place.lon), []).append(place)
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> Optional[Place]:
+        lat_cells = int(math.ceil(max_km / KM_PER_DEGREE))
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + lat_cells, 89.0))), 0.01)
+        lon_cells = min(180, int(math.ceil(max_km / (KM_PER_DEGREE * cos_lat))))
+        base_lat, base_lon = _cell(lat, lon)
+
+        best: Optional[Place] = None
+        best_km = max_km
+        for dlat in range(-lat_cells, lat_cells + 1):
+            for dlon in range(-lon_cells, lon_cells + 1):
+                cell_lon = (base_lon + dlon + 180) % 360 - 180
+                for place in self.cells.get((base_lat + dlat, cell_lon), ()):
+                    km = haversine_km(lat, lon, place.lat, place.lon)
+                    if km <= best_km:
+                        best, best_km = place, km
+        return best
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return int(math.floor(lat)), int(math.floor(lon))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _read_csv(path: Path) -> List[Place]:
+    places = []
+    with path.open(newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            places.append(
+                Place(
+                    name=row["name"],
+                    region=row.get("region") or None,
+                    country=row.get("country") or None,
+                    lat=float(row["lat"]),
+                    lon=float(row["lon"]),
+                )
+            )
+    return places
+
+
+def _read_geonames_names(path: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    # Dumps carry admin1 and country codes; resolve them so labels read like the bundled gazetteer's.
+    admin1_path = path.with_name("admin1CodesASCII.txt")
+    countries_path = path.with_name("countryInfo.txt")
+    for required in (admin1_path, countries_path):
+        if not required.is_file():
+            raise FileNotFoundError(f"GeoNames gazetteer {path} needs {required.name} next to it")
+
+    admin1: Dict[str, str] = {}
+    with admin1_path.open(encoding="utf-8") as handle:
+        for line in handle:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) >= 2:
+                admin1[cols[0]] = cols[1]
+
+    countries: Dict[str, str] = {}
+    with countries_path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) >= 5:
+                countries[cols[0]] = cols[4]
+    return admin1, countries
+
+
+def _read_geonames(path: Path) -> List[Place]:
+    admin1, countries = _read_geonames_names(path)
+    places = []
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 11:
+                continue
+            country_code, admin1_code = cols[8], cols[10]
+            places.append(
+                Place(
+                    name=cols[1],
+                    region=admin1.get(f"{country_code}.{admin1_code}") if admin1_code else None,
+                    country=countries.get(country_code) if country_code else None,
+                    lat=float(cols[4]),
+                    lon=float(cols[5]),
+                )
+            )
+    return places
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer() -> GazetteerIndex:
+    path = Path(settings.gazetteer_path) if settings.gazetteer_path else BUNDLED_GAZETTEER
+    places = _read_geonames(path) if path.suffix == ".txt" else _read_csv(path)
+    return GazetteerIndex(places)
+
+
+def round_coordinates(lat: float, lon: float) -> Tuple[float, float]:
+    precision = settings.reverse_geocode_precision
+    return round(lat, precision), round(lon, precision)
+
+
+@lru_cache(maxsize=65536)
+def _nearest_rounded(lat: float, lon: float) -> Optional[Place]:
+    return load_gazetteer().nearest(lat, lon, settings.reverse_geocode_max_km)
+
+
+def reverse_geocode(lat: float, lon: float) -> Optional[Place]:
+    return _nearest_rounded(*round_coordinates(lat, lon))
+
+
+def resolve_location(db: Session, lat: float, lon: float) -> Optional[Location]:
+    place = reverse_geocode(lat, lon)
+    if not place:
+        return None
+    key_lat, key_lon = round_coordinates(lat, lon)
+    stmt = insert(Location).values(
+        lat=key_lat,
+        lon=key_lon,
+        label=place.label,
+        city=place.name,
+        region=place.region,
+        country=place.country,
+    )
+    # Rows written from an older gazetteer (e.g. code-style GeoNames labels) are relabelled rather than kept.
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_locations_lat_lon",
+        set_={
+            "label": stmt.excluded.label,
+            "city": stmt.excluded.city,
+            "region": stmt.excluded.region,
+            "country": stmt.excluded.country,
+        },
+        where=Location.label.is_distinct_from(stmt.excluded.label),
+    )
+    db.execute(stmt)
+    return db.query(Location).filter(Location.lat == key_lat, Location.lon == key_lon).first()
 
 
 def format_location(lat: float, lon: float) -> str:
@@ -18,4 +200,5 @@ def _cardinal(lat: float, lon: float) -> str:
 def reverse_geocode_optional(lat: float, lon: float) -> Optional[str]:
     if not settings.reverse_geocode_enabled:
         return None
-    return format_location(lat, lon)
+    place = reverse_geocode(lat, lon)
+    return place.label if place else None
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.geo_tile import GeoTile
+from app.models.media import Media
+
+MAX_ZOOM = 16
+MAX_LATITUDE = 85.05112878
+MAX_CLUSTERS = 5000
+
+GeoPoint = Optional[Tuple[float, float]]
+
+
+def tile_xy(lat: float, lon: float, zoom: int = MAX_ZOOM) -> Tuple[int, int]:
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    scale = 1 << zoom
+    rad = math.radians(lat)
+    x = int((lon + 180.0) / 360.0 * scale)
+    y = int((1.0 - math.log(math.tan(rad) + 1.0 / math.cos(rad)) / math.pi) / 2.0 * scale)
+    return min(max(x, 0), scale - 1), min(max(y, 0), scale - 1)
+
+
+def quadkey(x: int, y: int, zoom: int = MAX_ZOOM) -> str:
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
+
+
+def geo_point(media: Media) -> GeoPoint:
+    if media.gps_lat is None or media.gps_lon is None:
+        return None
+    return float(media.gps_lat), float(media.gps_lon)
+
+
+def _apply_tile_delta(db: Session, point: GeoPoint, delta: int) -> None:
+    if point is None:
+        return
+    lat, lon = point
+    x, y = tile_xy(lat, lon)
+    rows = [
+        {
+            "zoom": zoom,
+            "tile_x": x >> (MAX_ZOOM - zoom),
+            "tile_y": y >> (MAX_ZOOM - zoom),
+            "count": delta,
+            "lat_sum": lat * delta,
+            "lon_sum": lon * delta,
+        }
+        for zoom in range(MAX_ZOOM + 1)
+    ]
+    stmt = insert(GeoTile).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GeoTile.zoom, GeoTile.tile_x, GeoTile.tile_y],
+        set_={
+            "count": GeoTile.count + stmt.excluded.count,
+            "lat_sum": GeoTile.lat_sum + stmt.excluded.lat_sum,
+            "lon_sum": GeoTile.lon_sum + stmt.excluded.lon_sum,
+        },
+    )
+    db.execute(stmt)
+
+
+def record_geo_change(db: Session, before: GeoPoint, media: Media) -> GeoPoint:
+    after = geo_point(media)
+    if after == before and (after is None or media.geo_quadkey):
+        return after
+    if media.geo_quadkey:
+        _apply_tile_delta(db, before, -1)
+    _apply_tile_delta(db, after, 1)
+    media.geo_quadkey = quadkey(*tile_xy(*after)) if after else None
+    return after
+
+
+def remove_media_tiles(db: Session, media: Media) -> None:
+    if media.geo_quadkey:
+        _apply_tile_delta(db, geo_point(media), -1)
+
+
+def cluster_zoom(zoom: int) -> int:
+    # Roughly a 4x4 grid of clusters per 256px map tile.
+    return max(0, min(MAX_ZOOM, zoom + 2))
+
+
+def map_clusters(db: Session, west: float, south: float, east: float, north: float, zoom: int) -> Dict:
+    level = cluster_zoom(zoom)
+    shift = MAX_ZOOM - level
+    x_min, y_min = (value >> shift for value in tile_xy(north, west))
+    x_max, y_max = (value >> shift for value in tile_xy(south, east))
+
+    if west <= east:
+        x_ranges = [(x_min, x_max)]
+    else:
+        x_ranges = [(x_min, (1 << level) - 1), (0, x_max)]
+
+    rows = (
+        db.query(GeoTile)
+        .filter(
+            GeoTile.zoom == level,
+            GeoTile.tile_y.between(y_min, y_max),
+            or_(*[and_(GeoTile.tile_x >= low, GeoTile.tile_x <= high) for low, high in x_ranges]),
+            GeoTile.count > 0,
+        )
+        .limit(MAX_CLUSTERS)
+        .all()
+    )
+
+    clusters: List[Dict] = [
+        {
+            "lat": row.lat_sum / row.count,
+            "lon": row.lon_sum / row.count,
+            "count": row.count,
+            "tile": quadkey(row.tile_x, row.tile_y, level),
+        }
+        for row in rows
+    ]
+    return {"zoom": level, "total": sum(item["count"] for item in clusters), "clusters": clusters}
@@ -1,64 +1,205 @@
 import logging
 import mimetypes
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, Iterable, List, Optional
+from uuid import uuid4
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.media import Media
+from app.services import inotify
+from app.services.changes import MEDIA, record_changes
+from app.services.facets import add_media_facets
 from app.services.storage import compute_and_store_path, derive_media_type, ensure_storage_dirs
 from app.tasks.media import process_media
 
 logger = logging.getLogger(__name__)
 
+WATCH_MASK = inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO | inotify.IN_MODIFY | inotify.IN_CREATE
+TRANSIENT_SUFFIXES = (".part", ".tmp", ".crdownload", ".partial", ".download")
+
 
 def iter_import_files(import_root: Path) -> Iterable[Path]:
     if not import_root.exists():
         import_root.mkdir(parents=True, exist_ok=True)
     for path in sorted(import_root.iterdir()):
-        if path.is_file():
+        if path.is_file() and _importable(path.name):
             yield path
 
 
+def _importable(name: str) -> bool:
+    return not name.startswith(".") and not name.lower().endswith(TRANSIENT_SUFFIXES)
+
+
+def _store_file(source_path: Path) -> Optional[dict]:
+    try:
+        stat = source_path.stat()
+        sha256, size, storage_path, _existed, thumb_path = compute_and_store_path(source_path)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Could not import %s: %s", source_path, exc)
+        return None
+
+    mime_type = mimetypes.guess_type(source_path.name)[0]
+    return {
+        "id": uuid4(),
+        "sha256": sha256,
+        "original_filename": source_path.name,
+        "storage_path": storage_path,
+        "thumb_path": thumb_path,
+        "size_bytes": size,
+        "mime_type": mime_type,
+        "media_type": derive_media_type(mime_type, source_path.name),
+        "captured_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        "has_gps": False,
+        "face_count": 0,
+    }
+
+
+def import_paths(paths: List[Path], executor: Optional[ThreadPoolExecutor] = None) -> int:
+    if not paths:
+        return 0
+    ensure_storage_dirs()
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=settings.import_workers) as pool:
+            rows = list(pool.map(_store_file, paths))
+    else:
+        rows = list(executor.map(_store_file, paths))
+
+    unique: Dict[str, dict] = {}
+    for row in rows:
+        if row and row["sha256"] not in unique:
+            unique[row["sha256"]] = row
+    if not unique:
+        return 0
+
+    db = SessionLocal()
+    try:
+        stmt = insert(Media).values(list(unique.values())).on_conflict_do_nothing().returning(Media.id)
+        inserted_ids = set(db.execute(stmt).scalars())
+        for row in unique.values():
+            if row["id"] in inserted_ids:
+                add_media_facets(db, Media(**row))
+        record_changes(db, MEDIA, inserted_ids)
+        db.commit()
+    finally:
+        db.close()
+
+    for media_id in inserted_ids:
+        process_media.delay(str(media_id))
+    return len(inserted_ids)
+
+
 def scan_import_folder() -> int:
     ensure_storage_dirs()
-    import_root = Path(settings.import_root)
+    paths = list(iter_import_files(Path(settings.import_root)))
     imported = 0
+    for start in range(0, len(paths), settings.import_batch_size):
+        imported += import_paths(paths[start : start + settings.import_batch_size])
+    return imported
 
-    for source_path in iter_import_files(import_root):
-        stat = source_path.stat()
-        sha256, size, storage_path, _existed = compute_and_store_path(source_path)
-
-        mime_type = mimetypes.guess_type(source_path.name)[0]
-        media_type = derive_media_type(mime_type, source_path.name)
-        captured_at = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
-
-        db = SessionLocal()
-        try:
-            existing = db.query(Media).filter(Media.sha256 == sha256).first()
-            if existing:
-                continue
-
-            media = Media(
-                sha256=sha256,
-                original_filename=source_path.name,
-                storage_path=storage_path,
-                size_bytes=size,
-                mime_type=mime_type,
-                media_type=media_type,
-                captured_at=captured_at,
-            )
-            db.add(media)
-            db.commit()
-            db.refresh(media)
-            process_media.delay(str(media.id))
-            imported += 1
-        except IntegrityError:
-            db.rollback()
-        finally:
-            db.close()
 
-    return imported
+class _Debouncer:
+    def __init__(self, quiet_seconds: float):
+        self.quiet_seconds = quiet_seconds
+        self.pending: Dict[str, float] = {}
+        self.closed: set = set()
+
+    def touch(self, name: str, closed: bool) -> None:
+        self.pending[name] = time.monotonic()
+        if closed:
+            self.closed.add(name)
+        else:
+            self.closed.discard(name)
+
+    def next_timeout(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        oldest = min(self.pending.values())
+        return max(0.0, oldest + self.quiet_seconds - time.monotonic())
+
+    def ready(self) -> List[str]:
+        cutoff = time.monotonic() - self.quiet_seconds
+        names = [name for name, seen in self.pending.items() if seen <= cutoff and name in self.closed]
+        for name in names:
+            del self.pending[name]
+            self.closed.discard(name)
+        # Files that were modified but never closed (e.g. a crashed writer) are dropped after a long wait.
+        stale = [name for name, seen in self.pending.items() if seen <= cutoff - 300]
+        for name in stale:
+            del self.pending[name]
+            self.closed.discard(name)
+        return names
+
+
+def _import_worker(work: "queue.Queue[Optional[Path]]", stop: threading.Event) -> None:
+    with ThreadPoolExecutor(max_workers=settings.import_workers) as executor:
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + 0.2
+            while len(batch) < settings.import_batch_size:
+                try:
+                    item = work.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop.set()
+                    break
+                batch.append(item)
+            try:
+                count = import_paths(batch, executor)
+                if count:
+                    logger.info("Imported %s file(s).", count)
+            except Exception:
+                logger.exception("Import batch failed")
+            if stop.is_set():
+                return
+
+
+def watch_import_folder(stop: Optional[threading.Event] = None) -> None:
+    stop = stop or threading.Event()
+    import_root = Path(settings.import_root)
+    import_root.mkdir(parents=True, exist_ok=True)
+    work: "queue.Queue[Optional[Path]]" = queue.Queue(maxsize=settings.import_queue_size)
+    worker = threading.Thread(target=_import_worker, args=(work, stop), name="import-worker", daemon=True)
+    worker.start()
+
+    def enqueue_existing() -> None:
+        for path in iter_import_files(import_root):
+            work.put(path)
+
+    debouncer = _Debouncer(settings.import_debounce_seconds)
+    with inotify.Inotify() as watcher:
+        watcher.add_watch(str(import_root), WATCH_MASK)
+        enqueue_existing()
+        logger.info("Watching %s for new files.", import_root)
+        while not stop.is_set():
+            timeout = debouncer.next_timeout()
+            events = watcher.read(1.0 if timeout is None else min(timeout, 1.0))
+            for event in events:
+                if event.mask & inotify.IN_Q_OVERFLOW:
+                    logger.warning("Inotify queue overflowed; rescanning %s.", import_root)
+                    enqueue_existing()
+                    continue
+                if event.mask & inotify.IN_ISDIR or not event.name or not _importable(event.name):
+                    continue
+                debouncer.touch(event.name, closed=bool(event.mask & (inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO)))
+            for name in debouncer.ready():
+                path = import_root / name
+                if path.is_file():
+                    # Blocks when the queue is full, which applies back-pressure to the event loop.
+                    work.put(path)
+
+    work.put(None)
+    worker.join()
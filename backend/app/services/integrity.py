@@ -0,0 +1,260 @@
+import hashlib
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.media import Media
+from app.services.blobstore import StorageBackend, media_storage, thumb_storage
+from app.services.changes import DELETE, MEDIA, record_change
+from app.services.facets import remove_media_facets
+from app.services.geo_tiles import remove_media_tiles
+from app.services.storage import delete_thumbnail
+
+logger = logging.getLogger(__name__)
+
+SCRATCH_PREFIX = "tmp/"
+SAMPLE_LIMIT = 100
+BATCH_SIZE = 5000
+
+
+@dataclass
+class IntegrityReport:
+    rows_scanned: int = 0
+    files_scanned: int = 0
+    orphan_files: int = 0
+    orphan_thumbs: int = 0
+    missing_originals: int = 0
+    stale_parts: int = 0
+    verified: int = 0
+    corrupt: int = 0
+    removed_files: int = 0
+    removed_rows: int = 0
+    samples: dict = field(default_factory=dict)
+
+    def note(self, kind: str, value: str) -> None:
+        bucket = self.samples.setdefault(kind, [])
+        if len(bucket) < SAMPLE_LIMIT:
+            bucket.append(value)
+
+
+class RateLimiter:
+    def __init__(self, bytes_per_second: float):
+        self.rate = bytes_per_second
+        self.lock = threading.Lock()
+        self.next_free = time.monotonic()
+
+    def acquire(self, amount: int) -> None:
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_free)
+            self.next_free = start + amount / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def _collated(column):
+    return column.collate("C")
+
+
+def _iter_media_rows(db: Session) -> Iterator[Tuple[str, str, str, datetime]]:
+    last: Optional[str] = None
+    while True:
+        query = select(Media.storage_path, Media.id, Media.sha256, Media.imported_at).order_by(
+            _collated(Media.storage_path)
+        )
+        if last is not None:
+            query = query.where(_collated(Media.storage_path) > last)
+        rows = db.execute(query.limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        for storage_path, media_id, sha256, imported_at in rows:
+            yield storage_path, str(media_id), sha256, imported_at
+        last = rows[-1][0]
+
+
+def _iter_column_keys(db: Session, column) -> Iterator[str]:
+    last: Optional[str] = None
+    while True:
+        query = select(column).where(column.isnot(None)).order_by(_collated(column))
+        if last is not None:
+            query = query.where(_collated(column) > last)
+        rows = db.execute(query.limit(BATCH_SIZE)).scalars().all()
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1]
+
+
+def _iter_derived_keys(db: Session) -> Iterator[str]:
+    return heapq.merge(_iter_column_keys(db, Media.thumb_path), _iter_column_keys(db, Media.preview_path))
+
+
+def _iter_store_keys(store: StorageBackend) -> Iterator[str]:
+    for key in store.iter_keys():
+        if not key.startswith(SCRATCH_PREFIX) and not Path(key).name.startswith("."):
+            yield key
+
+
+def _merge(left: Iterator[str], right: Iterator) -> Iterator[Tuple[Optional[str], Optional[object]]]:
+    # Both inputs are sorted by byte order; yields (key, None) for left-only and (None, row) for right-only.
+    sentinel = object()
+    key = next(left, sentinel)
+    row = next(right, sentinel)
+    while key is not sentinel or row is not sentinel:
+        row_key = row[0] if isinstance(row, tuple) else row
+        if row is sentinel or (key is not sentinel and key < row_key):
+            yield key, None
+            key = next(left, sentinel)
+        elif key is sentinel or row_key < key:
+            yield None, row
+            row = next(right, sentinel)
+        else:
+            yield key, row
+            key = next(left, sentinel)
+            row = next(right, sentinel)
+
+
+def _hash_object(store: StorageBackend, key: str, limiter: RateLimiter) -> str:
+    hasher = hashlib.sha256()
+    size = store.size(key) or 0
+    for chunk in store.open_range(key, 0, size - 1) if size else ():
+        limiter.acquire(len(chunk))
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _drain(pending: Deque[Tuple[str, str, Future]], report: IntegrityReport, keep: int) -> None:
+    while len(pending) > keep:
+        storage_path, sha256, future = pending.popleft()
+        try:
+            actual = future.result()
+        except Exception as exc:
+            logger.warning("Could not hash %s: %s", storage_path, exc)
+            continue
+        report.verified += 1
+        if actual != sha256:
+            report.corrupt += 1
+            report.note("corrupt", storage_path)
+            logger.warning("Checksum mismatch for %s: expected %s, got %s", storage_path, sha256, actual)
+
+
+def _settled(store: StorageBackend, key: str, min_age_hours: float) -> bool:
+    modified = store.modified(key)
+    return modified is not None and modified < time.time() - min_age_hours * 3600
+
+
+def _remove_rows(db: Session, media_ids: List[str], report: IntegrityReport) -> None:
+    derived_paths: List[str] = []
+    for media in db.query(Media).filter(Media.id.in_(media_ids)).all():
+        remove_media_facets(db, media)
+        remove_media_tiles(db, media)
+        record_change(db, MEDIA, media.id, DELETE)
+        derived_paths.extend(path for path in (media.thumb_path, media.preview_path) if path)
+        db.delete(media)
+        report.removed_rows += 1
+    db.commit()
+    media_ids.clear()
+
+    # Thumbnails go only after the commit, so a failed commit never leaves rows pointing at deleted files.
+    for path in derived_paths:
+        delete_thumbnail(path)
+        report.removed_files += 1
+
+
+def sweep_originals(
+    db: Session,
+    report: IntegrityReport,
+    delete_orphans: bool = False,
+    delete_missing: bool = False,
+    verify: bool = False,
+    workers: int = 4,
+    bytes_per_second: float = 0,
+    min_age_hours: float = 24,
+) -> None:
+    store = media_storage()
+    limiter = RateLimiter(bytes_per_second)
+    pending: Deque[Tuple[str, str, Future]] = deque()
+    missing_ids: List[str] = []
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for key, row in _merge(_iter_store_keys(store), _iter_media_rows(db)):
+            if key is not None:
+                report.files_scanned += 1
+            if row is not None:
+                report.rows_scanned += 1
+
+            if row is None:
+                report.orphan_files += 1
+                report.note("orphan_files", key)
+                # Uploads store the file before committing the row, so only remove files that have settled.
+                if delete_orphans and _settled(store, key, min_age_hours):
+                    if not db.query(Media.id).filter(Media.storage_path == key).first():
+                        store.delete(key)
+                        report.removed_files += 1
+            elif key is None:
+                storage_path, media_id, _sha256, imported_at = row
+                report.missing_originals += 1
+                report.note("missing_originals", storage_path)
+                # The store listing and the row pages are read at different times, so an upload that landed in
+                # between looks missing; only act on settled rows whose file is still absent on a direct check.
+                if delete_missing and imported_at < cutoff and not store.exists(storage_path):
+                    missing_ids.append(media_id)
+                    if len(missing_ids) >= 500:
+                        _remove_rows(db, missing_ids, report)
+            elif verify:
+                storage_path, _media_id, sha256, _imported_at = row
+                pending.append((storage_path, sha256, executor.submit(_hash_object, store, key, limiter)))
+                _drain(pending, report, keep=workers * 2)
+        _drain(pending, report, keep=0)
+
+    if missing_ids:
+        _remove_rows(db, missing_ids, report)
+
+
+def sweep_thumbnails(
+    db: Session, report: IntegrityReport, delete_orphans: bool = False, min_age_hours: float = 24
+) -> None:
+    store = thumb_storage()
+    for key, row in _merge(_iter_store_keys(store), _iter_derived_keys(db)):
+        if row is None:
+            report.orphan_thumbs += 1
+            report.note("orphan_thumbs", key)
+            if delete_orphans and _settled(store, key, min_age_hours):
+                referenced = (
+                    db.query(Media.id).filter(or_(Media.thumb_path == key, Media.preview_path == key)).first()
+                )
+                if not referenced:
+                    store.delete(key)
+                    report.removed_files += 1
+
+
+def sweep_scratch(report: IntegrityReport, max_age_hours: float, delete: bool = False) -> None:
+    scratch = Path(settings.media_root, "tmp")
+    if not scratch.is_dir():
+        return
+    cutoff = time.time() - max_age_hours * 3600
+    for path in scratch.iterdir():
+        try:
+            if not path.is_file() or path.stat().st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        report.stale_parts += 1
+        report.note("stale_parts", path.name)
+        if delete:
+            path.unlink(missing_ok=True)
+            report.removed_files += 1
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID
 
-from sqlalchemy import or_
+from sqlalchemy import Select, bindparam, false, or_, select
 from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
 
 from app.models.face import Face
 from app.models.media import Media
@@ -11,93 +16,230 @@ from app.models.person import Person
 from app.services.search import parse_date, parse_search
 
 
-def apply_media_filters(query: Query, filters: Dict[str, Any]) -> Tuple[Query, bool]:
-    joined = False
-
-    person_ids = filters.get("person_ids") or []
-    if isinstance(person_ids, str):
-        person_ids = [pid.strip() for pid in person_ids.split(",") if pid.strip()]
-    if person_ids:
-        query = query.join(Face, Face.media_id == Media.id).filter(Face.person_id.in_(person_ids))
-        joined = True
-
-    season = filters.get("season")
-    if season:
-        query = query.filter(Media.season == str(season).lower())
-
-    media_type = filters.get("media_type")
-    if media_type:
-        query = query.filter(Media.media_type == str(media_type).lower())
-
-    camera_make = filters.get("camera_make")
-    if camera_make:
-        query = query.filter(Media.camera_make.ilike(f"%{camera_make}%"))
-
-    camera_model = filters.get("camera_model")
-    if camera_model:
-        query = query.filter(Media.camera_model.ilike(f"%{camera_model}%"))
-
-    has_faces = filters.get("has_faces")
-    if has_faces is True or str(has_faces).lower() == "true":
-        query = query.filter(Media.face_count > 0)
-    if has_faces is False or str(has_faces).lower() == "false":
-        query = query.filter(Media.face_count == 0)
-
-    date_from = filters.get("date_from")
-    if date_from:
-        parsed = parse_date(str(date_from))
-        if parsed:
-            query = query.filter(Media.captured_at >= parsed)
-
-    date_to = filters.get("date_to")
-    if date_to:
-        parsed = parse_date(str(date_to), end_of_day=True)
-        if parsed:
-            query = query.filter(Media.captured_at <= parsed)
-
-    q = filters.get("q")
-    tokens = parse_search(q)
-    if tokens.season:
-        query = query.filter(Media.season == tokens.season)
-    if tokens.media_type:
-        query = query.filter(Media.media_type == tokens.media_type)
-    if tokens.camera_text:
-        query = query.filter(
+@dataclass(frozen=True)
+class MediaFilterPlan:
+    person_ids: Tuple[UUID, ...] = ()
+    person_names: Tuple[str, ...] = ()
+    person_match: str = "any"
+    seasons: Tuple[str, ...] = ()
+    media_types: Tuple[str, ...] = ()
+    camera_makes: Tuple[str, ...] = ()
+    camera_models: Tuple[str, ...] = ()
+    camera_texts: Tuple[str, ...] = ()
+    location_texts: Tuple[str, ...] = ()
+    free_text: Tuple[str, ...] = ()
+    has_faces: Tuple[bool, ...] = ()
+    has_gps: Tuple[bool, ...] = ()
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    match_nothing: bool = False
+
+    @property
+    def shape(self) -> Tuple[Tuple[str, Any], ...]:
+        # Everything that changes the SQL text, and nothing that only changes bound values.
+        match_all = self.person_match == "all"
+        return (
+            ("person_ids", len(self.person_ids) if match_all else bool(self.person_ids)),
+            ("person_names", len(self.person_names)),
+            ("person_match", self.person_match),
+            ("seasons", len(self.seasons)),
+            ("media_types", len(self.media_types)),
+            ("camera_makes", len(self.camera_makes)),
+            ("camera_models", len(self.camera_models)),
+            ("camera_texts", len(self.camera_texts)),
+            ("location_texts", len(self.location_texts)),
+            ("free_text", len(self.free_text)),
+            ("has_faces", self.has_faces),
+            ("has_gps", self.has_gps),
+            ("date_from", self.date_from is not None),
+            ("date_to", self.date_to is not None),
+            ("match_nothing", self.match_nothing),
+        )
+
+    def bind_params(self) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if self.person_ids and self.person_match == "all":
+            for idx, value in enumerate(self.person_ids):
+                params[f"person_ids_{idx}"] = value
+        elif self.person_ids:
+            params["person_ids"] = list(self.person_ids)
+        for name in _EXACT_FIELDS:
+            for idx, value in enumerate(getattr(self, name)):
+                params[f"{name}_{idx}"] = value
+        for name in _LIKE_FIELDS:
+            for idx, value in enumerate(getattr(self, name)):
+                params[f"{name}_{idx}"] = f"%{value}%"
+        if self.date_from is not None:
+            params["date_from"] = self.date_from
+        if self.date_to is not None:
+            params["date_to"] = self.date_to
+        return params
+
+    def is_empty(self) -> bool:
+        return self == _EMPTY_PLAN
+
+
+_EXACT_FIELDS = ("seasons", "media_types")
+_LIKE_FIELDS = ("person_names", "camera_makes", "camera_models", "camera_texts", "location_texts", "free_text")
+_EMPTY_PLAN = MediaFilterPlan()
+
+
+def _unique(values: Iterable[Any], casefold: bool = False) -> Tuple[Any, ...]:
+    seen: Dict[Any, Any] = {}
+    for value in values:
+        if value is None or value == "":
+            continue
+        if casefold:
+            value = str(value).strip().lower()
+            if not value:
+                continue
+        seen.setdefault(value, value)
+    return tuple(seen)
+
+
+def _coerce_bool(value: Any) -> Optional[bool]:
+    if value is True or value is False:
+        return value
+    text = str(value).strip().lower()
+    if text == "true":
+        return True
+    if text == "false":
+        return False
+    return None
+
+
+def _parse_person_ids(value: Any, match_all: bool) -> Tuple[Tuple[UUID, ...], bool]:
+    if isinstance(value, str):
+        value = value.split(",")
+    raw = [str(pid).strip() for pid in value or [] if str(pid).strip()]
+    parsed = []
+    for pid in raw:
+        try:
+            parsed.append(UUID(pid))
+        except ValueError:
+            continue
+    # Unknown ids must narrow the result, never silently widen it to everything.
+    if match_all:
+        return tuple(sorted(set(parsed))), len(parsed) < len(raw)
+    return tuple(sorted(set(parsed))), bool(raw) and not parsed
+
+
+def plan_media_filters(filters: Dict[str, Any]) -> MediaFilterPlan:
+    tokens = parse_search(filters.get("q"))
+    person_match = str(filters.get("person_match") or tokens.person_match or "any").lower()
+    if person_match not in ("any", "all"):
+        person_match = "any"
+    person_ids, bad_ids = _parse_person_ids(filters.get("person_ids"), person_match == "all")
+
+    date_froms = [tokens.date_from]
+    if filters.get("date_from"):
+        date_froms.append(parse_date(str(filters["date_from"])))
+    date_tos = [tokens.date_to]
+    if filters.get("date_to"):
+        date_tos.append(parse_date(str(filters["date_to"]), end_of_day=True))
+    date_froms = [value for value in date_froms if value is not None]
+    date_tos = [value for value in date_tos if value is not None]
+
+    return MediaFilterPlan(
+        person_ids=person_ids,
+        person_names=_unique(tokens.person_names, casefold=True),
+        person_match=person_match if (person_ids or tokens.person_names) else "any",
+        seasons=_unique([filters.get("season"), tokens.season], casefold=True),
+        media_types=_unique([filters.get("media_type"), tokens.media_type], casefold=True),
+        camera_makes=_unique([filters.get("camera_make")], casefold=True),
+        camera_models=_unique([filters.get("camera_model")], casefold=True),
+        camera_texts=_unique([tokens.camera_text], casefold=True),
+        location_texts=_unique([tokens.location_text], casefold=True),
+        free_text=_unique(tokens.free_text, casefold=True),
+        has_faces=_unique([_coerce_bool(filters.get("has_faces")), tokens.has_faces]),
+        has_gps=_unique([tokens.has_gps]),
+        date_from=max(date_froms) if date_froms else None,
+        date_to=min(date_tos) if date_tos else None,
+        match_nothing=bad_ids,
+    )
+
+
+def _face_exists(criterion: ColumnElement) -> ColumnElement:
+    return select(Face.id).where(Face.media_id == Media.id, criterion).exists()
+
+
+def _named_face_exists(criterion: ColumnElement) -> ColumnElement:
+    return select(Face.id).join(Person, Person.id == Face.person_id).where(Face.media_id == Media.id, criterion).exists()
+
+
+@lru_cache(maxsize=256)
+def compile_media_conditions(shape: Tuple[Tuple[str, Any], ...]) -> Tuple[ColumnElement, ...]:
+    spec = dict(shape)
+    conditions: list[ColumnElement] = []
+
+    if spec["match_nothing"]:
+        conditions.append(false())
+
+    for idx in range(spec["seasons"]):
+        conditions.append(Media.season == bindparam(f"seasons_{idx}"))
+    for idx in range(spec["media_types"]):
+        conditions.append(Media.media_type == bindparam(f"media_types_{idx}"))
+    for idx in range(spec["camera_makes"]):
+        conditions.append(Media.camera_make.ilike(bindparam(f"camera_makes_{idx}")))
+    for idx in range(spec["camera_models"]):
+        conditions.append(Media.camera_model.ilike(bindparam(f"camera_models_{idx}")))
+    for idx in range(spec["camera_texts"]):
+        term = bindparam(f"camera_texts_{idx}")
+        conditions.append(or_(Media.camera_make.ilike(term), Media.camera_model.ilike(term)))
+
+    for value in spec["has_faces"]:
+        conditions.append(Media.face_count > 0 if value else Media.face_count == 0)
+    for value in spec["has_gps"]:
+        conditions.append(Media.has_gps.is_(value))
+
+    if spec["date_from"]:
+        conditions.append(Media.captured_at >= bindparam("date_from"))
+    if spec["date_to"]:
+        conditions.append(Media.captured_at <= bindparam("date_to"))
+
+    for idx in range(spec["location_texts"]):
+        conditions.append(Media.location_text.ilike(bindparam(f"location_texts_{idx}")))
+    for idx in range(spec["free_text"]):
+        term = bindparam(f"free_text_{idx}")
+        conditions.append(
             or_(
-                Media.camera_make.ilike(f"%{tokens.camera_text}%"),
-                Media.camera_model.ilike(f"%{tokens.camera_text}%"),
+                Media.location_text.ilike(term),
+                Media.camera_make.ilike(term),
+                Media.camera_model.ilike(term),
+                Media.original_filename.ilike(term),
             )
         )
-    if tokens.has_faces is True:
-        query = query.filter(Media.face_count > 0)
-    if tokens.has_faces is False:
-        query = query.filter(Media.face_count == 0)
-    if tokens.has_gps is True:
-        query = query.filter(Media.has_gps.is_(True))
-    if tokens.has_gps is False:
-        query = query.filter(Media.has_gps.is_(False))
-    if tokens.date_from:
-        query = query.filter(Media.captured_at >= tokens.date_from)
-    if tokens.date_to:
-        query = query.filter(Media.captured_at <= tokens.date_to)
-    if tokens.location_text:
-        query = query.filter(Media.location_text.ilike(f"%{tokens.location_text}%"))
-    if tokens.free_text:
-        for term in tokens.free_text:
-            query = query.filter(
-                or_(
-                    Media.location_text.ilike(f"%{term}%"),
-                    Media.camera_make.ilike(f"%{term}%"),
-                    Media.camera_model.ilike(f"%{term}%"),
-                    Media.original_filename.ilike(f"%{term}%"),
+
+    # Person filters are correlated EXISTS semijoins so the outer query never needs DISTINCT.
+    # "any" collapses into one probe; "all" needs one probe per person.
+    if spec["person_match"] == "all":
+        for idx in range(spec["person_ids"]):
+            conditions.append(_face_exists(Face.person_id == bindparam(f"person_ids_{idx}")))
+        for idx in range(spec["person_names"]):
+            conditions.append(_named_face_exists(Person.name.ilike(bindparam(f"person_names_{idx}"))))
+    else:
+        if spec["person_ids"]:
+            conditions.append(_face_exists(Face.person_id.in_(bindparam("person_ids", expanding=True))))
+        if spec["person_names"]:
+            conditions.append(
+                _named_face_exists(
+                    or_(*[Person.name.ilike(bindparam(f"person_names_{idx}")) for idx in range(spec["person_names"])])
                 )
             )
-    if tokens.person_names:
-        query = (
-            query.join(Face, Face.media_id == Media.id)
-            .join(Person, Person.id == Face.person_id)
-            .filter(or_(*[Person.name.ilike(f"%{name}%") for name in tokens.person_names]))
-        )
-        joined = True
 
-    return query, joined
+    return tuple(conditions)
+
+
+def apply_media_filters(query: Query, filters: Dict[str, Any]) -> Query:
+    plan = plan_media_filters(filters)
+    if plan.is_empty():
+        return query
+    conditions = compile_media_conditions(plan.shape)
+    return query.filter(*conditions).params(**plan.bind_params())
+
+
+def filter_media_select(stmt: Select, filters: Dict[str, Any]) -> Tuple[Select, Dict[str, Any]]:
+    plan = plan_media_filters(filters)
+    if plan.is_empty():
+        return stmt, {}
+    return stmt.where(*compile_media_conditions(plan.shape)), plan.bind_params()
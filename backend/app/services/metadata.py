@@ -0,0 +1,618 @@
+from __future__ import annotations
+
+import io
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+MAX_SEGMENT_BYTES = 256 * 1024
+MAX_IFD_ENTRIES = 1024
+MAX_PREVIEW_BYTES = 8 * 1024 * 1024
+MAX_PREVIEW_IFDS = 16
+QT_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+IFD0_TAGS = {
+    0x0100: "ImageWidth",
+    0x0101: "ImageLength",
+    0x010F: "Make",
+    0x0110: "Model",
+    0x0112: "Orientation",
+    0x0131: "Software",
+    0x0132: "DateTime",
+}
+EXIF_TAGS = {
+    0x829A: "ExposureTime",
+    0x829D: "FNumber",
+    0x8827: "ISOSpeedRatings",
+    0x9003: "DateTimeOriginal",
+    0x9004: "DateTimeDigitized",
+    0x9010: "OffsetTime",
+    0x9011: "OffsetTimeOriginal",
+    0x920A: "FocalLength",
+    0xA002: "ExifImageWidth",
+    0xA003: "ExifImageHeight",
+    0xA405: "FocalLengthIn35mmFilm",
+    0xA433: "LensMake",
+    0xA434: "LensModel",
+}
+GPS_TAGS = {
+    0x0001: "GPSLatitudeRef",
+    0x0002: "GPSLatitude",
+    0x0003: "GPSLongitudeRef",
+    0x0004: "GPSLongitude",
+    0x0005: "GPSAltitudeRef",
+    0x0006: "GPSAltitude",
+}
+PREVIEW_TAGS = {
+    0x0103: "Compression",
+    0x0111: "StripOffsets",
+    0x0112: "Orientation",
+    0x0117: "StripByteCounts",
+    0x014A: "SubIFDs",
+    0x0201: "JPEGInterchangeFormat",
+    0x0202: "JPEGInterchangeFormatLength",
+}
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+# Plain TIFF, then the variants used by Olympus ORF and Panasonic RW2.
+TIFF_MAGIC = (42, 0x4F52, 0x5352, 0x55)
+TIFF_HEADERS = (b"II*\x00", b"MM\x00*", b"IIRO", b"IIRS", b"IIU\x00")
+RAF_HEADER = b"FUJIFILMCCD-RAW "
+JPEG_COMPRESSION = (6, 7)
+DECODABLE_SOF = (0xC0, 0xC1, 0xC2)
+
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4}
+IMAGE_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"mif1", b"msf1", b"avif", b"avis"}
+ISO6709_RE = re.compile(rb"([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)?")
+
+
+class _Source:
+    def __init__(self, fh: BinaryIO, base: int = 0, data: Optional[bytes] = None):
+        self.fh = fh
+        self.base = base
+        self.data = data
+
+    def read(self, offset: int, length: int) -> bytes:
+        if length < 0 or length > MAX_SEGMENT_BYTES:
+            raise ValueError("segment too large")
+        return self.read_blob(offset, length)
+
+    def read_blob(self, offset: int, length: int) -> bytes:
+        if self.data is not None:
+            return self.data[offset : offset + length]
+        self.fh.seek(self.base + offset)
+        return self.fh.read(length)
+
+
+def _decode_value(raw: bytes, value_type: int, count: int, order: str) -> Any:
+    if value_type == 2:
+        return raw.split(b"\x00", 1)[0].decode("utf-8", errors="ignore").strip()
+    if value_type == 7:
+        return raw
+    if value_type in (1, 6):
+        values = list(raw[:count])
+        return values[0] if count == 1 else values
+    fmt = {3: "H", 4: "I", 8: "h", 9: "i", 11: "f", 12: "d", 13: "I"}.get(value_type)
+    if fmt:
+        values = list(struct.unpack(f"{order}{count}{fmt}", raw[: count * TYPE_SIZES[value_type]]))
+    elif value_type in (5, 10):
+        pairs = struct.unpack(f"{order}{count * 2}{'I' if value_type == 5 else 'i'}", raw[: count * 8])
+        values = [pairs[i] / pairs[i + 1] if pairs[i + 1] else 0.0 for i in range(0, len(pairs), 2)]
+    else:
+        return None
+    return values[0] if count == 1 else values
+
+
+def _read_ifd(source: _Source, offset: int, order: str, wanted: Dict[int, str]) -> Tuple[Dict[int, Any], int]:
+    header = source.read(offset, 2)
+    if len(header) < 2:
+        return {}, 0
+    (count,) = struct.unpack(f"{order}H", header)
+    if count > MAX_IFD_ENTRIES:
+        return {}, 0
+    block = source.read(offset + 2, count * 12 + 4)
+    values: Dict[int, Any] = {}
+    for idx in range(count):
+        entry = block[idx * 12 : idx * 12 + 12]
+        if len(entry) < 12:
+            break
+        tag, value_type, value_count = struct.unpack(f"{order}HHI", entry[:8])
+        if tag not in wanted or value_type not in TYPE_SIZES:
+            continue
+        size = TYPE_SIZES[value_type] * value_count
+        if size <= 4:
+            raw = entry[8 : 8 + size]
+        else:
+            (value_offset,) = struct.unpack(f"{order}I", entry[8:12])
+            raw = source.read(value_offset, size)
+        if len(raw) < size:
+            continue
+        values[tag] = _decode_value(raw, value_type, value_count, order)
+    next_ifd = 0
+    tail = block[count * 12 : count * 12 + 4]
+    if len(tail) == 4:
+        (next_ifd,) = struct.unpack(f"{order}I", tail)
+    return values, next_ifd
+
+
+def _parse_tiff(source: _Source) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    header = source.read(0, 8)
+    if header[:2] == b"II":
+        order = "<"
+    elif header[:2] == b"MM":
+        order = ">"
+    else:
+        return {}, {}
+    magic, ifd0_offset = struct.unpack(f"{order}HI", header[2:8])
+    if magic not in TIFF_MAGIC:
+        return {}, {}
+
+    wanted_ifd0 = dict(IFD0_TAGS)
+    wanted_ifd0[EXIF_IFD_POINTER] = "ExifOffset"
+    wanted_ifd0[GPS_IFD_POINTER] = "GPSInfo"
+    ifd0, _next = _read_ifd(source, ifd0_offset, order, wanted_ifd0)
+    exif: Dict[int, Any] = {}
+    gps: Dict[int, Any] = {}
+    if isinstance(ifd0.get(EXIF_IFD_POINTER), int):
+        exif, _ = _read_ifd(source, ifd0[EXIF_IFD_POINTER], order, EXIF_TAGS)
+    if isinstance(ifd0.get(GPS_IFD_POINTER), int):
+        gps, _ = _read_ifd(source, ifd0[GPS_IFD_POINTER], order, GPS_TAGS)
+
+    raw: Dict[str, Any] = {}
+    for tags, values in ((IFD0_TAGS, ifd0), (EXIF_TAGS, exif), (GPS_TAGS, gps)):
+        for tag, name in tags.items():
+            if tag in values and not isinstance(values[tag], bytes):
+                raw[name] = values[tag]
+
+    parsed: Dict[str, Any] = {}
+    captured_at = _parse_exif_datetime(raw.get("DateTimeOriginal") or raw.get("DateTime"))
+    if captured_at:
+        parsed["captured_at"] = captured_at
+    for key, name in (("camera_make", "Make"), ("camera_model", "Model")):
+        if raw.get(name):
+            parsed[key] = raw[name]
+    if isinstance(raw.get("Orientation"), int):
+        parsed["orientation"] = raw["Orientation"]
+    width = raw.get("ExifImageWidth") or raw.get("ImageWidth")
+    height = raw.get("ExifImageHeight") or raw.get("ImageLength")
+    if isinstance(width, int) and isinstance(height, int) and width and height:
+        parsed["width"], parsed["height"] = width, height
+
+    lat = _dms(raw.get("GPSLatitude"), raw.get("GPSLatitudeRef", "N"))
+    lon = _dms(raw.get("GPSLongitude"), raw.get("GPSLongitudeRef", "E"))
+    if lat is not None and lon is not None:
+        parsed["gps_lat"], parsed["gps_lon"], parsed["has_gps"] = lat, lon, True
+    altitude = raw.get("GPSAltitude")
+    if isinstance(altitude, float):
+        ref = raw.get("GPSAltitudeRef")
+        parsed["gps_altitude"] = -altitude if ref in (1, [1]) else altitude
+    return raw, parsed
+
+
+def _dms(value: Any, ref: Any) -> Optional[float]:
+    if not isinstance(value, list) or len(value) < 3:
+        return None
+    decimal = value[0] + value[1] / 60.0 + value[2] / 3600.0
+    if ref in ("S", "W"):
+        decimal = -decimal
+    return decimal
+
+
+def _parse_exif_datetime(value: Any) -> Optional[datetime]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value[:19], "%Y:%m:%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _read_jpeg(fh: BinaryIO) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    raw: Dict[str, Any] = {}
+    parsed: Dict[str, Any] = {}
+    offset = 2
+    dimensions = None
+    while True:
+        fh.seek(offset)
+        header = fh.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            break
+        marker = header[1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            break
+        (length,) = struct.unpack(">H", header[2:4])
+        if marker == 0xE1 and not raw:
+            segment = fh.read(min(length - 2, MAX_SEGMENT_BYTES))
+            if segment.startswith(b"Exif\x00\x00"):
+                raw, parsed = _parse_tiff(_Source(fh, data=segment[6:]))
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            sof = fh.read(5)
+            if len(sof) == 5:
+                height, width = struct.unpack(">HH", sof[1:5])
+                dimensions = (width, height)
+            break
+        offset += 2 + length
+
+    if dimensions and all(dimensions):
+        parsed["width"], parsed["height"] = dimensions
+    return raw, parsed
+
+
+def _read_png(fh: BinaryIO) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    raw: Dict[str, Any] = {}
+    parsed: Dict[str, Any] = {}
+    offset = 8
+    while True:
+        fh.seek(offset)
+        header = fh.read(8)
+        if len(header) < 8:
+            break
+        length, chunk = struct.unpack(">I4s", header)
+        if chunk == b"IHDR":
+            width, height = struct.unpack(">II", fh.read(8))
+            parsed["width"], parsed["height"] = width, height
+        elif chunk == b"eXIf" and length <= MAX_SEGMENT_BYTES:
+            data = fh.read(length)
+            raw, exif_parsed = _parse_tiff(_Source(fh, data=data))
+            exif_parsed.pop("width", None)
+            exif_parsed.pop("height", None)
+            parsed.update(exif_parsed)
+        elif chunk in (b"IDAT", b"IEND"):
+            break
+        offset += 12 + length
+    return raw, parsed
+
+
+def _iter_boxes(fh: BinaryIO, start: int, end: Optional[int]) -> Iterator[Tuple[bytes, int, int]]:
+    offset = start
+    while end is None or offset + 8 <= end:
+        fh.seek(offset)
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            large = fh.read(8)
+            if len(large) < 8:
+                return
+            (size,) = struct.unpack(">Q", large)
+            header_size = 16
+        elif size == 0:
+            fh.seek(0, 2)
+            size = fh.tell() - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _find_box(fh: BinaryIO, start: int, end: Optional[int], box_type: bytes) -> Optional[Tuple[int, int]]:
+    for found, body_start, body_end in _iter_boxes(fh, start, end):
+        if found == box_type:
+            return body_start, body_end
+    return None
+
+
+def _read_uint(data: bytes, offset: int, size: int) -> int:
+    if size == 0:
+        return 0
+    return int.from_bytes(data[offset : offset + size], "big")
+
+
+def _read_heif(fh: BinaryIO, meta: Tuple[int, int]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    body_start, body_end = meta[0] + 4, meta[1]
+    exif_item = None
+    iinf = _find_box(fh, body_start, body_end, b"iinf")
+    if iinf:
+        fh.seek(iinf[0])
+        version = fh.read(1)[0]
+        entries_start = iinf[0] + 4 + (2 if version == 0 else 4)
+        for box_type, infe_start, infe_end in _iter_boxes(fh, entries_start, iinf[1]):
+            if box_type != b"infe":
+                continue
+            fh.seek(infe_start)
+            data = fh.read(min(infe_end - infe_start, 64))
+            infe_version = data[0]
+            if infe_version < 2:
+                continue
+            id_size = 2 if infe_version == 2 else 4
+            item_id = _read_uint(data, 4, id_size)
+            item_type = data[4 + id_size + 2 : 4 + id_size + 6]
+            if item_type == b"Exif":
+                exif_item = item_id
+                break
+
+    raw: Dict[str, Any] = {}
+    parsed: Dict[str, Any] = {}
+    iloc = _find_box(fh, body_start, body_end, b"iloc")
+    if exif_item is not None and iloc:
+        location = _iloc_extent(fh, iloc, exif_item)
+        if location:
+            fh.seek(location[0])
+            prefix = fh.read(4)
+            if len(prefix) == 4:
+                (tiff_offset,) = struct.unpack(">I", prefix)
+                tiff_start = location[0] + 4 + tiff_offset
+                fh.seek(tiff_start)
+                if fh.read(6) == b"Exif\x00\x00":
+                    tiff_start += 6
+                raw, parsed = _parse_tiff(_Source(fh, base=tiff_start))
+
+    iprp = _find_box(fh, body_start, body_end, b"iprp")
+    ipco = _find_box(fh, iprp[0], iprp[1], b"ipco") if iprp else None
+    if ipco:
+        best = (0, 0)
+        for box_type, ispe_start, _ispe_end in _iter_boxes(fh, ipco[0], ipco[1]):
+            if box_type == b"ispe":
+                fh.seek(ispe_start + 4)
+                width, height = struct.unpack(">II", fh.read(8))
+                if width * height > best[0] * best[1]:
+                    best = (width, height)
+        if all(best):
+            parsed["width"], parsed["height"] = best
+    return raw, parsed
+
+
+def _iloc_extent(fh: BinaryIO, iloc: Tuple[int, int], item_id: int) -> Optional[Tuple[int, int]]:
+    fh.seek(iloc[0])
+    data = fh.read(min(iloc[1] - iloc[0], MAX_SEGMENT_BYTES))
+    version = data[0]
+    offset_size, length_size = data[4] >> 4, data[4] & 0x0F
+    base_offset_size = data[5] >> 4
+    index_size = data[5] & 0x0F if version in (1, 2) else 0
+    pos = 6
+    id_size = 4 if version == 2 else 2
+    item_count = _read_uint(data, pos, id_size)
+    pos += id_size
+    for _ in range(item_count):
+        current_id = _read_uint(data, pos, id_size)
+        pos += id_size
+        construction_method = 0
+        if version in (1, 2):
+            construction_method = _read_uint(data, pos, 2) & 0x0F
+            pos += 2
+        pos += 2
+        base_offset = _read_uint(data, pos, base_offset_size)
+        pos += base_offset_size
+        extent_count = _read_uint(data, pos, 2)
+        pos += 2
+        first = None
+        for _extent in range(extent_count):
+            pos += index_size
+            extent_offset = _read_uint(data, pos, offset_size)
+            pos += offset_size
+            extent_length = _read_uint(data, pos, length_size)
+            pos += length_size
+            if first is None:
+                first = (base_offset + extent_offset, extent_length)
+        if current_id == item_id:
+            return first if construction_method == 0 else None
+    return None
+
+
+def _read_quicktime(fh: BinaryIO, moov: Tuple[int, int]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    raw: Dict[str, Any] = {}
+    parsed: Dict[str, Any] = {}
+    for box_type, start, end in _iter_boxes(fh, moov[0], moov[1]):
+        if box_type == b"mvhd":
+            fh.seek(start)
+            data = fh.read(32)
+            if data[0] == 1:
+                created, _modified, timescale, duration = struct.unpack(">QQIQ", data[4:32])
+            else:
+                created, _modified, timescale, duration = struct.unpack(">IIII", data[4:20])
+            if timescale:
+                parsed["duration_seconds"] = duration / timescale
+            if created:
+                parsed["captured_at"] = QT_EPOCH + timedelta(seconds=created)
+        elif box_type == b"trak" and "width" not in parsed:
+            tkhd = _find_box(fh, start, end, b"tkhd")
+            if tkhd:
+                fh.seek(tkhd[0])
+                data = fh.read(96)
+                tail = 76 if data[0] == 0 else 88
+                if len(data) >= tail + 8:
+                    matrix = struct.unpack(">9i", data[tail - 36 : tail])
+                    width, height = (value >> 16 for value in struct.unpack(">II", data[tail : tail + 8]))
+                    if matrix[0] == 0 and matrix[1] != 0:
+                        width, height = height, width
+                    if width and height:
+                        parsed["width"], parsed["height"] = width, height
+        elif box_type == b"udta":
+            xyz = _find_box(fh, start, end, b"\xa9xyz")
+            if xyz:
+                fh.seek(xyz[0])
+                match = ISO6709_RE.search(fh.read(min(xyz[1] - xyz[0], 64)))
+                if match:
+                    parsed["gps_lat"], parsed["gps_lon"] = float(match.group(1)), float(match.group(2))
+                    parsed["has_gps"] = True
+                    if match.group(3):
+                        parsed["gps_altitude"] = float(match.group(3))
+    for key in ("captured_at", "duration_seconds", "width", "height"):
+        if key in parsed:
+            raw[key] = parsed[key].isoformat() if isinstance(parsed[key], datetime) else parsed[key]
+    return raw, parsed
+
+
+def _read_bmff(fh: BinaryIO) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    boxes = {}
+    brands = set()
+    for box_type, start, end in _iter_boxes(fh, 0, None):
+        if box_type == b"ftyp":
+            fh.seek(start)
+            data = fh.read(min(end - start, 256))
+            brands = {data[0:4]} | {data[i : i + 4] for i in range(8, len(data) - 3, 4)}
+        elif box_type in (b"meta", b"moov"):
+            boxes[box_type] = (start, end)
+        if b"moov" in boxes:
+            break
+    if b"moov" in boxes:
+        return _read_quicktime(fh, boxes[b"moov"])
+    if b"meta" in boxes and brands & IMAGE_BRANDS:
+        return _read_heif(fh, boxes[b"meta"])
+    return None
+
+
+def _jpeg_decodable(data: bytes) -> bool:
+    # Raw sensor data in DNG/CR2 is often lossless JPEG (SOF3), which Pillow cannot decode.
+    if data[:2] != b"\xff\xd8":
+        return False
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return False
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return marker in DECODABLE_SOF
+        if marker in (0xD9, 0xDA):
+            return False
+        (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        offset += 2 + length
+    return False
+
+
+def _scalar(value: Any) -> Optional[int]:
+    if isinstance(value, list):
+        return value[0] if len(value) == 1 else None
+    return value if isinstance(value, int) else None
+
+
+def _preview_candidates(source: _Source, order: str, ifd0_offset: int) -> Tuple[List[Tuple[int, int]], int]:
+    candidates: List[Tuple[int, int]] = []
+    orientation = 1
+    pending = [ifd0_offset]
+    seen = set()
+    while pending and len(seen) < MAX_PREVIEW_IFDS:
+        offset = pending.pop(0)
+        if not offset or offset in seen:
+            continue
+        seen.add(offset)
+        values, next_ifd = _read_ifd(source, offset, order, PREVIEW_TAGS)
+        if offset == ifd0_offset and isinstance(values.get(0x0112), int):
+            orientation = values[0x0112]
+        start, length = _scalar(values.get(0x0201)), _scalar(values.get(0x0202))
+        if start is None and values.get(0x0103) in JPEG_COMPRESSION:
+            start, length = _scalar(values.get(0x0111)), _scalar(values.get(0x0117))
+        if start and length and length <= MAX_PREVIEW_BYTES:
+            candidates.append((start, length))
+        sub_ifds = values.get(0x014A)
+        pending.extend(sub_ifds if isinstance(sub_ifds, list) else [sub_ifds])
+        pending.append(next_ifd)
+    return candidates, orientation
+
+
+def _tiff_preview(source: _Source) -> Optional[Tuple[bytes, int]]:
+    header = source.read(0, 8)
+    order = {b"II": "<", b"MM": ">"}.get(header[:2])
+    if order is None or len(header) < 8:
+        return None
+    magic, ifd0_offset = struct.unpack(f"{order}HI", header[2:8])
+    if magic not in TIFF_MAGIC:
+        return None
+    candidates, orientation = _preview_candidates(source, order, ifd0_offset)
+    for start, length in sorted(candidates, key=lambda candidate: candidate[1], reverse=True):
+        data = source.read_blob(start, length)
+        if len(data) == length and _jpeg_decodable(data):
+            return data, orientation
+    return None
+
+
+def _raf_jpeg(fh: BinaryIO) -> Optional[Tuple[int, int]]:
+    # Fujifilm RAF starts with a fixed header that points at a full-size JPEG carrying the EXIF block.
+    fh.seek(84)
+    header = fh.read(8)
+    if len(header) < 8:
+        return None
+    offset, length = struct.unpack(">II", header)
+    return (offset, length) if offset and length else None
+
+
+def _raf_preview(fh: BinaryIO) -> Optional[Tuple[bytes, int]]:
+    location = _raf_jpeg(fh)
+    if location is None or location[1] > MAX_PREVIEW_BYTES:
+        return None
+    fh.seek(location[0])
+    data = fh.read(location[1])
+    if len(data) < location[1] or not _jpeg_decodable(data):
+        return None
+    _raw, parsed = _read_jpeg(io.BytesIO(data))
+    return data, parsed.get("orientation", 1)
+
+
+def _read_raf(fh: BinaryIO) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    location = _raf_jpeg(fh)
+    if location is None:
+        return None
+    fh.seek(location[0])
+    raw, parsed = _read_jpeg(io.BytesIO(fh.read(min(location[1], MAX_SEGMENT_BYTES))))
+    # The SOF belongs to the embedded preview, not the sensor image.
+    parsed.pop("width", None)
+    parsed.pop("height", None)
+    return raw, parsed
+
+
+def read_embedded_preview(path: str) -> Optional[Tuple[bytes, int]]:
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(16)
+            if head[:2] == b"\xff\xd8":
+                offset = 2
+                while True:
+                    fh.seek(offset)
+                    header = fh.read(4)
+                    if len(header) < 4 or header[0] != 0xFF or header[1] in (0xD9, 0xDA):
+                        return None
+                    if header[1] == 0xFF:
+                        offset += 1
+                        continue
+                    if header[1] in (0xD8, 0x01) or 0xD0 <= header[1] <= 0xD7:
+                        offset += 2
+                        continue
+                    (length,) = struct.unpack(">H", header[2:4])
+                    if header[1] == 0xE1:
+                        segment = fh.read(length - 2)
+                        if segment.startswith(b"Exif\x00\x00"):
+                            return _tiff_preview(_Source(fh, data=segment[6:]))
+                    elif 0xC0 <= header[1] <= 0xCF:
+                        return None
+                    offset += 2 + length
+            if head[:2] in (b"II", b"MM"):
+                return _tiff_preview(_Source(fh))
+            if head == RAF_HEADER:
+                return _raf_preview(fh)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    return None
+
+
+def read_metadata(path: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(16)
+            if head[:2] == b"\xff\xd8":
+                return _read_jpeg(fh)
+            if head[:4] in TIFF_HEADERS:
+                return _parse_tiff(_Source(fh))
+            if head == RAF_HEADER:
+                return _read_raf(fh)
+            if head[:8] == b"\x89PNG\r\n\x1a\n":
+                return _read_png(fh)
+            if head[4:8] in (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"):
+                return _read_bmff(fh)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    return None
@@ -1,35 +1,124 @@
-from typing import Optional
+from typing import List, Sequence, Set
 from uuid import UUID
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models.face import Face
 from app.models.person import Person
+from app.services.changes import CURRENT_TXID, PERSON, record_change, record_changes
+from app.services.embedding_snapshot import shared_snapshot
+from app.services.face_ai import FaceResult
+
+
+def _create_person(db: Session) -> UUID:
+    person = Person(name=None, is_named=False)
+    db.add(person)
+    db.flush()
+    record_change(db, PERSON, person.id)
+    return person.id
 
 
 def match_or_create_person(db: Session, embedding: list[float]) -> UUID:
     if not embedding:
-        person = Person(name=None, is_named=False)
-        db.add(person)
-        db.flush()
-        return person.id
+        return _create_person(db)
 
     distance = Face.embedding.cosine_distance(embedding).label("distance")
-    candidate = (
-        db.query(Face, distance)
-        .filter(Face.person_id.isnot(None))
-        .order_by(distance.asc())
-        .limit(1)
-        .first()
-    )
+    query = db.query(Face, distance).filter(Face.person_id.isnot(None))
+    snapshot = shared_snapshot()
+    if snapshot is not None:
+        # The mapped snapshot shortlists exported faces; faces embedded since its cursor are scanned directly, and
+        # Postgres re-ranks both with exact distances so deleted or reassigned faces drop out.
+        nearest = snapshot.nearest(embedding, settings.embedding_snapshot_shortlist)
+        shortlist = [face_id for face_id, _distance in nearest]
+        query = query.filter(or_(Face.id.in_(shortlist), Face.embedding_txid > snapshot.meta.txid))
+    candidate = query.order_by(distance.asc()).limit(1).first()
 
     if candidate:
         face, best_distance = candidate
         if best_distance is not None and float(best_distance) <= settings.face_match_threshold:
             return face.person_id
 
-    person = Person(name=None, is_named=False)
-    db.add(person)
+    return _create_person(db)
+
+
+def _iou(a: Sequence[float], b: Sequence[float]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    width = min(ax + aw, bx + bw) - max(ax, bx)
+    height = min(ay + ah, by + bh) - max(ay, by)
+    if width <= 0 or height <= 0:
+        return 0.0
+    overlap = width * height
+    return overlap / (aw * ah + bw * bh - overlap)
+
+
+def _moved(face: Face, detection: FaceResult) -> bool:
+    current = (face.bbox_x, face.bbox_y, face.bbox_w, face.bbox_h)
+    return (
+        any(abs(old - new) > 0.5 for old, new in zip(current, detection.bbox))
+        or abs(face.confidence - detection.confidence) > 1e-3
+    )
+
+
+def sync_media_faces(db: Session, media_id: UUID, detections: List[FaceResult]) -> int:
+    existing = db.query(Face).filter(Face.media_id == media_id).all()
+    pairs = sorted(
+        (
+            (_iou((face.bbox_x, face.bbox_y, face.bbox_w, face.bbox_h), detection.bbox), face_idx, det_idx)
+            for face_idx, face in enumerate(existing)
+            for det_idx, detection in enumerate(detections)
+        ),
+        reverse=True,
+    )
+    matched_faces: dict[int, int] = {}
+    matched_detections: set[int] = set()
+    for iou, face_idx, det_idx in pairs:
+        if iou < settings.face_reuse_iou:
+            break
+        if face_idx in matched_faces or det_idx in matched_detections:
+            continue
+        matched_faces[face_idx] = det_idx
+        matched_detections.add(det_idx)
+
+    # People whose face_count moves are re-sent to /sync clients.
+    touched: Set[UUID] = set()
+    for face_idx, face in enumerate(existing):
+        if face_idx not in matched_faces:
+            if face.person_id is not None:
+                touched.add(face.person_id)
+            db.delete(face)
+            continue
+        detection = detections[matched_faces[face_idx]]
+        # Rows that did not move are left alone so reprocessing does not rewrite them or their index entries.
+        if _moved(face, detection):
+            face.bbox_x, face.bbox_y, face.bbox_w, face.bbox_h = detection.bbox
+            face.confidence = detection.confidence
+            face.embedding = detection.embedding
+            face.embedding_txid = CURRENT_TXID
+        # Person assignments, including manual merges, stay with the face.
+        if face.person_id is None:
+            face.person_id = match_or_create_person(db, detection.embedding)
+            touched.add(face.person_id)
     db.flush()
-    return person.id
+
+    for det_idx, detection in enumerate(detections):
+        if det_idx in matched_detections:
+            continue
+        person_id = match_or_create_person(db, detection.embedding)
+        touched.add(person_id)
+        db.add(
+            Face(
+                media_id=media_id,
+                person_id=person_id,
+                bbox_x=detection.bbox[0],
+                bbox_y=detection.bbox[1],
+                bbox_w=detection.bbox[2],
+                bbox_h=detection.bbox[3],
+                confidence=detection.confidence,
+                embedding=detection.embedding,
+            )
+        )
+    record_changes(db, PERSON, touched)
+    return len(detections)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Set, Tuple
+from uuid import UUID
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.media import Media
+from app.services.changes import MEDIA, record_change
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "homesnapshare:media-progress"
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+QUARANTINED = "quarantined"
+
+SUBSCRIBER_QUEUE_SIZE = 256
+RECONNECT_SECONDS = 2.0
+HEARTBEAT_SECONDS = 15.0
+ERROR_MAX_LENGTH = 1000
+
+Event = Tuple[str, bytes]
+
+
+def set_processing_state(media: Media, state: str, error: Optional[str] = None) -> None:
+    media.processing_state = state
+    media.processing_error = error[:ERROR_MAX_LENGTH] if error else None
+    media.processing_updated_at = datetime.now(timezone.utc)
+    if state == DONE:
+        media.processing_attempts = 0
+
+
+@lru_cache
+def _redis_client() -> redis.Redis:
+    return redis.Redis.from_url(settings.redis_url)
+
+
+def publish_progress(media: Media) -> None:
+    # Called after commit so a subscriber that reloads the media sees the state it was told about.
+    payload = {
+        "media_id": str(media.id),
+        "state": media.processing_state,
+        "error": media.processing_error,
+        "thumb_path": media.thumb_path,
+        "updated_at": media.processing_updated_at.isoformat() if media.processing_updated_at else None,
+    }
+    try:
+        _redis_client().publish(CHANNEL, json.dumps(payload))
+    except redis.RedisError as exc:
+        logger.warning("Could not publish progress for %s: %s", media.id, exc)
+
+
+def failed_state(media: Media) -> str:
+    # Files that keep failing are parked in a dead-letter state instead of being retried forever.
+    return QUARANTINED if (media.processing_attempts or 0) >= settings.media_max_attempts else FAILED
+
+
+def mark_failed(db: Session, media_id: UUID, error: str) -> None:
+    media = db.get(Media, media_id)
+    if media is None:
+        return
+    set_processing_state(media, failed_state(media), error)
+    record_change(db, MEDIA, media.id)
+    db.commit()
+    publish_progress(media)
+
+
+class ProgressBroker:
+
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.listener: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+
+    def _fan_out(self, data: bytes) -> None:
+        try:
+            media_id = json.loads(data)["media_id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        event = (media_id, b"event: progress\ndata: " + data + b"\n\n")
+        for queue in self.subscribers:
+            if queue.full():
+                # A stalled client loses its oldest events rather than holding memory for everyone else.
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _listen(self) -> None:
+        while self.subscribers:
+            client = aioredis.Redis.from_url(settings.redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._fan_out(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Progress subscription lost: %s", exc)
+                await asyncio.sleep(RECONNECT_SECONDS)
+            finally:
+                await client.aclose()
+
+
+broker = ProgressBroker()
+
+
+async def progress_events(media_ids: Optional[Set[str]] = None) -> AsyncIterator[bytes]:
+    queue = broker.subscribe()
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                media_id, event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if media_ids is None or media_id in media_ids:
+                yield event
+    finally:
+        broker.unsubscribe(queue)
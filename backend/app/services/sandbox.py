@@ -0,0 +1,90 @@
+import os
+import pickle
+import resource
+import select
+import signal
+import time
+from typing import Any, Callable
+
+from app.core.config import settings
+
+READ_SIZE = 1024 * 1024
+
+
+class SandboxError(Exception):
+    pass
+
+
+class SandboxTimeout(SandboxError):
+    pass
+
+
+class SandboxMemoryError(SandboxError):
+    pass
+
+
+def _address_space() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _run_child(write_fd: int, limit: int, func: Callable[..., Any], args: tuple) -> None:
+    status = 0
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        try:
+            payload = ("ok", func(*args))
+        except MemoryError:
+            payload = ("memory", "decoder ran out of memory")
+        except Exception as exc:
+            payload = ("error", f"{type(exc).__name__}: {exc}")
+        with os.fdopen(write_fd, "wb") as pipe:
+            pipe.write(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    except BaseException:
+        status = 1
+    finally:
+        # Skip atexit handlers and finalizers; the parent owns every inherited socket and file.
+        os._exit(status)
+
+
+def run_sandboxed(func: Callable[..., Any], *args: Any, timeout: float, memory_bytes: int) -> Any:
+    if not settings.sandbox_enabled or not hasattr(os, "fork"):
+        return func(*args)
+
+    # The child starts as a copy of this process, so the budget is on top of what is already mapped.
+    limit = _address_space() + memory_bytes
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _run_child(write_fd, limit, func, args)
+    os.close(write_fd)
+
+    chunks = []
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                os.kill(pid, signal.SIGKILL)
+                raise SandboxTimeout(f"decoder exceeded {timeout:g}s")
+            ready, _, _ = select.select([read_fd], [], [], remaining)
+            if ready:
+                chunk = os.read(read_fd, READ_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+
+    if not chunks:
+        if os.WIFSIGNALED(status):
+            raise SandboxError(f"decoder killed by {signal.Signals(os.WTERMSIG(status)).name}")
+        raise SandboxError(f"decoder exited with status {os.WEXITSTATUS(status)}")
+    kind, value = pickle.loads(b"".join(chunks))
+    if kind == "memory":
+        raise SandboxMemoryError(value)
+    if kind == "error":
+        raise SandboxError(value)
+    return value
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import calendar
+import re
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
+_DATE_RE = re.compile(r"^(?P<year>\d{4})(?:-(?P<month>\d{1,2})(?:-(?P<day>\d{1,2}))?)?$")
+
 
 @dataclass
 class SearchFilters:
     person_names: list[str] = field(default_factory=list)
+    person_match: Optional[str] = None
     season: Optional[str] = None
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
@@ -38,6 +44,9 @@ def parse_search(q: Optional[str]) -> SearchFilters:
         if key in ("person", "people", "p"):
             parts = [part.strip() for part in value.split(",") if part.strip()]
             filters.person_names.extend(parts)
+        elif key == "match":
+            if value.lower() in ("all", "any"):
+                filters.person_match = value.lower()
         elif key in ("season", "s"):
             filters.season = value.lower()
         elif key in ("date", "d"):
@@ -64,23 +73,24 @@ def parse_search(q: Optional[str]) -> SearchFilters:
     return filters
 
 
+@lru_cache(maxsize=1024)
 def parse_date(value: str, end_of_day: bool = False) -> Optional[datetime]:
-    value = value.strip()
-    formats = ["%Y-%m-%d", "%Y-%m", "%Y"]
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(value, fmt)
-            if fmt == "%Y":
-                dt = dt.replace(month=12 if end_of_day else 1, day=31 if end_of_day else 1)
-            elif fmt == "%Y-%m":
-                if end_of_day:
-                    dt = dt.replace(day=28)
-            if end_of_day:
-                dt = dt.replace(hour=23, minute=59, second=59)
-            return dt
-        except Exception:
-            continue
-    return None
+    match = _DATE_RE.match(value.strip())
+    if not match:
+        return None
+    year = int(match.group("year"))
+    month = int(match.group("month") or (12 if end_of_day else 1))
+    try:
+        if match.group("day"):
+            day = int(match.group("day"))
+        else:
+            day = calendar.monthrange(year, month)[1] if end_of_day else 1
+        dt = datetime(year, month, day)
+    except ValueError:
+        return None
+    if end_of_day:
+        dt = dt.replace(hour=23, minute=59, second=59)
+    return dt
 
 
 def _parse_bool(value: str) -> Optional[bool]:
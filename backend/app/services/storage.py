@@ -1,18 +1,58 @@
 import hashlib
+import io
+import logging
 import mimetypes
 import os
 import re
-import shutil
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import AsyncIterator, NamedTuple, Optional, Tuple
+from uuid import uuid4
 
+import anyio
 from fastapi import UploadFile
 from PIL import Image
 
 from app.core.config import settings
+from app.services.blobstore import media_storage, thumb_storage
+from app.services.decoders import open_image
+from app.services.metadata import read_embedded_preview
+
+logger = logging.getLogger(__name__)
 
 CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = ".part"
 THUMB_SIZE = (512, 512)
+EMBEDDED_THUMB_SUFFIX = ".embedded.jpg"
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+class UploadMismatch(Exception):
+    pass
+
+
+class RenderedImage(NamedTuple):
+    width: int
+    height: int
+    thumb_file: Optional[str]
+    analysis_size: Optional[Tuple[int, int]]
+    analysis_pixels: Optional[bytes]
+
+    @property
+    def scale(self) -> float:
+        return self.width / self.analysis_size[0] if self.analysis_size else 1.0
+
+    def analysis_image(self) -> Optional[Image.Image]:
+        if self.analysis_size is None:
+            return None
+        return Image.frombytes("RGB", self.analysis_size, self.analysis_pixels)
 
 
 def _safe_name(filename: str) -> str:
@@ -40,11 +80,19 @@ def ensure_storage_dirs() -> None:
     Path(settings.media_root, "tmp").mkdir(parents=True, exist_ok=True)
 
 
+def _storage_key(sha256: str, safe_name: str) -> str:
+    return str(Path(sha256[:2], sha256[2:4], f"{sha256}_{safe_name}"))
+
+
+def scratch_path(suffix: str = "") -> Path:
+    return Path(settings.media_root, "tmp", f"{uuid4().hex}{suffix}")
+
+
 def derive_media_type(mime_type: Optional[str], filename: str) -> str:
     return _media_type(mime_type, filename)
 
 
-def compute_and_store_path(source_path: Path) -> Tuple[str, int, str, bool]:
+def compute_and_store_path(source_path: Path) -> Tuple[str, int, str, bool, Optional[str]]:
     ensure_storage_dirs()
 
     safe_name = _safe_name(source_path.name)
@@ -60,86 +108,177 @@ def compute_and_store_path(source_path: Path) -> Tuple[str, int, str, bool]:
             hasher.update(chunk)
 
     sha256 = hasher.hexdigest()
-    subdir = Path(sha256[:2], sha256[2:4])
-    final_dir = Path(settings.media_root, subdir)
-    final_dir.mkdir(parents=True, exist_ok=True)
-    final_name = f"{sha256}_{safe_name}"
-    final_path = final_dir / final_name
+    storage_path = _storage_key(sha256, safe_name)
+    store = media_storage()
 
-    existed = final_path.exists()
+    existed = store.exists(storage_path)
+    thumb_path = None
     if existed:
         source_path.unlink(missing_ok=True)
     else:
-        shutil.move(str(source_path), str(final_path))
+        thumb_path = create_embedded_thumbnail(source_path, storage_path)
+        store.put_file(storage_path, str(source_path), move=True)
 
-    storage_path = str(subdir / final_name)
-    return sha256, size, storage_path, existed
+    return sha256, size, storage_path, existed, thumb_path
 
 
-def compute_and_store(upload: UploadFile) -> Tuple[str, int, str]:
+def compute_and_store(upload: UploadFile) -> Tuple[str, int, str, Optional[str]]:
     ensure_storage_dirs()
 
     safe_name = _safe_name(upload.filename or "file")
-    tmp_path = Path(settings.media_root, "tmp", f"{safe_name}.part")
+    tmp_path = scratch_path(PART_SUFFIX)
     hasher = hashlib.sha256()
     size = 0
+    thumb_path = None
 
-    with tmp_path.open("wb") as tmp_file:
-        while True:
-            chunk = upload.file.read(CHUNK_SIZE)
-            if not chunk:
-                break
-            size += len(chunk)
-            hasher.update(chunk)
-            tmp_file.write(chunk)
+    try:
+        with tmp_path.open("wb") as tmp_file:
+            while True:
+                chunk = upload.file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+
+        sha256 = hasher.hexdigest()
+        storage_path = _storage_key(sha256, safe_name)
+        store = media_storage()
+
+        if not store.exists(storage_path):
+            thumb_path = create_embedded_thumbnail(tmp_path, storage_path)
+            store.put_file(storage_path, str(tmp_path), move=True)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
-    sha256 = hasher.hexdigest()
-    subdir = Path(sha256[:2], sha256[2:4])
-    final_dir = Path(settings.media_root, subdir)
-    final_dir.mkdir(parents=True, exist_ok=True)
-    final_name = f"{sha256}_{safe_name}"
-    final_path = final_dir / final_name
+    return sha256, size, storage_path, thumb_path
+
+
+async def store_claimed_upload(
+    chunks: AsyncIterator[bytes], filename: str, expected_sha256: str, expected_size: int
+) -> Tuple[str, Optional[str]]:
+    ensure_storage_dirs()
 
-    if final_path.exists():
+    safe_name = _safe_name(filename or "file")
+    tmp_path = scratch_path(PART_SUFFIX)
+    hasher = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    thumb_path = None
+
+    try:
+        with tmp_path.open("wb") as tmp_file:
+
+            def flush(data: bytes) -> None:
+                hasher.update(data)
+                tmp_file.write(data)
+
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > expected_size:
+                    raise UploadMismatch(f"Body exceeds the claimed size of {expected_size} bytes")
+                buffer += chunk
+                if len(buffer) >= CHUNK_SIZE:
+                    await anyio.to_thread.run_sync(flush, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await anyio.to_thread.run_sync(flush, bytes(buffer))
+
+        if size != expected_size:
+            raise UploadMismatch(f"Received {size} bytes, expected {expected_size}")
+        if hasher.hexdigest() != expected_sha256:
+            raise UploadMismatch("Body does not match the claimed sha256")
+
+        storage_path = _storage_key(expected_sha256, safe_name)
+        store = media_storage()
+        if not await anyio.to_thread.run_sync(store.exists, storage_path):
+            thumb_path = await anyio.to_thread.run_sync(create_embedded_thumbnail, tmp_path, storage_path)
+            await anyio.to_thread.run_sync(store.put_file, storage_path, str(tmp_path), True)
+    finally:
         tmp_path.unlink(missing_ok=True)
-    else:
-        shutil.move(str(tmp_path), str(final_path))
 
-    storage_path = str(subdir / final_name)
-    return sha256, size, storage_path
+    return storage_path, thumb_path
+
+
+def _render_thumbnail(img: Image.Image, orientation: int, target: Path) -> None:
+    # JPEG decoders can scale by 1/2..1/8 while decoding, so large sources never materialise at full size.
+    img.draft("RGB", THUMB_SIZE)
+    img = img.convert("RGB")
+    img.thumbnail(THUMB_SIZE)
+    if orientation in ORIENTATION_TRANSPOSE:
+        img = img.transpose(ORIENTATION_TRANSPOSE[orientation])
+    img.save(target, format="JPEG", quality=85)
+
 
+def is_embedded_thumbnail(thumb_path: Optional[str]) -> bool:
+    return bool(thumb_path) and thumb_path.endswith(EMBEDDED_THUMB_SUFFIX)
 
-def create_thumbnail(storage_path: str, filename: str, mime_type: Optional[str]) -> Optional[str]:
-    media_kind = _media_type(mime_type, filename)
-    if media_kind != "image":
+
+def create_embedded_thumbnail(source_path: Path, storage_path: str) -> Optional[str]:
+    preview = read_embedded_preview(str(source_path))
+    if preview is None:
         return None
 
-    ensure_storage_dirs()
-    source_path = Path(settings.media_root, storage_path)
-    thumb_name = Path(storage_path).with_suffix(".jpg").name
-    thumb_path = Path(settings.thumb_root, thumb_name)
+    data, orientation = preview
+    thumb_name = Path(storage_path).with_suffix(EMBEDDED_THUMB_SUFFIX).name
+    tmp_path = scratch_path(".jpg")
 
     try:
-        with Image.open(source_path) as img:
-            img = img.convert("RGB")
-            img.thumbnail(THUMB_SIZE)
-            img.save(thumb_path, format="JPEG", quality=85)
+        with Image.open(io.BytesIO(data)) as img:
+            _render_thumbnail(img, orientation, tmp_path)
+        thumb_storage().put_file(thumb_name, str(tmp_path), move=True)
     except Exception:
+        tmp_path.unlink(missing_ok=True)
         return None
 
-    return thumb_path.name
+    return thumb_name
 
 
-def delete_media_files(storage_path: str, thumb_path: Optional[str]) -> None:
-    media_file = Path(settings.media_root, storage_path)
+def render_image(source_path: str, analysis: bool) -> RenderedImage:
+    # Runs inside the decode sandbox: one decode yields the thumbnail and a bounded-size copy for face analysis.
+    thumb_file = scratch_path(".jpg")
     try:
-        media_file.unlink(missing_ok=True)
-    except Exception:
-        pass
-
-    if thumb_path:
-        thumb_file = Path(settings.thumb_root, thumb_path)
-        try:
-            thumb_file.unlink(missing_ok=True)
-        except Exception:
-            pass
+        with open_image(source_path) as decoded:
+            img = decoded.image
+            width, height = img.size
+            edge = settings.image_analysis_max_edge if analysis else max(THUMB_SIZE)
+            img.draft("RGB", (edge, edge))
+            img = img.convert("RGB")
+            if max(img.size) > edge:
+                img.thumbnail((edge, edge))
+            _render_thumbnail(img, decoded.orientation, thumb_file)
+    except BaseException:
+        thumb_file.unlink(missing_ok=True)
+        raise
+    if not analysis:
+        return RenderedImage(width, height, str(thumb_file), None, None)
+    return RenderedImage(width, height, str(thumb_file), img.size, img.tobytes())
+
+
+def store_thumbnail(thumb_file: str, storage_path: str) -> Optional[str]:
+    thumb_name = Path(storage_path).with_suffix(".jpg").name
+    try:
+        thumb_storage().put_file(thumb_name, thumb_file, move=True)
+    except Exception as exc:
+        Path(thumb_file).unlink(missing_ok=True)
+        logger.warning("Could not store thumbnail %s: %s", thumb_name, exc)
+        return None
+    return thumb_name
+
+
+def delete_thumbnail(thumb_path: str) -> None:
+    try:
+        thumb_storage().delete(thumb_path)
+    except Exception as exc:
+        logger.warning("Could not delete %s: %s", thumb_path, exc)
+
+
+def delete_media_files(storage_path: str, thumb_path: Optional[str], preview_path: Optional[str] = None) -> None:
+    try:
+        media_storage().delete(storage_path)
+    except Exception as exc:
+        logger.warning("Could not delete %s: %s", storage_path, exc)
+
+    for derived_path in (thumb_path, preview_path):
+        if derived_path:
+            delete_thumbnail(derived_path)
@@ -0,0 +1,197 @@
+import json
+import logging
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.blobstore import thumb_storage
+from app.services.storage import THUMB_SIZE, ensure_storage_dirs, scratch_path
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_DIR = "previews"
+
+
+def _run(args: List[str]) -> Optional[subprocess.CompletedProcess]:
+    try:
+        return subprocess.run(
+            args,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            timeout=settings.video_timeout_seconds,
+            check=True,
+        )
+    except FileNotFoundError:
+        logger.warning("Video tool not installed: %s", args[0])
+    except subprocess.TimeoutExpired:
+        logger.warning("%s timed out after %ss", args[0], settings.video_timeout_seconds)
+    except subprocess.CalledProcessError as exc:
+        logger.warning("%s failed: %s", args[0], exc.stderr.decode("utf-8", "replace").strip()[-500:])
+    return None
+
+
+def _parse_creation_time(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    # Cameras without a clock write the QuickTime epoch.
+    if parsed.year <= 1970:
+        return None
+    return parsed
+
+
+def _rotation(stream: Dict[str, Any]) -> int:
+    rotate = stream.get("tags", {}).get("rotate")
+    if rotate is None:
+        for side_data in stream.get("side_data_list", []):
+            if "rotation" in side_data:
+                rotate = side_data["rotation"]
+                break
+    try:
+        return int(float(rotate or 0)) % 360
+    except (TypeError, ValueError):
+        return 0
+
+
+def probe_video(path: str) -> Optional[Dict[str, Any]]:
+    result = _run(
+        [
+            settings.ffprobe_path,
+            "-v",
+            "error",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            path,
+        ]
+    )
+    if result is None:
+        return None
+    try:
+        info = json.loads(result.stdout)
+    except ValueError:
+        return None
+
+    fmt = info.get("format", {})
+    video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), None)
+    parsed: Dict[str, Any] = {}
+
+    duration = fmt.get("duration") or (video or {}).get("duration")
+    try:
+        if duration is not None:
+            parsed["duration_seconds"] = float(duration)
+    except ValueError:
+        pass
+
+    if video and video.get("width") and video.get("height"):
+        width, height = int(video["width"]), int(video["height"])
+        if _rotation(video) in (90, 270):
+            width, height = height, width
+        parsed["width"], parsed["height"] = width, height
+
+    captured_at = _parse_creation_time(fmt.get("tags", {}).get("creation_time"))
+    if captured_at is None and video:
+        captured_at = _parse_creation_time(video.get("tags", {}).get("creation_time"))
+    if captured_at:
+        parsed["captured_at"] = captured_at
+
+    parsed["has_video"] = video is not None
+    return parsed
+
+
+def create_poster(source_path: str, storage_path: str, duration_seconds: Optional[float]) -> Optional[str]:
+    ensure_storage_dirs()
+    thumb_name = Path(storage_path).with_suffix(".jpg").name
+    tmp_path = scratch_path(".jpg")
+
+    offset = settings.video_poster_offset_seconds
+    if duration_seconds is not None and duration_seconds <= offset:
+        offset = 0
+    result = _run(
+        [
+            settings.ffmpeg_path,
+            "-nostdin",
+            "-y",
+            "-loglevel",
+            "error",
+            "-ss",
+            f"{offset:.3f}",
+            "-i",
+            source_path,
+            "-frames:v",
+            "1",
+            "-vf",
+            f"scale={THUMB_SIZE[0]}:{THUMB_SIZE[1]}:force_original_aspect_ratio=decrease",
+            "-q:v",
+            "4",
+            str(tmp_path),
+        ]
+    )
+    if result is None or not tmp_path.exists():
+        tmp_path.unlink(missing_ok=True)
+        return None
+    thumb_storage().put_file(thumb_name, str(tmp_path), move=True)
+    return thumb_name
+
+
+def create_preview(source_path: str, storage_path: str) -> Optional[str]:
+    ensure_storage_dirs()
+    preview_key = f"{PREVIEW_DIR}/{Path(storage_path).with_suffix('.mp4').name}"
+    tmp_path = scratch_path(".mp4")
+
+    height = settings.video_preview_height
+    args = [
+        settings.ffmpeg_path,
+        "-nostdin",
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        source_path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        f"scale=-2:'min({height},ih)'",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-b:v",
+        settings.video_preview_bitrate,
+        "-maxrate",
+        settings.video_preview_bitrate,
+        "-bufsize",
+        settings.video_preview_bitrate,
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "aac",
+        "-b:a",
+        "96k",
+        "-ac",
+        "2",
+        "-movflags",
+        "+faststart",
+        "-threads",
+        str(settings.video_ffmpeg_threads),
+        "-f",
+        "mp4",
+    ]
+    if settings.video_preview_max_seconds:
+        args += ["-t", str(settings.video_preview_max_seconds)]
+    result = _run(args + [str(tmp_path)])
+    if result is None or not tmp_path.exists():
+        tmp_path.unlink(missing_ok=True)
+        return None
+    thumb_storage().put_file(preview_key, str(tmp_path), move=True)
+    return preview_key
@@ -0,0 +1,188 @@
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+READ_SIZE = 1024 * 1024
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP32_ENTRY_LIMIT = 0xFFFF
+
+FLAG_DATA_DESCRIPTOR = 0x0008
+FLAG_UTF8 = 0x0800
+VERSION_ZIP32 = 20
+VERSION_ZIP64 = 45
+UNIX_FILE_ATTRS = (0o100644 & 0xFFFF) << 16
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    path: str
+    arcname: str
+    size: int
+    modified: datetime
+
+
+def _dos_datetime(value: datetime) -> Tuple[int, int]:
+    year = min(max(value.year, 1980), 2107)
+    date = ((year - 1980) << 9) | (value.month << 5) | value.day
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    return time, date
+
+
+def _is_zip64(entry: ZipEntry) -> bool:
+    return entry.size >= ZIP32_LIMIT
+
+
+def _local_header(entry: ZipEntry, name: bytes) -> bytes:
+    zip64 = _is_zip64(entry)
+    time, date = _dos_datetime(entry.modified)
+    extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0) if zip64 else b""
+    sizes = ZIP32_LIMIT if zip64 else 0
+    return (
+        struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            VERSION_ZIP64 if zip64 else VERSION_ZIP32,
+            FLAG_DATA_DESCRIPTOR | FLAG_UTF8,
+            0,
+            time,
+            date,
+            0,
+            sizes,
+            sizes,
+            len(name),
+            len(extra),
+        )
+        + name
+        + extra
+    )
+
+
+def _data_descriptor(entry: ZipEntry, crc: int) -> bytes:
+    if _is_zip64(entry):
+        return struct.pack("<IIQQ", 0x08074B50, crc, entry.size, entry.size)
+    return struct.pack("<IIII", 0x08074B50, crc, entry.size, entry.size)
+
+
+def _central_header(entry: ZipEntry, name: bytes, crc: int, offset: int) -> bytes:
+    time, date = _dos_datetime(entry.modified)
+    extra_values = []
+    if _is_zip64(entry):
+        extra_values += [entry.size, entry.size]
+    if offset >= ZIP32_LIMIT:
+        extra_values.append(offset)
+    extra = b""
+    if extra_values:
+        extra = struct.pack(f"<HH{len(extra_values)}Q", 0x0001, 8 * len(extra_values), *extra_values)
+    version = VERSION_ZIP64 if extra_values else VERSION_ZIP32
+    return (
+        struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014B50,
+            (3 << 8) | version,
+            version,
+            FLAG_DATA_DESCRIPTOR | FLAG_UTF8,
+            0,
+            time,
+            date,
+            crc,
+            ZIP32_LIMIT if _is_zip64(entry) else entry.size,
+            ZIP32_LIMIT if _is_zip64(entry) else entry.size,
+            len(name),
+            len(extra),
+            0,
+            0,
+            0,
+            UNIX_FILE_ATTRS,
+            min(offset, ZIP32_LIMIT),
+        )
+        + name
+        + extra
+    )
+
+
+def _end_records(count: int, directory_offset: int, directory_size: int) -> bytes:
+    needs_zip64 = count >= ZIP32_ENTRY_LIMIT or directory_offset >= ZIP32_LIMIT or directory_size >= ZIP32_LIMIT
+    records = b""
+    if needs_zip64:
+        zip64_end_offset = directory_offset + directory_size
+        records += struct.pack(
+            "<IQHHIIQQQQ",
+            0x06064B50,
+            44,
+            (3 << 8) | VERSION_ZIP64,
+            VERSION_ZIP64,
+            0,
+            0,
+            count,
+            count,
+            directory_size,
+            directory_offset,
+        )
+        records += struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+    records += struct.pack(
+        "<IHHHHIIH",
+        0x06054B50,
+        0,
+        0,
+        min(count, ZIP32_ENTRY_LIMIT),
+        min(count, ZIP32_ENTRY_LIMIT),
+        min(directory_size, ZIP32_LIMIT),
+        min(directory_offset, ZIP32_LIMIT),
+        0,
+    )
+    return records
+
+
+def _layout(entries: Sequence[ZipEntry]) -> Tuple[List[int], int, int]:
+    offsets = []
+    offset = 0
+    directory_size = 0
+    for entry in entries:
+        name = entry.arcname.encode("utf-8")
+        offsets.append(offset)
+        offset += len(_local_header(entry, name)) + entry.size + len(_data_descriptor(entry, 0))
+        directory_size += len(_central_header(entry, name, 0, offsets[-1]))
+    return offsets, offset, directory_size
+
+
+def archive_size(entries: Sequence[ZipEntry]) -> int:
+    _, directory_offset, directory_size = _layout(entries)
+    return directory_offset + directory_size + len(_end_records(len(entries), directory_offset, directory_size))
+
+
+def read_file(entry: ZipEntry) -> Iterator[bytes]:
+    remaining = entry.size
+    with open(entry.path, "rb") as handle:
+        while remaining > 0:
+            chunk = handle.read(min(READ_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def iter_zip(entries: Iterable[ZipEntry], read: Callable[[ZipEntry], Iterable[bytes]] = read_file) -> Iterator[bytes]:
+    central: List[bytes] = []
+    offset = 0
+    for entry in entries:
+        name = entry.arcname.encode("utf-8")
+        header = _local_header(entry, name)
+        yield header
+        crc = 0
+        written = 0
+        for chunk in read(entry):
+            crc = zlib.crc32(chunk, crc)
+            written += len(chunk)
+            yield chunk
+        if written != entry.size:
+            raise RuntimeError(f"{entry.path} is {written} bytes, {entry.size} were planned for the archive")
+        descriptor = _data_descriptor(entry, crc)
+        yield descriptor
+        central.append(_central_header(entry, name, crc, offset))
+        offset += len(header) + entry.size + len(descriptor)
+
+    directory_size = sum(len(record) for record in central)
+    yield from central
+    yield _end_records(len(central), offset, directory_size)
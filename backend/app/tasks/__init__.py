@@ -1,3 +1,4 @@
 from app.tasks.media import process_media
+from app.tasks.video import process_video
 
-__all__ = ["process_media"]
+__all__ = ["process_media", "process_video"]
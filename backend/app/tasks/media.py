@@ -1,20 +1,35 @@
 import mimetypes
+from contextlib import ExitStack
+from pathlib import Path
 from typing import Optional
 from uuid import UUID
 
 from sqlalchemy.orm import Session
-from PIL import Image
 
 from app.core.config import settings
 from app.db.session import SessionLocal
-from app.models.face import Face
 from app.models.media import Media
-from app.services.exif import extract_exif
+from app.services.blobstore import media_storage
+from app.services.changes import MEDIA, record_change
+from app.services.exif import extract_exif, save_raw_exif
 from app.services.face_ai import detect_faces
-from app.services.geo import reverse_geocode_optional, format_location
-from app.services.person_matching import match_or_create_person
+from app.services.facets import facet_key, record_facet_change
+from app.services.geo import reverse_geocode_optional, format_location, resolve_location
+from app.services.geo_tiles import geo_point, record_geo_change
+from app.services.person_matching import sync_media_faces
+from app.services.progress import (
+    DONE,
+    PROCESSING,
+    QUARANTINED,
+    failed_state,
+    mark_failed,
+    publish_progress,
+    set_processing_state,
+)
 from app.services.season import infer_season
-from app.services.storage import create_thumbnail
+from app.services.sandbox import SandboxError, run_sandboxed
+from app.services.storage import delete_thumbnail, is_embedded_thumbnail, render_image, store_thumbnail
+from app.tasks.video import process_video
 from app.worker import celery_app
 
 
@@ -31,85 +46,147 @@ def _derive_media_type(mime_type: Optional[str], filename: str) -> str:
     return "other"
 
 
-@celery_app.task
+def _finish(db: Session, media: Media, facets_before, state: str = DONE, error: Optional[str] = None) -> None:
+    record_facet_change(db, facets_before, media)
+    set_processing_state(media, state, error)
+    db.commit()
+    publish_progress(media)
+
+
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
 def process_media(media_id: str) -> dict:
     db: Session = SessionLocal()
+    files = ExitStack()
     try:
         media = db.get(Media, UUID(media_id))
         if not media:
             return {"status": "not_found"}
-
-        full_path = f"{settings.media_root}/{media.storage_path}"
-        raw_exif, parsed = extract_exif(full_path)
-
-        if parsed.get("captured_at"):
-            media.captured_at = parsed["captured_at"]
-        if parsed.get("camera_make"):
-            media.camera_make = parsed["camera_make"]
-        if parsed.get("camera_model"):
-            media.camera_model = parsed["camera_model"]
-        if parsed.get("orientation"):
-            media.orientation = parsed["orientation"]
-        if parsed.get("gps_lat") is not None and parsed.get("gps_lon") is not None:
-            media.gps_lat = parsed["gps_lat"]
-            media.gps_lon = parsed["gps_lon"]
-            media.has_gps = True
-            if not media.location_text:
-                media.location_text = reverse_geocode_optional(media.gps_lat, media.gps_lon) or format_location(
-                    media.gps_lat, media.gps_lon
-                )
-        if parsed.get("gps_altitude") is not None:
-            media.gps_altitude = parsed["gps_altitude"]
-
-        if raw_exif:
-            media.raw_exif = raw_exif
-
-        if not media.mime_type:
-            media.mime_type = mimetypes.guess_type(media.original_filename)[0]
-        if not media.media_type:
-            media.media_type = _derive_media_type(media.mime_type, media.original_filename)
-
-        if media.media_type == "image" and (not media.width or not media.height):
-            try:
-                with Image.open(full_path) as img:
-                    media.width, media.height = img.size
-            except Exception:
-                pass
-
-        if not media.thumb_path:
-            media.thumb_path = create_thumbnail(media.storage_path, media.original_filename, media.mime_type)
-
-        media.season = infer_season(media.captured_at, media.gps_lat)
-
-        if not settings.ai_enabled:
-            db.commit()
-            return {"status": "ok", "ai": "disabled"}
-
-        if media.media_type != "image":
-            db.commit()
-            return {"status": "ok", "ai": "skipped_non_image"}
-
-        db.query(Face).filter(Face.media_id == media.id).delete()
-        media.face_count = 0
-
-        faces = detect_faces(full_path)
-        for face in faces:
-            person_id = match_or_create_person(db, face.embedding)
-            db.add(
-                Face(
-                    media_id=media.id,
-                    person_id=person_id,
-                    bbox_x=face.bbox[0],
-                    bbox_y=face.bbox[1],
-                    bbox_w=face.bbox[2],
-                    bbox_h=face.bbox[3],
-                    confidence=face.confidence,
-                    embedding=face.embedding,
-                )
-            )
-            media.face_count += 1
-
+        if media.processing_state == QUARANTINED:
+            return {"status": "quarantined"}
+        media.processing_attempts = (media.processing_attempts or 0) + 1
+        if media.processing_attempts > settings.media_max_attempts:
+            # Earlier attempts never reported back, e.g. the worker died mid-job.
+            mark_failed(db, media.id, media.processing_error or "processing did not complete")
+            return {"status": "quarantined"}
+        set_processing_state(media, PROCESSING)
         db.commit()
-        return {"status": "ok"}
+        publish_progress(media)
+        provisional_thumb = media.thumb_path if is_embedded_thumbnail(media.thumb_path) else None
+        try:
+            result = _process(db, files, media)
+        except Exception as exc:
+            db.rollback()
+            mark_failed(db, media.id, repr(exc))
+            raise
+        if provisional_thumb and media.thumb_path != provisional_thumb:
+            delete_thumbnail(provisional_thumb)
+        return result
     finally:
+        files.close()
         db.close()
+
+
+def _process(db: Session, files: ExitStack, media: Media) -> dict:
+    media_id = str(media.id)
+    facets_before = facet_key(media)
+    geo_before = geo_point(media)
+
+    # Decode, render and detect before the first write: a write assigns this transaction an xid, and an xid held
+    # open through the sandbox would hold back the /sync feed and the embedding exporter for every client.
+    full_path = files.enter_context(media_storage().local_path(media.storage_path))
+    raw_exif, parsed = extract_exif(full_path)
+
+    if not media.mime_type:
+        media.mime_type = mimetypes.guess_type(media.original_filename)[0]
+    if not media.media_type:
+        media.media_type = _derive_media_type(media.mime_type, media.original_filename)
+
+    rendered = None
+    faces = None
+    decode_error = None
+    if media.media_type == "image":
+        try:
+            rendered = run_sandboxed(
+                render_image,
+                full_path,
+                settings.ai_enabled,
+                timeout=settings.sandbox_timeout_seconds,
+                memory_bytes=settings.sandbox_memory_mb * 1024 * 1024,
+            )
+        except SandboxError as exc:
+            # The header fields below do not need a decoded image, so only the thumbnail and faces are lost.
+            decode_error = str(exc)
+        else:
+            if settings.ai_enabled:
+                faces = detect_faces(rendered.analysis_image(), rendered.scale)
+
+    record_change(db, MEDIA, media.id)
+    if parsed.get("captured_at"):
+        media.captured_at = parsed["captured_at"]
+    if parsed.get("camera_make"):
+        media.camera_make = parsed["camera_make"]
+    if parsed.get("camera_model"):
+        media.camera_model = parsed["camera_model"]
+    if parsed.get("orientation"):
+        media.orientation = parsed["orientation"]
+    if parsed.get("gps_lat") is not None and parsed.get("gps_lon") is not None:
+        media.gps_lat = parsed["gps_lat"]
+        media.gps_lon = parsed["gps_lon"]
+        media.has_gps = True
+        if settings.reverse_geocode_enabled and not media.location_id:
+            location = resolve_location(db, media.gps_lat, media.gps_lon)
+            if location:
+                media.location_id = location.id
+                media.location_text = location.label
+        if not media.location_text:
+            media.location_text = reverse_geocode_optional(media.gps_lat, media.gps_lon) or format_location(
+                media.gps_lat, media.gps_lon
+            )
+    if parsed.get("gps_altitude") is not None:
+        media.gps_altitude = parsed["gps_altitude"]
+    if parsed.get("width") and parsed.get("height"):
+        media.width, media.height = parsed["width"], parsed["height"]
+    if parsed.get("duration_seconds"):
+        media.duration_seconds = parsed["duration_seconds"]
+    record_geo_change(db, geo_before, media)
+
+    if raw_exif:
+        save_raw_exif(db, media.id, raw_exif)
+
+    if rendered is not None:
+        if not media.width or not media.height:
+            media.width, media.height = rendered.width, rendered.height
+        if not media.thumb_path or is_embedded_thumbnail(media.thumb_path):
+            # The embedded preview written at upload time is replaced by a rendition of the full image.
+            media.thumb_path = store_thumbnail(rendered.thumb_file, media.storage_path) or media.thumb_path
+        else:
+            Path(rendered.thumb_file).unlink(missing_ok=True)
+
+    media.season = infer_season(media.captured_at, media.gps_lat)
+
+    if decode_error is not None:
+        _finish(db, media, facets_before, failed_state(media), decode_error)
+        return {"status": media.processing_state, "error": decode_error}
+
+    if media.media_type == "video":
+        # The video task finishes the job and moves the state on.
+        _finish(db, media, facets_before, PROCESSING)
+        process_video.delay(media_id)
+        return {"status": "ok", "video": "queued"}
+
+    if not settings.ai_enabled:
+        _finish(db, media, facets_before)
+        return {"status": "ok", "ai": "disabled"}
+
+    if media.media_type != "image":
+        _finish(db, media, facets_before)
+        return {"status": "ok", "ai": "skipped_non_image"}
+
+    if faces is None:
+        # Keep the faces from the last successful run rather than wiping them when the model is unavailable.
+        _finish(db, media, facets_before)
+        return {"status": "ok", "ai": "unavailable"}
+    media.face_count = sync_media_faces(db, media.id, faces)
+
+    _finish(db, media, facets_before)
+    return {"status": "ok"}
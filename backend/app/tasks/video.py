@@ -0,0 +1,68 @@
+from contextlib import ExitStack
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.media import Media
+from app.services.blobstore import media_storage
+from app.services.changes import MEDIA, record_change
+from app.services.facets import facet_key, record_facet_change
+from app.services.progress import DONE, mark_failed, publish_progress, set_processing_state
+from app.services.season import infer_season
+from app.services.video import create_poster, create_preview, probe_video
+from app.worker import celery_app
+
+
+@celery_app.task(acks_late=True)
+def process_video(media_id: str) -> dict:
+    db: Session = SessionLocal()
+    files = ExitStack()
+    try:
+        media = db.get(Media, UUID(media_id))
+        if not media:
+            return {"status": "not_found"}
+        if media.media_type != "video":
+            return {"status": "skipped_non_video"}
+        try:
+            return _process(db, files, media)
+        except Exception as exc:
+            db.rollback()
+            mark_failed(db, media.id, repr(exc))
+            raise
+    finally:
+        files.close()
+        db.close()
+
+
+def _process(db: Session, files: ExitStack, media: Media) -> dict:
+    facets_before = facet_key(media)
+
+    full_path = files.enter_context(media_storage().local_path(media.storage_path))
+    info = probe_video(full_path)
+    if info is None:
+        db.rollback()
+        mark_failed(db, media.id, "ffprobe could not read the file")
+        return {"status": "probe_failed"}
+
+    if info.get("duration_seconds"):
+        media.duration_seconds = info["duration_seconds"]
+    if info.get("width") and info.get("height"):
+        media.width, media.height = info["width"], info["height"]
+    if info.get("captured_at") and not media.captured_at:
+        media.captured_at = info["captured_at"]
+    media.season = infer_season(media.captured_at, media.gps_lat)
+
+    if info.get("has_video"):
+        if not media.thumb_path:
+            media.thumb_path = create_poster(full_path, media.storage_path, media.duration_seconds)
+        if not media.preview_path:
+            media.preview_path = create_preview(full_path, media.storage_path)
+
+    # Written only after ffmpeg is done, so this job holds no xid open while it transcodes.
+    record_change(db, MEDIA, media.id)
+    record_facet_change(db, facets_before, media)
+    set_processing_state(media, DONE)
+    db.commit()
+    publish_progress(media)
+    return {"status": "ok", "poster": bool(media.thumb_path), "preview": bool(media.preview_path)}
@@ -1,11 +1,20 @@
 from celery import Celery
+from celery.signals import worker_process_init
 
 from app.core.config import settings
+from app.db.session import engine
 
 celery_app = Celery("homesnapshare", broker=settings.redis_url, backend=settings.redis_url)
+celery_app.conf.task_routes = {"app.tasks.video.*": {"queue": "video"}}
 celery_app.autodiscover_tasks(["app"])
 
 
 @celery_app.task
 def noop():
     return {"status": "ok"}
+
+
+@worker_process_init.connect
+def reset_db_pool(**_kwargs):
+    # Prefork children inherit the parent's pooled sockets; start each child with its own pool.
+    engine.dispose(close=False)